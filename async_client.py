@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sys
+import grpc
+import protos.dfs_pb2 as pb2
+import protos.dfs_pb2_grpc as pb2_grpc
+from checksum import crc, hash_blocks
+from compression import available_codecs, encode_chunk
+from pool import node_address
+
+# Client asinkron (grpc.aio) untuk ingest banyak file:
+# - upload ke semua target (Primary & Replica) dijalankan bersamaan
+# - banyak file di-upload paralel dengan batas in-flight (window)
+# - channel ke Master/DataNode dipakai ulang, tidak dibuat per file
+# - penempatan & commit diminta ke Master per batch, bukan per file
+
+MASTER_ADDRESS = os.getenv("MASTER_ADDRESS", "localhost:50051")
+CHUNK_SIZE = 1024 * 1024
+# Jumlah file yang boleh diproses bersamaan
+DEFAULT_WINDOW = 32
+# Jumlah file per RequestUploadBatch
+BATCH_SIZE = 100
+# Deduplikasi konten per blok (BLOCK_SIZE harus sama dengan Master)
+DEDUP = True
+BLOCK_SIZE = 64 * 1024 * 1024
+# Tawarkan codec kompresi yang tersedia ke Master
+COMPRESSION = True
+
+async def chunk_stream(name, filepath, offset, length, codec=""):
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        first = True
+        while True:
+            # Baca disk di thread lain agar event loop tidak tertahan
+            raw = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+            remaining -= len(raw)
+            # Total panjang di chunk pertama, CRC32 di setiap chunk
+            if codec:
+                # Kompresi juga di thread lain (zlib/zstd/lz4 melepas GIL)
+                used, data = await asyncio.to_thread(encode_chunk, raw, codec)
+                yield pb2.ChunkData(filename=name, data=data, checksum=crc(data),
+                                    codec=used, raw_length=len(raw),
+                                    length=length if first else 0)
+            else:
+                yield pb2.ChunkData(filename=name, data=raw, checksum=crc(raw),
+                                    length=length if first else 0)
+            first = False
+            if remaining <= 0 or not raw: break
+
+class AsyncDFSClient:
+    def __init__(self, master_address=MASTER_ADDRESS):
+        self.master_address = master_address
+        self.channels = {}
+        self.stubs = {}
+
+    def stub(self, address):
+        stub = self.stubs.get(address)
+        if stub is None:
+            channel = grpc.aio.insecure_channel(address)
+            stub = pb2_grpc.DFSServiceStub(channel)
+            self.channels[address] = channel
+            self.stubs[address] = stub
+        return stub
+
+    async def close(self):
+        for channel in self.channels.values():
+            await channel.close()
+        self.channels.clear()
+        self.stubs.clear()
+
+    async def send_to_node(self, node, block, filepath):
+        try:
+            reply = await self.stub(node_address(node)).UploadStream(
+                chunk_stream(block.block_id, filepath, block.offset, block.length, block.codec))
+            return reply.success
+        except grpc.aio.AioRpcError:
+            return False
+
+    async def send_file(self, response, filepath):
+        # Fan-out: semua blok ke semua target ditulis bersamaan,
+        # latency = yang paling lambat
+        results = await asyncio.gather(
+            *(self.send_to_node(node, block, filepath)
+              for block in response.blocks if not block.exists
+              for node in block.target_datanodes))
+        return all(results)
+
+    async def upload_request(self, filename, filepath):
+        filesize = os.path.getsize(filepath)
+        request = pb2.UploadRequest(filename=filename, filesize=filesize,
+                                    codecs=available_codecs() if COMPRESSION else ())
+        if not DEDUP:
+            return request
+        # Hash dihitung di thread lain agar event loop tidak tertahan
+        request.block_size = BLOCK_SIZE
+        request.block_hashes.extend(
+            await asyncio.to_thread(hash_blocks, filepath, filesize, BLOCK_SIZE))
+        return request
+
+    async def upload_file(self, filename, filepath):
+        response = await self.stub(self.master_address).RequestUpload(
+            await self.upload_request(filename, filepath))
+        if not response.blocks: return False
+        if not await self.send_file(response, filepath): return False
+
+        reply = await self.stub(self.master_address).CommitUpload(response)
+        return reply.success
+
+    # Satu batch = 1 RequestUploadBatch + 1 CommitUploadBatch ke Master
+    async def upload_batch(self, batch, semaphore):
+        master = self.stub(self.master_address)
+        try:
+            requests = await asyncio.gather(*(self.upload_request(name, path) for name, path in batch))
+            response = await master.RequestUploadBatch(pb2.UploadBatchRequest(files=requests))
+        except grpc.aio.AioRpcError as e:
+            print(f"[AsyncClient] Gagal meminta penempatan batch: {e.code()}")
+            return [False] * len(batch)
+
+        async def send_one(planned, filepath):
+            if not planned.blocks: return False
+            async with semaphore:
+                try:
+                    return await self.send_file(planned, filepath)
+                except Exception as e:
+                    print(f"[AsyncClient] Gagal upload {planned.filename}: {e}")
+                    return False
+
+        results = await asyncio.gather(
+            *(send_one(planned, path) for planned, (_, path) in zip(response.files, batch)))
+
+        committed = [planned for planned, ok in zip(response.files, results) if ok]
+        if committed:
+            try:
+                reply = await master.CommitUploadBatch(pb2.UploadBatchResponse(files=committed))
+                if not reply.success: return [False] * len(batch)
+            except grpc.aio.AioRpcError as e:
+                print(f"[AsyncClient] Gagal commit batch: {e.code()}")
+                return [False] * len(batch)
+        return list(results)
+
+    # files: list of (filename, filepath). Hasil: list bool sesuai urutan input
+    async def upload_many(self, files, window=DEFAULT_WINDOW, batch_size=BATCH_SIZE):
+        semaphore = asyncio.Semaphore(window)
+        # Beberapa batch berjalan bersamaan agar penempatan batch berikutnya
+        # tumpang-tindih dengan upload batch yang sedang berjalan
+        batch_slots = asyncio.Semaphore(max(2, -(-window // batch_size) + 1))
+
+        async def run_batch(batch):
+            async with batch_slots:
+                return await self.upload_batch(batch, semaphore)
+
+        batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+        results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return [ok for batch in results for ok in batch]
+
+# Pembungkus sinkron agar bisa dipanggil dari kode biasa
+def upload_files(files, window=DEFAULT_WINDOW, master_address=MASTER_ADDRESS):
+    async def main():
+        client = AsyncDFSClient(master_address)
+        try:
+            return await client.upload_many(files, window)
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+if __name__ == '__main__':
+    # Pemakaian: python async_client.py file1 file2 ...
+    paths = sys.argv[1:]
+    window = int(os.getenv("UPLOAD_WINDOW", DEFAULT_WINDOW))
+    results = upload_files([(os.path.basename(p), p) for p in paths], window)
+    print(f"[AsyncClient] {sum(results)}/{len(results)} file berhasil di-upload")
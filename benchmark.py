@@ -0,0 +1,346 @@
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent import futures
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import client
+import pool
+import protos.dfs_pb2 as pb2
+from cluster import LocalCluster, ProcessCluster
+
+# Benchmark yang bisa diulang: matriks skenario (jumlah node x mode
+# redundansi x ukuran file x concurrency) dijalankan pada cluster lokal
+# dalam satu proses (atau cluster yang sudah berjalan lewat --master).
+# - payload dibuat di memori & ditulis ke file sementara sebelum timer mulai
+# - tidak ada penghapusan di antara skenario (hapus replica di Master berjalan
+#   di background dan akan ikut terukur): cluster lokal dibuang utuh, file di
+#   cluster --master dihapus setelah semua skenario selesai
+# - beberapa operasi pemanasan (warm-up) tidak dihitung
+# - latency per operasi -> p50/p95/p99, throughput = total byte / waktu total
+# - hasil ditulis ke JSON + CSV, dashboard dibuat dari JSON tersebut
+#
+# Contoh:
+#   python benchmark.py --nodes 3,6 --modes rep2,rep1,ec4+2 --sizes 512K,8M --concurrency 1,8
+#   python benchmark.py --master master-node:50051 --sizes 500K --files 100
+#   python benchmark.py --dashboard hasil_output/benchmark.json
+
+OUTPUT_FOLDER = "hasil_output"
+DEFAULT_OUTPUT = os.path.join(OUTPUT_FOLDER, "benchmark")
+# Jumlah isi payload berbeda per ukuran (file diunggah dengan nama berbeda,
+# dedup dimatikan agar setiap upload benar-benar mengirim data)
+PAYLOAD_VARIANTS = 8
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+OPS = ("upload", "read")
+CSV_FIELDS = ("op", "nodes", "mode", "size", "concurrency", "files", "ok", "errors",
+              "elapsed_s", "ops_per_s", "mb_per_s", "lat_mean_ms", "lat_p50_ms",
+              "lat_p95_ms", "lat_p99_ms", "lat_max_ms")
+
+def parse_size(text):
+    match = re.fullmatch(r"(\d+)([KMG]?)B?", text.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Ukuran tidak valid: {text}")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+def format_size(size):
+    for unit in ("G", "M", "K"):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return str(size)
+
+def parse_list(text, convert):
+    return [convert(item) for item in text.split(",") if item.strip()]
+
+# repN = replikasi N salinan (pipeline), repN-fanout = client mengirim ke
+# semua replica, ecK+M = erasure coding Reed-Solomon
+def parse_mode(text):
+    match = re.fullmatch(r"rep(\d+)(-fanout)?", text)
+    if match:
+        return {"name": text, "replication": int(match.group(1)),
+                "pipeline": not match.group(2), "erasure": None}
+    match = re.fullmatch(r"ec(\d+)\+(\d+)", text)
+    if match:
+        return {"name": text, "replication": None, "pipeline": True,
+                "erasure": (int(match.group(1)), int(match.group(2)))}
+    raise argparse.ArgumentTypeError(f"Mode tidak dikenal: {text} (repN, repN-fanout, ecK+M)")
+
+# Nearest-rank: nilai pada urutan ke-ceil(p% x n)
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def make_payloads(directory, size, kind):
+    paths = []
+    for i in range(PAYLOAD_VARIANTS):
+        if kind == "text":
+            line = b"benchmark payload %d baris %%d\n" % i
+            data = b"".join(line % n for n in range(size // len(line) + 1))[:size]
+        else:
+            data = os.urandom(size)
+        path = os.path.join(directory, f"payload_{format_size(size)}_{i}.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+def run_ops(operation, names, concurrency):
+    def timed(name):
+        start = time.perf_counter()
+        try:
+            ok = operation(name)
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, names))
+    return results, time.perf_counter() - start
+
+def summarize(op, scenario, results, elapsed):
+    latencies = sorted(latency * 1000 for ok, latency in results if ok)
+    ok = len(latencies)
+    total_bytes = ok * scenario["size"]
+    row = dict(scenario, op=op, files=len(results), ok=ok, errors=len(results) - ok,
+               elapsed_s=round(elapsed, 4),
+               ops_per_s=round(ok / elapsed, 2) if elapsed else 0.0,
+               mb_per_s=round(total_bytes / 1024 / 1024 / elapsed, 2) if elapsed else 0.0,
+               lat_mean_ms=round(sum(latencies) / ok, 3) if ok else 0.0,
+               lat_max_ms=round(latencies[-1], 3) if ok else 0.0)
+    for p in (50, 95, 99):
+        row[f"lat_p{p}_ms"] = round(percentile(latencies, p), 3)
+    return row
+
+def run_scenario(scenario, payloads, args, prefix):
+    size = scenario["size"]
+    erasure = scenario.pop("erasure")
+    warmup = [f"{prefix}-warmup-{i}" for i in range(args.warmup)]
+    names = [f"{prefix}-{i}" for i in range(args.files)]
+    sources = {name: payloads[i % len(payloads)] for i, name in enumerate(warmup + names)}
+
+    def upload(name):
+        return client.upload_process(name, size, sources[name], erasure=erasure)
+
+    def read(name):
+        data = client.read_range(name, 0, size)
+        return data is not None and len(data) == size
+
+    rows = []
+    run_ops(upload, warmup, scenario["concurrency"])
+    results, elapsed = run_ops(upload, names, scenario["concurrency"])
+    rows.append(summarize("upload", scenario, results, elapsed))
+    if "read" in args.ops:
+        run_ops(read, warmup, scenario["concurrency"])
+        uploaded = [name for name, (ok, _) in zip(names, results) if ok]
+        results, elapsed = run_ops(read, uploaded, scenario["concurrency"])
+        rows.append(summarize("read", scenario, results, elapsed))
+    return rows, warmup + names
+
+# Dengan --master jumlah replica ditentukan Master (REPLICATION_FACTOR), bukan
+# mode benchmark (erasure coding & pipeline tetap dipilih client). Rencana
+# upload tanpa data menunjukkan jumlah salinan sebenarnya; mode repN yang
+# berbeda ditolak agar hasil tidak diberi label yang salah.
+def check_master_modes(args):
+    reply = pool.get_stub(args.master).RequestUpload(
+        pb2.UploadRequest(filename="bench-probe", filesize=1))
+    copies = len(reply.blocks[0].target_datanodes) if reply.blocks else 0
+    wrong = [m["name"] for m in args.modes if m["replication"] and m["replication"] != copies]
+    if wrong:
+        raise SystemExit(f"[Benchmark] Master {args.master} menyimpan {copies} salinan per blok: "
+                         f"mode {', '.join(wrong)} tidak bisa dipakai dengan --master "
+                         f"(pakai rep{copies}, rep{copies}-fanout atau ecK+M)")
+
+def run_benchmark(args):
+    if args.master:
+        check_master_modes(args)
+    client.DEDUP = False
+    workdir = tempfile.mkdtemp(prefix="dfs-bench-")
+    results = []
+    uploaded = []
+    try:
+        payloads = {size: make_payloads(workdir, size, args.payload) for size in args.sizes}
+        node_counts = [None] if args.master else args.nodes
+        for nodes in node_counts:
+            for mode in args.modes:
+                with contextlib.ExitStack() as stack:
+                    if args.master:
+                        client.MASTER_ADDRESS = args.master
+                    else:
+                        with quiet(not args.verbose):
+                            cluster_class = ProcessCluster if args.processes else LocalCluster
+                            cluster = stack.enter_context(cluster_class(
+                                nodes, mode["replication"], args.engine, args.durability))
+                        client.MASTER_ADDRESS = cluster.master_address
+                    client.PIPELINE_MODE = mode["pipeline"]
+                    for size in args.sizes:
+                        for concurrency in args.concurrency:
+                            scenario = {"nodes": nodes or 0, "mode": mode["name"], "size": size,
+                                        "concurrency": concurrency, "erasure": mode["erasure"]}
+                            label = (f"{nodes or 'ext'} node, {mode['name']}, "
+                                     f"{format_size(size)}, c={concurrency}")
+                            prefix = f"bench-{nodes or 0}-{mode['name']}-{size}-{concurrency}"
+                            with quiet(not args.verbose):
+                                rows, names = run_scenario(scenario, payloads[size], args, prefix)
+                            uploaded.extend(names)
+                            for row in rows:
+                                print(f"[Benchmark] {label} {row['op']:6}: "
+                                      f"{row['mb_per_s']:8.2f} MB/s {row['ops_per_s']:8.1f} op/s "
+                                      f"p50 {row['lat_p50_ms']:.1f} p95 {row['lat_p95_ms']:.1f} "
+                                      f"p99 {row['lat_p99_ms']:.1f} ms, gagal {row['errors']}")
+                            results.extend(rows)
+        if args.master:
+            with quiet(not args.verbose):
+                for name in uploaded:
+                    client.delete_file(name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+# Log Master/DataNode/client (print per request) dibuang selama skenario
+# berjalan agar tidak ikut terukur
+@contextlib.contextmanager
+def quiet(enabled):
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def write_results(results, args, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cluster": args.master or "local",
+        "engine": args.engine,
+        "durability": args.durability,
+        "payload": args.payload,
+        "files": args.files,
+        "warmup": args.warmup,
+    }
+    with open(path + ".json", "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    with open(path + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in results:
+            writer.writerow({field: row[field] for field in CSV_FIELDS})
+    print(f"[Benchmark] Hasil: {path}.json, {path}.csv")
+
+# --- DASHBOARD (dari hasil JSON) ---
+def generate_dashboard(results, path):
+    if not results:
+        return
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(20, 8))
+
+    # 1. Latency p50/p95/p99 per skenario upload
+    uploads = [r for r in results if r["op"] == "upload"]
+    labels = [f"{r['nodes']}n {r['mode']} {format_size(r['size'])} c{r['concurrency']}" for r in uploads]
+    x = range(len(uploads))
+    width = 0.27
+    for offset, p, color in ((-width, 50, "#2ca02c"), (0, 95, "#ff7f0e"), (width, 99, "#d62728")):
+        ax1.bar([i + offset for i in x], [r[f"lat_p{p}_ms"] for r in uploads], width,
+                label=f"p{p}", color=color)
+    ax1.set_xticks(list(x))
+    ax1.set_xticklabels(labels, rotation=75, ha="right", fontsize=6)
+    ax1.set_title("Upload Latency")
+    ax1.set_ylabel("Latency (ms)")
+    ax1.legend()
+    ax1.grid(True, axis="y", linestyle="--", alpha=0.5)
+
+    # 2. Throughput vs concurrency per (op, mode, ukuran, node)
+    series = {}
+    for r in results:
+        key = f"{r['op']} {r['nodes']}n {r['mode']} {format_size(r['size'])}"
+        series.setdefault(key, []).append((r["concurrency"], r["mb_per_s"]))
+    for key, points in series.items():
+        points.sort()
+        ax2.plot([c for c, _ in points], [t for _, t in points], "o-", label=key)
+    ax2.set_xscale("log", base=2)
+    ax2.set_title("Throughput vs Concurrency")
+    ax2.set_xlabel("Concurrency")
+    ax2.set_ylabel("Throughput (MB/s)")
+    ax2.legend(fontsize=6, ncol=2, loc="upper center", bbox_to_anchor=(0.5, -0.12))
+    ax2.grid(True, linestyle="--", alpha=0.5)
+
+    # 3. Skalabilitas: throughput upload terbaik per jumlah node
+    scaling = {}
+    for r in uploads:
+        best = scaling.setdefault(r["mode"], {})
+        best[r["nodes"]] = max(best.get(r["nodes"], 0), r["mb_per_s"])
+    for mode, points in scaling.items():
+        nodes = sorted(points)
+        ax3.plot(nodes, [points[n] for n in nodes], "o-", label=mode)
+    ax3.set_title("Scalability (Upload)")
+    ax3.set_xlabel("Number of Nodes")
+    ax3.set_ylabel("Best Throughput (MB/s)")
+    ax3.legend()
+    ax3.grid(True, linestyle="--", alpha=0.5)
+
+    plt.tight_layout()
+    plt.savefig(path + ".png")
+    plt.close()
+    print(f"[Benchmark] Dashboard: {path}.png")
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark DFS (cluster lokal atau --master)")
+    parser.add_argument("--nodes", type=lambda t: parse_list(t, int), default=[3],
+                        help="jumlah DataNode cluster lokal, mis. 1,3,6 (default 3)")
+    parser.add_argument("--modes", type=lambda t: parse_list(t, parse_mode),
+                        default=[parse_mode("rep2")], help="rep1,rep2,rep2-fanout,ec4+2 (default rep2)")
+    parser.add_argument("--sizes", type=lambda t: parse_list(t, parse_size),
+                        default=[512 * 1024], help="ukuran file, mis. 4K,512K,8M (default 512K)")
+    parser.add_argument("--concurrency", type=lambda t: parse_list(t, int), default=[1, 8],
+                        help="jumlah upload bersamaan, mis. 1,8,32 (default 1,8)")
+    parser.add_argument("--files", type=int, default=100, help="operasi terukur per skenario")
+    parser.add_argument("--warmup", type=int, default=5, help="operasi pemanasan per skenario")
+    parser.add_argument("--ops", type=lambda t: parse_list(t, str), default=list(OPS),
+                        help="upload,read (default keduanya)")
+    parser.add_argument("--payload", choices=("random", "text"), default="random",
+                        help="isi file: random (tidak terkompresi) atau text")
+    parser.add_argument("--engine", default=None, help="storage engine DataNode lokal (file|segment)")
+    parser.add_argument("--durability", default=None, help="durability DataNode lokal (fast|group|sync)")
+    parser.add_argument("--processes", action="store_true",
+                        help="cluster lokal dengan tiap node sebagai proses terpisah")
+    parser.add_argument("--master", default=None,
+                        help="alamat Master cluster yang sudah berjalan (tanpa cluster lokal)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="prefix file hasil (.json, .csv, .png)")
+    parser.add_argument("--dashboard", default=None,
+                        help="buat dashboard dari file JSON hasil sebelumnya, tanpa benchmark")
+    parser.add_argument("--verbose", action="store_true", help="tampilkan log node selama benchmark")
+    args = parser.parse_args(argv)
+    unknown = set(args.ops) - set(OPS)
+    if unknown or "upload" not in args.ops:
+        parser.error(f"--ops harus memuat upload (pilihan: {', '.join(OPS)})")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.dashboard:
+        with open(args.dashboard) as f:
+            results = json.load(f)["results"]
+        generate_dashboard(results, os.path.splitext(args.dashboard)[0])
+        return
+    results = run_benchmark(args)
+    write_results(results, args, args.output)
+    generate_dashboard(results, args.output)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
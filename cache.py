@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+
+# Cache baca di memori DataNode untuk object yang baru ditulis/dibaca (LRU
+# dengan batas total byte). Pola baca condong ke file yang baru di-upload,
+# jadi object langsung dimasukkan saat commit; object lain masuk saat dibaca.
+# Isi cache = byte object persis seperti tersimpan (frame terkompresi apa
+# adanya) beserta formatnya (framed dari storage), sudah dicocokkan
+# checksum-nya saat dibaca dari disk.
+#
+# Konsistensi: hapus/timpa tidak boleh menyisakan data lama. Pengisian (dari
+# disk atau dari upload) diawali begin(name) yang mencatat token; invalidate()
+# dan penulisan baru membatalkan token tersebut, sehingga pengisian yang kalah
+# balapan tidak memasukkan hasilnya.
+
+class ObjectCache:
+    # capacity: batas total byte (0 = nonaktif); max_object: object yang lebih
+    # besar tidak di-cache (agar satu blok besar tidak mengusir semuanya)
+    def __init__(self, capacity, max_object):
+        self.capacity = capacity
+        self.max_object = min(max_object, capacity)
+        self.lock = threading.Lock()
+        # nama object -> (bytes, framed), urutan = LRU (paling lama di depan)
+        self.entries = OrderedDict()
+        self.size = 0
+        # nama object -> token pengisian yang masih berlaku
+        self.filling = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    # Hasil: (bytes, framed) atau None
+    def get(self, name):
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(name)
+            self.hits += 1
+            return entry
+
+    def begin(self, name):
+        token = object()
+        with self.lock:
+            self.filling[name] = token
+        return token
+
+    # Hasil: True jika data masuk cache. written=True untuk data hasil commit
+    # upload: jika token sudah dibatalkan, isi cache untuk nama ini dibuang
+    # (pengisian lain bisa saja membawa versi sebelum commit)
+    def finish(self, name, token, data, framed=None, written=False):
+        with self.lock:
+            if self.filling.get(name) is not token:
+                if written:
+                    self.filling.pop(name, None)
+                    self.remove(name)
+                return False
+            del self.filling[name]
+            if data is None or len(data) > self.max_object:
+                self.remove(name)
+                return False
+            self.remove(name)
+            self.entries[name] = (data, framed)
+            self.size += len(data)
+            while self.size > self.capacity:
+                _, (old, _) = self.entries.popitem(last=False)
+                self.size -= len(old)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, name):
+        with self.lock:
+            self.filling.pop(name, None)
+            self.remove(name)
+
+    def remove(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "objects": len(self.entries), "bytes": self.size}
+
+# Pembungkus writer storage yang ikut menampung byte yang ditulis (referensi
+# ke bytes chunk, disatukan sekali saat commit) selama object masih muat di
+# cache. Antarmuka sama dengan writer storage.
+class RecordingWriter:
+    def __init__(self, writer, limit):
+        self.writer = writer
+        self.name = writer.name
+        self.framed = writer.framed
+        self.limit = limit
+        self.pieces = []
+        self.size = 0
+
+    def write(self, data):
+        self.writer.write(data)
+        self.size += len(data)
+        if self.pieces is not None:
+            if self.size > self.limit:
+                self.pieces = None
+            else:
+                self.pieces.append(bytes(data))
+
+    def data(self):
+        return None if self.pieces is None else b"".join(self.pieces)
+
+    def commit(self):
+        self.writer.commit()
+
+    def abort(self):
+        self.writer.abort()
@@ -1,67 +1,222 @@
-import grpc
 import os
-import time
-import matplotlib.pyplot as plt
-import numpy as np
+import threading
+from concurrent import futures
 import protos.dfs_pb2 as pb2
-import protos.dfs_pb2_grpc as pb2_grpc
+import pool
+from checksum import ChecksumError, crc, hash_blocks
+from compression import NONE, available_codecs, decode_chunk, encode_chunk
+from erasure import ReedSolomon, as_array, fragment_length, fragment_name, fragment_size
 
 # --- KONFIGURASI UTAMA ---
-TOTAL_FILES = 100       
-FILE_SIZE_KB = 500      
-OUTPUT_FOLDER = "hasil_output"
+MASTER_ADDRESS = os.getenv("MASTER_ADDRESS", "localhost:50051")
 
-# Set ke 8 Node
-JUMLAH_NODE_AKTIF = 3
+# Ukuran tiap pesan pada UploadStream (1 MB)
+CHUNK_SIZE = 1024 * 1024
+
+# Mode pipeline: client hanya mengirim ke Primary, Primary meneruskan ke Replica
+PIPELINE_MODE = True
+
+# Jumlah blok dari satu file yang diunggah bersamaan
+BLOCK_PARALLELISM = 4
+
+# Jumlah file per RequestUploadBatch pada upload_many
+BATCH_SIZE = 100
+
+# Deduplikasi: kirim hash tiap blok ke Master, blok yang isinya sudah
+# tersimpan tidak dikirim ulang. BLOCK_SIZE harus sama dengan Master.
+DEDUP = True
+BLOCK_SIZE = 64 * 1024 * 1024
+
+# Kompresi: tawarkan codec yang tersedia ke Master; chunk dikompres di client
+# dan baru didekompres lagi saat dibaca
+COMPRESSION = True
+
+# Erasure coding per file: (k, m) mis. (4, 2) = 4 fragmen data + 2 parity
+# (overhead 1.5x, tahan 2 node hilang); None = replikasi biasa
+ERASURE_CODING = None
+# Rentang per fragmen yang dibaca bersamaan saat download blok erasure coded
+EC_READ_WINDOW = 4 * 1024 * 1024
 # -------------------------
 
-def create_dummy_file(filename, size_kb):
-    with open(filename, "wb") as f:
-        f.write(os.urandom(1024 * size_kb))
+# Baca rentang [offset, offset+length) file sedikit demi sedikit
+# -> memori per upload hanya 1 chunk.
+# Daftar pipeline (node tujuan berikutnya) dan total panjang cukup ikut di
+# chunk pertama; setiap chunk membawa CRC32 datanya (data setelah kompresi).
+# Jika Master memilih codec, tiap chunk dikompres dan membawa panjang aslinya
+def chunk_generator(name, filepath, offset, length, pipeline=(), codec=""):
+    return chunk_messages(name, file_pieces(filepath, offset, length), length, pipeline, codec)
 
-def ensure_output_folder():
-    if not os.path.exists(OUTPUT_FOLDER):
-        os.makedirs(OUTPUT_FOLDER)
+def file_pieces(filepath, offset, length):
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while True:
+            raw = f.read(min(CHUNK_SIZE, remaining))
+            remaining -= len(raw)
+            yield raw
+            if remaining <= 0 or not raw: break
 
-# --- FUNGSI INTI UPLOAD ---
-def upload_process(filename, filesize, file_data, is_sequential=False):
-    try:
-        # 1. Minta Metadata ke Master
-        with grpc.insecure_channel('localhost:50051') as channel:
-            stub = pb2_grpc.DFSServiceStub(channel)
-            response = stub.RequestUpload(pb2.UploadRequest(filename=filename, filesize=filesize))
-            target_nodes = response.target_datanodes
-
-        if not target_nodes: return False
-
-        # LOGIKA TARGET:
-        # Jika Sequential -> Paksa ambil 1 node saja (Target[0])
-        # Jika Paralel -> Paksa ambil semua node yang dikasih Master
-        if is_sequential:
-            active_targets = [target_nodes[0]] 
+# Isi buffer di memori per CHUNK_SIZE (buffer kosong tetap 1 potongan)
+def memory_pieces(buf):
+    for pos in range(0, max(len(buf), 1), CHUNK_SIZE):
+        yield bytes(buf[pos:pos + CHUNK_SIZE])
+
+def chunk_messages(name, pieces, length, pipeline=(), codec=""):
+    first = True
+    for raw in pieces:
+        if codec:
+            used, data = encode_chunk(raw, codec)
+            chunk = pb2.ChunkData(filename=name, data=data, codec=used,
+                                  raw_length=len(raw), checksum=crc(data))
         else:
-            active_targets = target_nodes
-        
-        success_nodes = []
-        
-        # 2. Kirim Data ke Target
+            chunk = pb2.ChunkData(filename=name, data=raw, checksum=crc(raw))
+        if first:
+            chunk.pipeline.extend(pipeline)
+            chunk.length = length
+            first = False
+        yield chunk
+
+def checked_chunks(stream):
+    for chunk in stream:
+        if chunk.HasField("checksum") and crc(chunk.data) != chunk.checksum:
+            raise ChecksumError(f"Checksum {chunk.filename} tidak cocok")
+        yield chunk
+
+# Data asli dari stream DownloadChunk, dipotong ke rentang [offset, offset+length)
+# relatif blok. Chunk terkompresi dikirim per frame utuh beserta offset aslinya
+def decoded_chunks(stream, offset=0, length=0):
+    for chunk in checked_chunks(stream):
+        if not chunk.codec:
+            yield chunk.data
+            continue
+        data = decode_chunk(chunk.data, chunk.codec)
+        start = max(offset - chunk.offset, 0)
+        stop = len(data) if length <= 0 else min(len(data), offset + length - chunk.offset)
+        yield data[start:stop] if start or stop < len(data) else data
+
+def download_request(name, offset=0, length=0):
+    return pb2.ChunkData(filename=name, offset=offset, length=length,
+                         accept_codecs=available_codecs() + [NONE])
+
+def upload_block(block, filepath, is_sequential):
+    if block.ec_data:
+        return upload_ec_block(block, filepath)
+    # LOGIKA TARGET:
+    # Jika Sequential -> Paksa ambil 1 node saja (Target[0])
+    # Jika Paralel -> Paksa ambil semua node yang dikasih Master
+    if is_sequential:
+        active_targets = [block.target_datanodes[0]]
+    else:
+        active_targets = list(block.target_datanodes)
+
+    success_nodes = []
+
+    # Channel diambil dari pool, tidak dibuat ulang
+    if PIPELINE_MODE and len(active_targets) > 1:
+        # Pipeline: kirim sekali ke Primary, Primary yang meneruskan ke Replica
+        address = pool.node_address(active_targets[0])
+        try:
+            reply = pool.get_stub(address).UploadStream(chunk_generator(
+                block.block_id, filepath, block.offset, block.length, active_targets[1:],
+                block.codec))
+            if reply.success: success_nodes = list(reply.nodes)
+        except Exception as e:
+            pool.report_error(address, e)
+    else:
         for node in active_targets:
+            address = pool.node_address(node)
             try:
-                with grpc.insecure_channel(f"{node}:50051") as dn_channel:
-                    dn_stub = pb2_grpc.DFSServiceStub(dn_channel)
-                    reply = dn_stub.UploadChunk(pb2.ChunkData(filename=filename, data=file_data))
-                    if reply.success: success_nodes.append(node)
-            except: pass
+                reply = pool.get_stub(address).UploadStream(chunk_generator(
+                    block.block_id, filepath, block.offset, block.length, codec=block.codec))
+                if reply.success: success_nodes.append(node)
+            except Exception as e:
+                pool.report_error(address, e)
+
+    return len(success_nodes) == len(active_targets)
+
+# Parity dihitung per stripe CHUNK_SIZE dari k fragmen data yang dibaca
+# langsung dari file, lalu k+m fragmen diunggah paralel ke node masing-masing
+# (fragmen data dibaca ulang dari file, hanya parity yang ditahan di memori)
+def upload_ec_block(block, filepath):
+    k, m = block.ec_data, block.ec_parity
+    size = fragment_size(block.length, k)
+    lengths = [fragment_length(block.length, k, i) for i in range(k + m)]
+    rs = ReedSolomon(k, m)
+    parity = [bytearray() for _ in range(m)]
+    with open(filepath, "rb") as f:
+        for pos in range(0, size, CHUNK_SIZE):
+            n = min(CHUNK_SIZE, size - pos)
+            data = []
+            for i in range(k):
+                f.seek(block.offset + i * size + pos)
+                data.append(as_array(f.read(max(0, min(n, lengths[i] - pos))), n))
+            for buf, piece in zip(parity, rs.encode(data, n)):
+                buf += piece.tobytes()
+
+    def send(i):
+        name = fragment_name(block.block_id, i)
+        if i < k:
+            chunks = chunk_generator(name, filepath, block.offset + i * size, lengths[i],
+                                     codec=block.codec)
+        else:
+            chunks = chunk_messages(name, memory_pieces(parity[i - k]), size, codec=block.codec)
+        address = pool.node_address(block.target_datanodes[i])
+        try:
+            return pool.get_stub(address).UploadStream(chunks).success
+        except Exception as e:
+            pool.report_error(address, e)
+            return False
+
+    with futures.ThreadPoolExecutor(max_workers=k + m) as executor:
+        return all(list(executor.map(send, range(k + m))))
+
+def upload_request(filename, filesize, filepath, dedup=DEDUP, erasure=ERASURE_CODING):
+    request = pb2.UploadRequest(filename=filename, filesize=filesize)
+    if erasure:
+        request.ec_data, request.ec_parity = erasure
+    if COMPRESSION:
+        request.codecs.extend(available_codecs())
+    if dedup:
+        request.block_size = BLOCK_SIZE
+        request.block_hashes.extend(hash_blocks(filepath, filesize, BLOCK_SIZE))
+    return request
+
+# --- FUNGSI INTI UPLOAD ---
+def upload_process(filename, filesize, filepath, is_sequential=False, erasure=ERASURE_CODING):
+    try:
+        # 1. Minta Metadata (peta blok) ke Master
+        # (mode sequential = benchmark yang langsung dihapus, tanpa dedup)
+        stub = pool.get_stub(MASTER_ADDRESS)
+        response = stub.RequestUpload(upload_request(filename, filesize, filepath,
+                                                     DEDUP and not is_sequential, erasure))
+        if not response.blocks: return False
+        # Blok yang isinya sudah ada di cluster tidak perlu dikirim
+        blocks = [b for b in response.blocks if not b.exists]
+
+        # 2. Kirim Data: blok-blok berbeda diunggah paralel ke pasangan node masing-masing
+        if len(blocks) <= 1:
+            results = [upload_block(b, filepath, is_sequential) for b in blocks]
+        else:
+            workers = min(BLOCK_PARALLELISM, len(blocks))
+            with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda block: upload_block(block, filepath, is_sequential), blocks))
 
         # 3. Validasi
-        is_success = (len(success_nodes) == len(active_targets))
+        is_success = all(results)
+
+        # 4. Catat lokasi blok di Master agar file bisa dibaca kembali
+        if is_success and not is_sequential:
+            reply = stub.CommitUpload(response)
+            is_success = reply.success
         
         # Bersih-bersih file benchmark (sequential)
         if is_sequential and is_success:
-             try:
-                with grpc.insecure_channel(f"{active_targets[0]}:50051") as ch:
-                    pb2_grpc.DFSServiceStub(ch).DeleteChunk(pb2.ChunkData(filename=filename))
-             except: pass
+            for block in blocks:
+                try:
+                    pool.get_stub(pool.node_address(block.target_datanodes[0])).DeleteChunk(
+                        pb2.ChunkData(filename=block.block_id))
+                except: pass
 
         return is_success
 
@@ -69,144 +224,224 @@ def upload_process(filename, filesize, file_data, is_sequential=False):
         print(e)
         return False
 
-# --- DASHBOARD GENERATOR (VISUALISASI 8 NODE) ---
-def generate_dashboard(indices, latency, throughput, time_seq, time_par, success_count):
-    ensure_output_folder()
-    
-    # Hitung Speedup & Efisiensi
-    speedup = time_seq / time_par
-    efficiency = speedup / JUMLAH_NODE_AKTIF
-    avg_th = sum(throughput)/len(throughput) if throughput else 0
-
-    fig = plt.figure(figsize=(18, 10))
-    grid = plt.GridSpec(2, 3, wspace=0.3, hspace=0.3)
-
-    # 1. Latency History
-    ax1 = fig.add_subplot(grid[0, 0])
-    ax1.plot(indices, latency, color='#1f77b4', alpha=0.8)
-    ax1.set_title("Latency History (Parallel)")
-    ax1.set_ylabel("Latency (ms)")
-    ax1.grid(True, linestyle='--', alpha=0.5)
-
-    # 2. Throughput History
-    ax2 = fig.add_subplot(grid[0, 1])
-    ax2.plot(indices, throughput, color='#ff7f0e', alpha=0.8)
-    ax2.set_title("Throughput History")
-    ax2.set_ylabel("Throughput (MB/s)")
-    ax2.grid(True, linestyle='--', alpha=0.5)
-
-    # 3. Speedup Bar Chart (1 vs 8)
-    ax3 = fig.add_subplot(grid[0, 2])
-    labels = ['Sequential (1 Node)', f'Parallel ({JUMLAH_NODE_AKTIF} Nodes)']
-    times = [time_seq, time_par]
-    colors = ['#d62728', '#2ca02c'] # Merah vs Hijau
-    bars = ax3.bar(labels, times, color=colors)
-    ax3.set_title(f"Speedup Ratio: {speedup:.2f}x")
-    ax3.set_ylabel("Execution Time (s)")
-    for bar in bars:
-        height = bar.get_height()
-        ax3.text(bar.get_x() + bar.get_width()/2., height, f'{height:.2f}s', ha='center', va='bottom')
-
-    # 4. Scalability Projection (REVISI: Visualisasi 8 Node)
-    ax4 = fig.add_subplot(grid[1, 0])
-    
-    # Garis Ideal (Linear ke atas)
-    ideal_x = np.linspace(1, JUMLAH_NODE_AKTIF, JUMLAH_NODE_AKTIF)
-    ax4.plot(ideal_x, ideal_x, 'k--', label='Ideal Linear')
-    
-    # Garis Real (1 ke 8)
-    real_x = [1, JUMLAH_NODE_AKTIF]
-    real_y = [1, speedup]
-    ax4.plot(real_x, real_y, 'bo-', label='Real Result', linewidth=2)
-    
-    ax4.set_title(f"Scalability Projection (1 vs {JUMLAH_NODE_AKTIF})")
-    ax4.set_xlabel("Number of Nodes")
-    ax4.set_ylabel("Speedup Factor")
-    
-    # [PENTING] Atur Tick Marks agar rapi (1, 2, 4, 8)
-    if JUMLAH_NODE_AKTIF == 8:
-        ax4.set_xticks([1, 2, 4, 8])
-    else:
-        ax4.set_xticks(np.arange(1, JUMLAH_NODE_AKTIF + 1, 1))
-        
-    ax4.legend()
-    ax4.grid(True)
-
-    # 5. KPI Summary
-    ax5 = fig.add_subplot(grid[1, 1])
-    metrics = ['Speedup', 'Efficiency (x10)', 'Avg T-put']
-    values = [speedup, efficiency * 10, avg_th]
-    ax5.bar(metrics, values, color=['blue', 'orange', 'purple'])
-    ax5.set_title("Key Performance Indicators")
-    for i, v in enumerate(values): ax5.text(i, v, f'{v:.2f}', ha='center', va='bottom')
-
-    # 6. Text Report
-    ax6 = fig.add_subplot(grid[1, 2]); ax6.axis('off')
-    ft_status = "PASSED" if success_count >= TOTAL_FILES * 0.95 else "WARNING"
-    txt = (
-        f"TEST REPORT\n"
-        f"--------------------------\n"
-        f"Nodes Config: {JUMLAH_NODE_AKTIF} Nodes\n"
-        f"Total Files : {TOTAL_FILES}\n"
-        f"Seq Time    : {time_seq:.2f} s\n"
-        f"Par Time    : {time_par:.2f} s\n"
-        f"Speedup     : {speedup:.2f}x\n"
-        f"Efficiency  : {efficiency:.2f}\n"
-        f"Fault Tol   : {ft_status}"
-    )
-    ax6.text(0.1, 0.5, txt, fontsize=12, family='monospace', va='center')
-
-    plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_FOLDER, "dashboard_performansi.png"))
-    plt.close()
-    print(f"\n[INFO] Dashboard grafik 8 Node tersimpan!")
-
-def run():
-    # FASE 1: BENCHMARK SEKUENSIAL
-    print(f"\n[PHASE 1] Benchmark Sekuensial ({TOTAL_FILES} File)...")
-    start_seq = time.time()
-    for i in range(TOTAL_FILES): 
-        filename = f"bench_{i}.bin"
-        create_dummy_file(filename, FILE_SIZE_KB)
-        filesize = os.path.getsize(filename)
-        with open(filename, "rb") as f: data = f.read()
-        upload_process(filename, filesize, data, is_sequential=True)
-        if os.path.exists(filename): os.remove(filename)
-    time_seq = time.time() - start_seq
-    print(f"✅ Selesai! Waktu Sekuensial: {time_seq:.2f} s")
-
-    # FASE 2: UJI PARALEL 8 NODE
-    print(f"\n[PHASE 2] Pengujian Paralel {JUMLAH_NODE_AKTIF} Node ({TOTAL_FILES} File)...")
-    start_par = time.time()
-    success_count = 0
-    indices, latencies, throughputs = [], [], []
-
-    for i in range(TOTAL_FILES):
-        filename = f"data_{i}.bin"
-        create_dummy_file(filename, FILE_SIZE_KB)
-        filesize = os.path.getsize(filename)
-        file_mb = filesize / (1024*1024)
-        
-        t_start = time.time()
-        with open(filename, "rb") as f: data = f.read()
-        
-        is_ok = upload_process(filename, filesize, data, is_sequential=False)
-        
-        duration = time.time() - t_start
-        if is_ok:
-            success_count += 1
-            indices.append(i+1)
-            latencies.append(duration*1000)
-            throughputs.append(file_mb/duration)
-            print(f"[File {i+1}] ✅ OK")
-        
-        if os.path.exists(filename): os.remove(filename)
+# --- UPLOAD BANYAK FILE (BATCH) ---
+# files: list of (filename, filepath). Penempatan dan commit diminta ke Master
+# sekali per batch, bukan sekali per file
+def upload_many(files):
+    stub = pool.get_stub(MASTER_ADDRESS)
+    results = []
+    for start in range(0, len(files), BATCH_SIZE):
+        batch = files[start:start + BATCH_SIZE]
+        try:
+            response = stub.RequestUploadBatch(pb2.UploadBatchRequest(files=[
+                upload_request(name, os.path.getsize(path), path) for name, path in batch]))
+        except Exception as e:
+            print(e)
+            results.extend([False] * len(batch))
+            continue
+
+        batch_results = []
+        committed = []
+        for planned, (name, path) in zip(response.files, batch):
+            ok = bool(planned.blocks) and all(
+                upload_block(b, path, False) for b in planned.blocks if not b.exists)
+            if ok: committed.append(planned)
+            batch_results.append(ok)
+
+        if committed:
+            try:
+                reply = stub.CommitUploadBatch(pb2.UploadBatchResponse(files=committed))
+                if not reply.success: batch_results = [False] * len(batch)
+            except Exception as e:
+                print(e)
+                batch_results = [False] * len(batch)
+        results.extend(batch_results)
+    return results
+
+# Hapus file lewat Master: replica blok baru dihapus jika tidak dipakai file lain
+def delete_file(filename):
+    try:
+        return pool.get_stub(MASTER_ADDRESS).DeleteFile(pb2.UploadRequest(filename=filename)).success
+    except Exception as e:
+        print(e)
+        return False
+
+# --- FUNGSI INTI DOWNLOAD ---
+# Jumlah pembacaan yang sedang berjalan per node, untuk memilih replica
+# yang paling senggang
+inflight_reads = {}
+inflight_lock = threading.Lock()
+
+def order_replicas(nodes):
+    with inflight_lock:
+        return sorted(nodes, key=lambda node: inflight_reads.get(node, 0))
+
+def download_block(block, dest_path):
+    if block.ec_data:
+        return download_ec_block(block, dest_path)
+    # Coba replica paling senggang dulu, pindah ke replica lain jika gagal
+    for node in order_replicas(block.target_datanodes):
+        address = pool.node_address(node)
+        with inflight_lock:
+            inflight_reads[node] = inflight_reads.get(node, 0) + 1
+        try:
+            written = 0
+            with open(dest_path, "r+b") as f:
+                f.seek(block.offset)
+                for data in decoded_chunks(pool.get_stub(address).DownloadChunk(
+                        download_request(block.block_id))):
+                    f.write(data)
+                    written += len(data)
+            if written == block.length: return True
+            print(f"[Client] {block.block_id} dari {node} tidak lengkap, coba replica lain")
+        except Exception as e:
+            pool.report_error(address, e)
+            print(f"[Client] Gagal baca {block.block_id} dari {node}, coba replica lain")
+        finally:
+            with inflight_lock:
+                inflight_reads[node] -= 1
+    return False
+
+def download_process(filename, dest_path):
+    try:
+        # 1. Tanya lokasi blok ke Master
+        response = pool.get_stub(MASTER_ADDRESS).GetFileLocations(pb2.UploadRequest(filename=filename))
+        blocks = response.blocks
+        if not blocks: return False
+
+        # 2. Siapkan file tujuan seukuran aslinya, lalu isi per blok (paralel)
+        with open(dest_path, "wb") as f:
+            f.truncate(response.filesize)
+        workers = min(BLOCK_PARALLELISM, len(blocks))
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda block: download_block(block, dest_path), blocks))
+        return all(results)
+
+    except Exception as e:
+        print(e)
+        return False
+
+def read_block_range(block, offset, length):
+    if block.ec_data:
+        return read_ec_range(block, offset, length)
+    # offset relatif terhadap awal blok; DataNode hanya mengirim rentang ini
+    for node in order_replicas(block.target_datanodes):
+        address = pool.node_address(node)
+        with inflight_lock:
+            inflight_reads[node] = inflight_reads.get(node, 0) + 1
+        try:
+            stream = pool.get_stub(address).DownloadChunk(
+                download_request(block.block_id, offset, length))
+            data = b"".join(decoded_chunks(stream, offset, length))
+            if len(data) == length: return data
+            print(f"[Client] {block.block_id} dari {node} tidak lengkap, coba replica lain")
+        except Exception as e:
+            pool.report_error(address, e)
+            print(f"[Client] Gagal baca {block.block_id} dari {node}, coba replica lain")
+        finally:
+            with inflight_lock:
+                inflight_reads[node] -= 1
+    return None
+
+# --- BACA BLOK ERASURE CODED ---
+# Fragmen data dibaca paralel dari node masing-masing. Fragmen yang gagal
+# (node mati/""/checksum rusak) dipulihkan dari rentang yang sama di k
+# fragmen lain (degraded read), tanpa mengunduh blok utuh.
+def read_fragment(block, index, lo, hi):
+    if hi <= lo:
+        return b""
+    node = block.target_datanodes[index]
+    if not node:
+        return None
+    name = fragment_name(block.block_id, index)
+    address = pool.node_address(node)
+    try:
+        stream = pool.get_stub(address).DownloadChunk(download_request(name, lo, hi - lo))
+        data = b"".join(decoded_chunks(stream, lo, hi - lo))
+        if len(data) == hi - lo: return data
+    except Exception as e:
+        pool.report_error(address, e)
+    print(f"[Client] Fragmen {name} dari {node} gagal, baca degraded")
+    return None
+
+# ranges: {index fragmen data: (lo, hi)} posisi di dalam fragmen.
+# Hasil: {index: bytes} atau None jika fragmen hidup kurang dari k
+def read_fragments(block, ranges):
+    with futures.ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        results = dict(zip(ranges, executor.map(
+            lambda i: read_fragment(block, i, *ranges[i]), ranges)))
+    missing = [i for i, data in results.items() if data is None]
+    if missing:
+        lo = min(ranges[i][0] for i in missing)
+        hi = max(ranges[i][1] for i in missing)
+        recovered = reconstruct(block, missing, lo, hi)
+        if recovered is None: return None
+        for i in missing:
+            results[i] = recovered[i][ranges[i][0] - lo:ranges[i][1] - lo]
+    return results
+
+def reconstruct(block, missing, lo, hi):
+    k, m = block.ec_data, block.ec_parity
+    n = hi - lo
+    fragments = {}
+    candidates = [i for i in range(k + m) if i not in missing]
+
+    def fetch(i):
+        # Fragmen data terakhir bisa lebih pendek: sisanya dianggap nol
+        real_hi = min(hi, fragment_length(block.length, k, i))
+        return i, read_fragment(block, i, lo, real_hi) if real_hi > lo else b""
+
+    # Ambil seperlunya (k fragmen), tambah dari kandidat berikutnya jika ada yang gagal
+    while len(fragments) < k and candidates:
+        batch = candidates[:k - len(fragments)]
+        candidates = candidates[len(batch):]
+        with futures.ThreadPoolExecutor(max_workers=len(batch)) as executor:
+            for i, data in executor.map(fetch, batch):
+                if data is not None:
+                    fragments[i] = as_array(data, n)
+    if len(fragments) < k:
+        print(f"[Client] {block.block_id}: fragmen hidup {len(fragments)}/{k}, tidak bisa dipulihkan")
+        return None
+    decoded = ReedSolomon(k, m).decode(fragments, missing, n)
+    return {i: decoded[i].tobytes() for i in missing}
 
-    time_par = time.time() - start_par
-    print(f"\n✅ Selesai! Waktu Paralel: {time_par:.2f} s")
+def read_ec_range(block, offset, length):
+    size = fragment_size(block.length, block.ec_data)
+    end = offset + length
+    ranges = {}
+    for i in range(offset // size, (end - 1) // size + 1):
+        ranges[i] = (max(offset - i * size, 0), min(end - i * size, size))
+    results = read_fragments(block, ranges)
+    if results is None: return None
+    return b"".join(results[i] for i in sorted(results))
 
-    if len(indices) > 0:
-        generate_dashboard(indices, latencies, throughputs, time_seq, time_par, success_count)
+# Per jendela EC_READ_WINDOW: rentang yang sama dari semua fragmen data
+# dibaca paralel lalu ditulis ke posisinya di file
+def download_ec_block(block, dest_path):
+    k = block.ec_data
+    size = fragment_size(block.length, k)
+    lengths = [fragment_length(block.length, k, i) for i in range(k)]
+    with open(dest_path, "r+b") as f:
+        for pos in range(0, size, EC_READ_WINDOW):
+            ranges = {i: (pos, min(pos + EC_READ_WINDOW, lengths[i]))
+                      for i in range(k) if lengths[i] > pos}
+            results = read_fragments(block, ranges)
+            if results is None: return False
+            for i, data in results.items():
+                f.seek(block.offset + i * size + pos)
+                f.write(data)
+    return True
 
-if __name__ == '__main__':
-    run()
\ No newline at end of file
+# Baca sebagian file (offset/length dalam file) tanpa mengunduh blok utuh
+def read_range(filename, offset, length):
+    response = pool.get_stub(MASTER_ADDRESS).GetFileLocations(pb2.UploadRequest(filename=filename))
+    end = min(offset + length, response.filesize)
+    parts = []
+    for block in response.blocks:
+        start = max(offset, block.offset)
+        stop = min(end, block.offset + block.length)
+        if start >= stop: continue
+        data = read_block_range(block, start - block.offset, stop - start)
+        if data is None: return None
+        parts.append(data)
+    return b"".join(parts)
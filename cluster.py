@@ -0,0 +1,319 @@
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import datanode
+import master
+import pool
+from metrics import serve_metrics
+
+# Cluster lokal tanpa Docker: 1 Master + N DataNode di 127.0.0.1, masing-masing
+# server gRPC dengan port acak (ephemeral) dan storage di direktori sementara.
+# node_id DataNode = "127.0.0.1:PORT", sehingga Master/client/DataNode lain
+# langsung tahu alamatnya (lihat pool.node_address).
+# - LocalCluster: semua node dalam satu proses (thread). Cepat dinyalakan,
+#   cocok untuk uji fungsional; node berbagi GIL sehingga angka throughput
+#   absolut lebih rendah dari cluster sungguhan.
+# - ProcessCluster: tiap node proses Python sendiri (master.py/datanode.py
+#   dengan konfigurasi lewat environment), lebih dekat ke deployment Docker.
+# Dengan metrics=True tiap node juga membuka endpoint /metrics di port acak
+# (metrics_addresses: nama node -> host:port).
+
+HOST = "127.0.0.1"
+# Heartbeat lebih rapat dari default agar node cepat terdaftar
+HEARTBEAT_INTERVAL = 0.5
+# Batas waktu menunggu semua DataNode terdaftar di Master (detik)
+START_TIMEOUT = 10
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Port bebas dari OS. Socket ditutup sebelum port dipakai server, jadi secara
+# teori bisa direbut proses lain di antaranya; cukup untuk cluster uji lokal
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+class LocalCluster:
+    def __init__(self, num_nodes=3, replication_factor=None, engine=None, durability=None,
+                 base_dir=None, workers=10, metrics=False):
+        if num_nodes < 1:
+            raise ValueError("Jumlah node minimal 1")
+        self.num_nodes = num_nodes
+        self.replication_factor = replication_factor
+        self.engine = engine
+        self.durability = durability
+        self.base_dir = base_dir
+        self.owns_dir = base_dir is None
+        self.workers = workers
+        self.metrics = metrics
+        self.launched = 0
+        self.master_port = None
+        self.master = None
+        self.master_server = None
+        self.nodes = {}
+        self.servers = {}
+        self.metrics_servers = {}
+        self.metrics_addresses = {}
+
+    @property
+    def master_address(self):
+        return f"{HOST}:{self.master_port}"
+
+    def start(self):
+        if self.owns_dir:
+            self.base_dir = tempfile.mkdtemp(prefix="dfs-cluster-")
+        self.master = master.MasterService(os.path.join(self.base_dir, "metadata"),
+                                           self.replication_factor)
+        self.master_server, self.master_port = master.start_master(
+            self.master, f"{HOST}:0", self.workers)
+        self.serve_metrics("master", self.master.metrics)
+        for _ in range(self.num_nodes):
+            self.launch_node()
+        self.wait_registered()
+        return self
+
+    # Menambah DataNode ke cluster yang sedang berjalan (mis. uji rebalancer)
+    def add_node(self):
+        node_id = self.launch_node()
+        self.wait_registered()
+        return node_id
+
+    def launch_node(self):
+        self.launched += 1
+        port = free_port()
+        node_id = f"{HOST}:{port}"
+        path = os.path.join(self.base_dir, f"node{self.launched}")
+        os.makedirs(path, exist_ok=True)
+        service = datanode.DataNodeService(node_id, path, self.master_address,
+                                           self.engine, self.durability, port)
+        self.servers[node_id] = datanode.start_node(
+            service, pool.node_address(node_id), HEARTBEAT_INTERVAL, self.workers)
+        self.nodes[node_id] = service
+        self.serve_metrics(node_id, service.metrics)
+        # Daftar langsung, tanpa menunggu interval heartbeat pertama
+        service.heartbeat()
+        return node_id
+
+    def wait_registered(self):
+        deadline = time.time() + START_TIMEOUT
+        while not set(self.nodes) <= set(self.master.get_active_nodes()):
+            if time.time() > deadline:
+                self.stop()
+                raise RuntimeError("DataNode tidak terdaftar di Master")
+            time.sleep(0.05)
+
+    def serve_metrics(self, name, registry):
+        if self.metrics:
+            server = serve_metrics(registry, 0, HOST)
+            self.metrics_servers[name] = server
+            self.metrics_addresses[name] = f"{HOST}:{server.server_address[1]}"
+
+    def stop_metrics(self, name):
+        server = self.metrics_servers.pop(name, None)
+        self.metrics_addresses.pop(name, None)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    # Mematikan satu DataNode (uji kegagalan); Master mendeteksinya lewat heartbeat
+    def stop_node(self, node_id):
+        server = self.servers.pop(node_id, None)
+        service = self.nodes.pop(node_id, None)
+        if server is not None:
+            server.stop(0).wait()
+        if service is not None:
+            service.stop()
+        self.stop_metrics(node_id)
+
+    def stop(self):
+        for node_id in list(self.servers):
+            self.stop_node(node_id)
+        self.stop_metrics("master")
+        if self.master_server is not None:
+            self.master_server.stop(0).wait()
+            self.master.stop()
+            self.master_server = None
+        # Channel ke node yang sudah mati jangan dipakai cluster berikutnya
+        pool.default_pool.close()
+        if self.owns_dir and self.base_dir:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+            self.base_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class ProcessCluster:
+    def __init__(self, num_nodes=3, replication_factor=None, engine=None, durability=None,
+                 base_dir=None, metrics=False):
+        if num_nodes < 1:
+            raise ValueError("Jumlah node minimal 1")
+        self.num_nodes = num_nodes
+        self.replication_factor = replication_factor
+        self.engine = engine
+        self.durability = durability
+        self.base_dir = base_dir
+        self.owns_dir = base_dir is None
+        self.metrics = metrics
+        self.launched = 0
+        self.master_port = None
+        self.master = None
+        self.nodes = {}
+        self.logs = []
+        self.metrics_addresses = {}
+
+    @property
+    def master_address(self):
+        return f"{HOST}:{self.master_port}"
+
+    def spawn(self, script, log_name, env):
+        env = dict(os.environ, **{key: str(value) for key, value in env.items() if value is not None})
+        log = open(os.path.join(self.base_dir, log_name), "wb")
+        self.logs.append(log)
+        return subprocess.Popen([sys.executable, "-u", os.path.join(BASE_DIR, script)],
+                                cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    # Port metrik acak untuk satu node, 0 (nonaktif) jika metrics=False
+    def metrics_port(self, name):
+        if not self.metrics:
+            return 0
+        port = free_port()
+        self.metrics_addresses[name] = f"{HOST}:{port}"
+        return port
+
+    def start(self):
+        if self.owns_dir:
+            self.base_dir = tempfile.mkdtemp(prefix="dfs-cluster-")
+        self.master_port = free_port()
+        self.master = self.spawn("master.py", "master.log", {
+            "MASTER_HOST": HOST,
+            "MASTER_PORT": self.master_port,
+            "METRICS_HOST": HOST,
+            "METRICS_PORT": self.metrics_port("master"),
+            "METADATA_DIR": os.path.join(self.base_dir, "metadata"),
+            "REPLICATION_FACTOR": self.replication_factor,
+        })
+        for _ in range(self.num_nodes):
+            self.launch_node()
+        self.wait_registered()
+        return self
+
+    def add_node(self):
+        node_id = self.launch_node()
+        self.wait_registered()
+        return node_id
+
+    def launch_node(self):
+        self.launched += 1
+        port = free_port()
+        node_id = f"{HOST}:{port}"
+        path = os.path.join(self.base_dir, f"node{self.launched}")
+        os.makedirs(path, exist_ok=True)
+        self.nodes[node_id] = self.spawn("datanode.py", f"node{self.launched}.log", {
+                "DATANODE_HOST": HOST,
+                "DATANODE_PORT": port,
+                "NODE_ID": node_id,
+                "METRICS_HOST": HOST,
+                "METRICS_PORT": self.metrics_port(node_id),
+                "STORAGE_PATH": path,
+                "MASTER_ADDRESS": self.master_address,
+                "HEARTBEAT_INTERVAL": HEARTBEAT_INTERVAL,
+                "STORAGE_ENGINE": self.engine,
+                "DURABILITY": self.durability,
+            })
+        return node_id
+
+    def wait_registered(self):
+        deadline = time.time() + START_TIMEOUT
+        while len(self.registered_nodes()) < len(self.nodes):
+            if time.time() > deadline or self.master.poll() is not None:
+                self.stop()
+                raise RuntimeError("DataNode tidak terdaftar di Master")
+            time.sleep(0.1)
+
+    # Node yang sudah diumumkan AKTIF di log Master
+    def registered_nodes(self):
+        with open(os.path.join(self.base_dir, "master.log"), errors="replace") as f:
+            log = f.read()
+        return {node_id for node_id in self.nodes if f"[Master] {node_id} AKTIF" in log}
+
+    def terminate(self, process):
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def stop_node(self, node_id):
+        process = self.nodes.pop(node_id, None)
+        self.metrics_addresses.pop(node_id, None)
+        if process is not None:
+            self.terminate(process)
+
+    def stop(self):
+        for node_id in list(self.nodes):
+            self.stop_node(node_id)
+        if self.master is not None:
+            self.terminate(self.master)
+            self.master = None
+        for log in self.logs:
+            log.close()
+        self.logs = []
+        pool.default_pool.close()
+        if self.owns_dir and self.base_dir:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+            self.base_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jalankan cluster DFS lokal (1 Master + N DataNode)")
+    parser.add_argument("--nodes", type=int, default=3, help="jumlah DataNode")
+    parser.add_argument("--replication", type=int, default=None, help="replication factor")
+    parser.add_argument("--processes", action="store_true",
+                        help="tiap node sebagai proses terpisah (default: thread dalam satu proses)")
+    parser.add_argument("--base-dir", default=None,
+                        help="direktori metadata/storage/log (default: direktori sementara, dihapus saat berhenti)")
+    parser.add_argument("--engine", default=None, help="storage engine DataNode (file|segment)")
+    parser.add_argument("--durability", default=None, help="durability DataNode (fast|group|sync)")
+    parser.add_argument("--metrics", action="store_true", help="buka endpoint /metrics tiap node")
+    args = parser.parse_args(argv)
+    if args.base_dir:
+        os.makedirs(args.base_dir, exist_ok=True)
+
+    if args.processes:
+        cluster = ProcessCluster(args.nodes, args.replication, args.engine, args.durability,
+                                 args.base_dir, metrics=args.metrics)
+    else:
+        cluster = LocalCluster(args.nodes, args.replication, args.engine, args.durability,
+                               args.base_dir, metrics=args.metrics)
+    with cluster:
+        print(f"[Cluster] Master: {cluster.master_address}")
+        for node_id in cluster.nodes:
+            print(f"[Cluster] DataNode: {node_id}")
+        for name, address in cluster.metrics_addresses.items():
+            print(f"[Cluster] Metrics {name}: http://{address}/metrics")
+        if args.processes:
+            print(f"[Cluster] Log node: {cluster.base_dir}")
+        print(f"[Cluster] Contoh: python benchmark.py --master {cluster.master_address} "
+              f"(client: MASTER_ADDRESS={cluster.master_address})")
+        print("[Cluster] Ctrl+C untuk berhenti")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("[Cluster] Berhenti...")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,111 @@
+import struct
+import zlib
+
+# Kompresi chunk (di jaringan & di disk). Codec dinegosiasikan per upload:
+# client menawarkan codec yang dimilikinya, Master memilih yang juga dimiliki
+# semua DataNode tujuan. Chunk dikompres di client, diteruskan antar DataNode
+# dan disimpan apa adanya (terkompresi), lalu baru didekompres oleh pembaca.
+# zstd/lz4 dipakai jika pustakanya terpasang, zlib selalu tersedia.
+#
+# Format object terkompresi di DataNode: OBJECT_MAGIC lalu rangkaian frame
+# (header FRAME + data), 1 frame = 1 chunk upload. Apakah object berformat
+# frame dicatat storage di luar datanya (framed), karena data mentah bisa saja
+# diawali byte yang sama dengan OBJECT_MAGIC. Hanya object lama tanpa catatan
+# format yang dikenali dari magic-nya.
+
+OBJECT_MAGIC = b"DFSZ\x01"
+# Header frame: id codec, panjang asli, panjang tersimpan
+FRAME = struct.Struct("<BII")
+# Codec "none" = frame tanpa kompresi (data yang tidak bisa dikompres)
+NONE = "none"
+
+# Contoh data yang dicoba dikompres dulu; jika hasilnya tidak cukup kecil
+# (mis. data acak/sudah terkompresi), chunk dikirim tanpa kompresi
+SAMPLE_SIZE = 16 * 1024
+# Rasio maksimal (terkompresi / asli) agar kompresi dianggap layak
+MIN_SAVING_RATIO = 0.9
+
+# Id codec di header frame (tetap, tidak bergantung pustaka yang terpasang)
+CODEC_IDS = {NONE: 0, "zlib": 1, "zstd": 2, "lz4": 3}
+CODEC_NAMES = {codec_id: name for name, codec_id in CODEC_IDS.items()}
+
+# Codec yang pustakanya tersedia: nama -> (compress, decompress)
+CODECS = {
+    NONE: (lambda data: data, lambda data: data),
+    "zlib": (lambda data: zlib.compress(data, 1), zlib.decompress),
+}
+
+try:
+    import zstandard
+    # Objek (de)compressor zstandard tidak thread-safe: dibuat per chunk
+    CODECS["zstd"] = (lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+                      lambda data: zstandard.ZstdDecompressor().decompress(data))
+except ImportError:
+    pass
+
+try:
+    import lz4.frame
+    CODECS["lz4"] = (lz4.frame.compress, lz4.frame.decompress)
+except ImportError:
+    pass
+
+# Urutan preferensi: tercepat/terbaik dulu
+PREFERENCE = ("zstd", "lz4", "zlib")
+
+def available_codecs():
+    return [name for name in PREFERENCE if name in CODECS]
+
+# Dipakai Master (yang tidak perlu memiliki pustaka codec-nya sendiri).
+# offered: codec milik client (urut preferensi); nodes_codecs: codec tiap DataNode
+def negotiate(offered, nodes_codecs):
+    for name in offered:
+        if all(name in codecs for codecs in nodes_codecs):
+            return name
+    return ""
+
+# Hasil: (codec yang dipakai, data). Data yang tidak bisa dikompres dikirim apa adanya
+def encode_chunk(data, codec):
+    if codec == NONE or len(data) < 64:
+        return NONE, data
+    compress = CODECS[codec][0]
+    if len(data) > SAMPLE_SIZE * 2:
+        sample = data[:SAMPLE_SIZE]
+        if len(compress(sample)) > len(sample) * MIN_SAVING_RATIO:
+            return NONE, data
+    packed = compress(data)
+    if len(packed) > len(data) * MIN_SAVING_RATIO:
+        return NONE, data
+    return codec, packed
+
+def decode_chunk(data, codec):
+    if not codec or codec == NONE:
+        return data
+    if codec not in CODECS:
+        raise ValueError(f"Codec tidak didukung: {codec}")
+    return CODECS[codec][1](data)
+
+def frame_header(codec, raw_length, stored_length):
+    if codec not in CODEC_IDS:
+        raise ValueError(f"Codec tidak dikenal: {codec}")
+    return FRAME.pack(CODEC_IDS[codec], raw_length, stored_length)
+
+# view: isi object tersimpan; framed: format dari storage (None = tidak
+# tercatat). Hasil: list (offset_asli, panjang_asli, posisi_data,
+# panjang_tersimpan, codec) atau None jika object mentah
+def frame_index(view, framed=None):
+    if framed is False:
+        return None
+    if bytes(view[:len(OBJECT_MAGIC)]) != OBJECT_MAGIC:
+        if framed:
+            raise ValueError("Object berformat frame tanpa OBJECT_MAGIC")
+        return None
+    frames = []
+    pos = len(OBJECT_MAGIC)
+    raw_offset = 0
+    while pos + FRAME.size <= len(view):
+        codec_id, raw_length, stored_length = FRAME.unpack_from(view, pos)
+        pos += FRAME.size
+        frames.append((raw_offset, raw_length, pos, stored_length, CODEC_NAMES.get(codec_id, "")))
+        raw_offset += raw_length
+        pos += stored_length
+    return frames
@@ -1,59 +1,682 @@
 import grpc
 from concurrent import futures
 import os
+import queue
+import shutil
 import time
 import threading
 import protos.dfs_pb2 as pb2
 import protos.dfs_pb2_grpc as pb2_grpc
+import pool
+from cache import ObjectCache, RecordingWriter
+from checksum import CHECKSUM_CHUNK, ChecksumError, crc
+from compression import NONE, OBJECT_MAGIC, available_codecs, decode_chunk, frame_header, frame_index
+from metrics import DATANODE_METRICS_PORT, EventLog, Registry, RpcMetrics, metrics_port, start_metrics
+from storage import make_store
 
-STORAGE_PATH = "/data"
-NODE_ID = os.getenv("HOSTNAME", "datanode-unknown")
+STORAGE_PATH = os.getenv("STORAGE_PATH", "/data")
+# file = 1 object per file | segment = object kecil ditumpuk ke segmen besar
+STORAGE_ENGINE = os.getenv("STORAGE_ENGINE", "file")
+# fast = tanpa fsync (benchmark) | group = 1 fsync per batch commit | sync = 1 fsync per object
+DURABILITY = os.getenv("DURABILITY", "group")
+MASTER_ADDRESS = os.getenv("MASTER_ADDRESS", "master-node:50051")
+# Alamat bind server gRPC DataNode
+DATANODE_HOST = os.getenv("DATANODE_HOST", "[::]")
+DATANODE_PORT = int(os.getenv("DATANODE_PORT", str(pool.DATANODE_PORT)))
+# node_id = alamat yang dipakai Master/client/DataNode lain untuk menghubungi
+# node ini: hostname, atau host:port jika port bukan port default
+NODE_ID = os.getenv("NODE_ID") or os.getenv("HOSTNAME", "datanode-unknown")
+if DATANODE_PORT != pool.DATANODE_PORT and ":" not in NODE_ID:
+    NODE_ID = f"{NODE_ID}:{DATANODE_PORT}"
+# Kapasitas yang diumumkan ke Master (byte). Kosong = total ukuran disk
+NODE_CAPACITY = int(os.getenv("NODE_CAPACITY", "0"))
+# Port HTTP /metrics (0 = nonaktif)
+METRICS_PORT = metrics_port(DATANODE_METRICS_PORT)
 
+# Ukuran tiap pesan saat DownloadChunk (1 MB)
+CHUNK_SIZE = 1024 * 1024
+
+# Jumlah chunk yang boleh mengantre ke node berikutnya pada mode pipeline
+PIPELINE_QUEUE_SIZE = 8
+
+# Laju baca scrubber (byte/detik) agar tidak berebut disk dengan client
+SCRUB_RATE = int(os.getenv("SCRUB_RATE", str(20 * 1024 * 1024)))
+# Jeda antar putaran scrubbing penuh (detik)
+SCRUB_INTERVAL = int(os.getenv("SCRUB_INTERVAL", "3600"))
+
+# Jeda antar laporan heartbeat ke Master (detik); laporan dikirim lewat satu
+# stream panjang sehingga interval pendek tetap murah
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "1"))
+# Jumlah nama object per pesan laporan blok penuh (~75 byte per nama, jauh
+# di bawah batas 4 MB pesan gRPC)
+REPORT_PAGE_SIZE = 10000
+# Thread untuk menjalankan perintah Master (hapus/salin) dari stream heartbeat
+COMMAND_WORKERS = int(os.getenv("COMMAND_WORKERS", "4"))
+
+# Cache baca di memori untuk object yang baru ditulis/dibaca (byte, 0 = nonaktif)
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", str(64 * 1024 * 1024)))
+# Object yang lebih besar dari ini selalu dibaca dari disk
+READ_CACHE_MAX_OBJECT = int(os.getenv("READ_CACHE_MAX_OBJECT", str(8 * 1024 * 1024)))
+
+# Membatasi laju baca/kirim: tidur jika sudah mendahului jadwal
+class Throttle:
+    def __init__(self, rate):
+        self.rate = rate
+        self.start = time.time()
+        self.done = 0
+
+    def consume(self, size):
+        if self.rate <= 0:
+            return
+        self.done += size
+        ahead = self.done / self.rate - (time.time() - self.start)
+        if ahead > 0:
+            time.sleep(ahead)
+
+def check_chunk(chunk):
+    if chunk.HasField("checksum") and crc(chunk.data) != chunk.checksum:
+        raise ChecksumError(f"Checksum chunk {chunk.filename} tidak cocok")
+
+# Membaca ulang semua object dengan laju dibatasi untuk menemukan data yang
+# rusak diam-diam di disk, lalu melaporkannya ke Master
+class Scrubber:
+    def __init__(self, store, node_id, master_address, rate=SCRUB_RATE, interval=SCRUB_INTERVAL):
+        self.store = store
+        self.node_id = node_id
+        self.master_address = master_address
+        self.rate = rate
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.stopped = threading.Event()
+
+    def report(self, name):
+        with self.lock:
+            self.pending.add(name)
+
+    def flush_reports(self):
+        with self.lock:
+            names = sorted(self.pending)
+            self.pending.clear()
+        if not names:
+            return
+        try:
+            pool.get_stub(self.master_address).ReportCorruptBlocks(
+                pb2.CorruptReport(node_id=self.node_id, block_ids=names))
+        except Exception as e:
+            pool.report_error(self.master_address, e)
+            print(f"[{self.node_id}] Gagal melapor replica rusak: {e}")
+            # Dicoba lagi pada laporan berikutnya
+            with self.lock:
+                self.pending.update(names)
+
+    def scrub_once(self):
+        throttle = Throttle(self.rate)
+        scanned = 0
+        corrupt = 0
+        for name in self.store.names():
+            try:
+                for view in self.store.read_range(name, 0, 0, CHUNK_SIZE):
+                    scanned += len(view)
+                    throttle.consume(len(view))
+            except ChecksumError as e:
+                print(f"[{self.node_id}] SCRUB: {e}")
+                self.report(name)
+                corrupt += 1
+            except FileNotFoundError:
+                # Dihapus saat sedang di-scan
+                continue
+        self.flush_reports()
+        return scanned, corrupt
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                scanned, corrupt = self.scrub_once()
+                print(f"[{self.node_id}] Scrub selesai: {scanned} byte, {corrupt} replica rusak")
+            except Exception as e:
+                print(f"[{self.node_id}] Scrub gagal: {e}")
+
+# Meneruskan chunk ke node berikutnya di pipeline sambil data masih mengalir.
+# Antrean dibatasi agar memori tetap kecil walaupun replica lebih lambat.
+class PipelineForwarder:
+    def __init__(self, pipeline):
+        self.target = pipeline[0]
+        self.rest = list(pipeline[1:])
+        self.address = pool.node_address(self.target)
+        self.queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        stub = pool.get_stub(self.address)
+        self.future = stub.UploadStream.future(iter(self.queue.get, None))
+
+    def send(self, chunk):
+        # Berhenti mengantre jika node berikutnya sudah gagal
+        while not self.future.done():
+            try:
+                self.queue.put(chunk, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self):
+        self.send(None)
+        try:
+            return self.future.result()
+        except grpc.RpcError as e:
+            pool.report_error(self.address, e)
+            return pb2.Reply(success=False, message=f"{self.target}: {e.code()}")
+
+    def abort(self):
+        self.future.cancel()
+
+# Konfigurasi default diambil dari konstanta modul; parameter konstruktor
+# dipakai cluster lokal yang menjalankan beberapa DataNode dalam satu proses
 class DataNodeService(pb2_grpc.DFSServiceServicer):
+    def __init__(self, node_id=None, storage_path=None, master_address=None,
+                 engine=None, durability=None, port=None, cache_size=None):
+        self.node_id = node_id or NODE_ID
+        self.port = port or DATANODE_PORT
+        self.storage_path = storage_path or STORAGE_PATH
+        self.master_address = master_address or MASTER_ADDRESS
+        self.store = make_store(engine or STORAGE_ENGINE, self.storage_path,
+                                durability or DURABILITY)
+        self.scrubber = Scrubber(self.store, self.node_id, self.master_address)
+        self.cache = ObjectCache(READ_CACHE_SIZE if cache_size is None else cache_size,
+                                 READ_CACHE_MAX_OBJECT)
+        # Statistik beban yang dikirim lewat heartbeat
+        self.stats_lock = threading.Lock()
+        self.inflight_uploads = 0
+        self.stopped = threading.Event()
+        # Laporan blok inkremental: nama object -> True (baru) / False (dihapus)
+        self.block_changes = {}
+        # Upload pipeline yang sudah commit lokal tapi belum di-ack rantai:
+        # nama object -> {token: True jika object hanya milik upload ini}
+        self.claims = {}
+        # Hasil perintah Master yang menunggu dikirim di stream heartbeat
+        self.results = queue.Queue()
+        self.executor = futures.ThreadPoolExecutor(max_workers=COMMAND_WORKERS)
+        self.call = None
+        self.log = EventLog(self.node_id)
+        self.metrics = Registry()
+        self.rpc_metrics = RpcMetrics(self.metrics)
+        self.bytes_received = self.metrics.counter(
+            "dfs_bytes_received_total", "Byte chunk diterima (setelah kompresi)")
+        self.bytes_sent = self.metrics.counter(
+            "dfs_bytes_sent_total", "Byte chunk dikirim", ("op",))
+        self.disk_latency = self.metrics.histogram(
+            "dfs_disk_write_seconds", "Latency tulis storage (write per chunk, commit per object)", ("op",))
+        self.heartbeat_latency = self.metrics.histogram(
+            "dfs_heartbeat_seconds", "Durasi RPC heartbeat ke Master")
+        self.heartbeat_failures = self.metrics.counter(
+            "dfs_heartbeat_failures_total", "Heartbeat yang gagal")
+        self.metrics.gauge("dfs_used_bytes", "Byte terpakai di storage",
+                           collect=lambda: {(): self.store.used_bytes()})
+        self.metrics.gauge("dfs_inflight_uploads", "Upload stream yang sedang berjalan",
+                           collect=lambda: {(): self.inflight_uploads})
+        self.metrics.counter("dfs_cache_hits_total", "Download yang dilayani dari cache baca",
+                             collect=lambda: {(): self.cache.hits})
+        self.metrics.counter("dfs_cache_misses_total", "Download yang harus membaca disk",
+                             collect=lambda: {(): self.cache.misses})
+        self.metrics.counter("dfs_cache_evictions_total", "Object yang diusir dari cache baca",
+                             collect=lambda: {(): self.cache.evictions})
+        self.metrics.gauge("dfs_cache_bytes", "Byte object di cache baca",
+                           collect=lambda: {(): self.cache.size})
+
+    def add_inflight(self, delta):
+        with self.stats_lock:
+            self.inflight_uploads += delta
+
+    def node_status(self):
+        capacity = NODE_CAPACITY or shutil.disk_usage(self.storage_path).total
+        with self.stats_lock:
+            return pb2.NodeStatus(node_id=self.node_id, port=str(self.port), capacity=capacity,
+                                  used_bytes=self.store.used_bytes(),
+                                  inflight_uploads=self.inflight_uploads,
+                                  codecs=available_codecs())
+
+    # Chunk dengan codec disimpan sebagai frame (header + data terkompresi apa
+    # adanya); chunk tanpa codec ditulis mentah. Hasil: panjang asli data.
+    def write_chunk(self, writer, chunk):
+        self.bytes_received.inc(len(chunk.data))
+        start = time.perf_counter()
+        if chunk.codec:
+            writer.write(frame_header(chunk.codec, chunk.raw_length, len(chunk.data)))
+        writer.write(chunk.data)
+        self.disk_latency.observe(time.perf_counter() - start, ("write",))
+        return chunk.raw_length if chunk.codec else len(chunk.data)
+
+    # Writer yang ikut mengisi cache saat commit (object baru paling sering dibaca).
+    # framed: object disimpan dalam format frame (dicatat storage)
+    def open_writer(self, name, framed=False):
+        writer = self.store.open_writer(name, framed)
+        if self.cache.enabled:
+            writer = RecordingWriter(writer, self.cache.max_object)
+        return writer
+
+    # claim: token upload pipeline yang sedang commit (lihat claim_object)
+    def commit(self, writer, claim=None):
+        with self.stats_lock:
+            # Upload lain menulis object yang sama: salinannya tidak lagi
+            # boleh di-rollback oleh upload yang sedang menunggu pipeline
+            claims = self.claims.get(writer.name, {})
+            for other in claims:
+                if other is not claim:
+                    claims[other] = False
+        token = self.cache.begin(writer.name)
+        data = None
+        start = time.perf_counter()
+        try:
+            writer.commit()
+            if isinstance(writer, RecordingWriter):
+                data = writer.data()
+        except Exception:
+            # Commit gagal bisa membuang object lama dengan nama yang sama
+            if not self.store.exists(writer.name):
+                self.note_block(writer.name, False)
+            raise
+        finally:
+            # Commit gagal pun isi lama di cache dibuang (bisa sudah tertimpa)
+            self.cache.finish(writer.name, token, data, writer.framed, written=True)
+        self.disk_latency.observe(time.perf_counter() - start, ("commit",))
+        self.note_block(writer.name, True)
+
+    def delete_object(self, name):
+        deleted = self.store.delete(name)
+        self.cache.invalidate(name)
+        self.note_block(name, False)
+        return deleted
+
+    # (isi, framed) object dari cache, atau dibaca utuh dari disk (checksum
+    # dicocokkan) lalu dimasukkan ke cache. None jika object terlalu besar.
+    def cached_object(self, name):
+        if not self.cache.enabled:
+            return None
+        entry = self.cache.get(name)
+        if entry is not None or self.store.size(name) > self.cache.max_object:
+            return entry
+        token = self.cache.begin(name)
+        framed = self.store.framed(name)
+        data = None
+        try:
+            data = b"".join(self.store.read_range(name, 0, 0, CHUNK_SIZE))
+        finally:
+            self.cache.finish(name, token, data, framed)
+        return data, framed
+
+    # Dipanggil sebelum commit lokal upload pipeline. Rollback hanya boleh
+    # menghapus object yang dibuat upload ini: object yang sudah ada (blok
+    # dedup yang sama dari upload lain) atau ikut ditulis upload lain dibiarkan
+    def claim_object(self, name):
+        token = object()
+        with self.stats_lock:
+            claims = self.claims.setdefault(name, {})
+            for other in claims:
+                claims[other] = False
+            claims[token] = not claims and not self.store.exists(name)
+        return token
+
+    # Hasil: True jika object hanya milik upload pemegang token
+    def release_object(self, name, token):
+        with self.stats_lock:
+            claims = self.claims.get(name, {})
+            owned = claims.pop(token, False)
+            if not claims:
+                self.claims.pop(name, None)
+        return owned
+
+    def note_block(self, name, present):
+        with self.stats_lock:
+            self.block_changes[name] = present
+
+    def take_block_changes(self):
+        with self.stats_lock:
+            changes = self.block_changes
+            self.block_changes = {}
+        added = [name for name, present in changes.items() if present]
+        removed = [name for name, present in changes.items() if not present]
+        return added, removed
+
     def UploadChunk(self, request, context):
-        print(f"[{NODE_ID}] Terima file: {request.filename}")
-        filepath = os.path.join(STORAGE_PATH, request.filename)
+        self.log.info("chunk_received", name=request.filename, bytes=len(request.data))
         try:
-            with open(filepath, "wb") as f:
-                f.write(request.data)
+            check_chunk(request)
+            writer = self.open_writer(request.filename, bool(request.codec))
+            if request.codec:
+                writer.write(OBJECT_MAGIC)
+            self.write_chunk(writer, request)
+            self.commit(writer)
             return pb2.Reply(success=True, message="Disimpan")
         except Exception as e:
             return pb2.Reply(success=False, message=str(e))
 
+    # Upload bertahap: setiap chunk langsung diteruskan ke storage engine
+    # (memori = 1 chunk). Object baru terlihat setelah commit, sehingga upload
+    # yang putus tidak meninggalkan data setengah jadi.
+    # Jika chunk pertama membawa daftar pipeline, chunk diteruskan ke node
+    # berikutnya sambil ditulis (client -> primary -> replica). Ack baru sukses
+    # jika seluruh rantai sukses; jika tidak, salinan lokal ikut di-rollback
+    # (hanya jika object dibuat oleh upload ini, lihat claim_object).
+    # Setiap chunk dicek checksum-nya dan total panjang dicocokkan dengan
+    # length pada chunk pertama sebelum commit.
+    def UploadStream(self, request_iterator, context):
+        self.add_inflight(1)
+        try:
+            return self.receive_stream(request_iterator)
+        finally:
+            self.add_inflight(-1)
+
+    def receive_stream(self, request_iterator):
+        writer = None
+        forwarder = None
+        claim = None
+        expected = 0
+        received = 0
+        try:
+            for chunk in request_iterator:
+                check_chunk(chunk)
+                if writer is None:
+                    self.log.info("stream_received", name=chunk.filename, length=chunk.length,
+                                  pipeline=len(chunk.pipeline))
+                    # Upload terkompresi: object disimpan dalam format frame.
+                    # Salinan replica (framed) sudah membawa magic & frame-nya
+                    writer = self.open_writer(chunk.filename, bool(chunk.codec) or chunk.framed)
+                    expected = chunk.length
+                    if chunk.codec:
+                        writer.write(OBJECT_MAGIC)
+                    if chunk.pipeline:
+                        forwarder = PipelineForwarder(chunk.pipeline)
+                        del chunk.pipeline[:]
+                        chunk.pipeline.extend(forwarder.rest)
+                received += self.write_chunk(writer, chunk)
+                if forwarder is not None:
+                    forwarder.send(chunk)
+            if writer is None:
+                return pb2.Reply(success=False, message="Stream kosong")
+            if expected and received != expected:
+                raise IOError(f"Data tidak lengkap: {received}/{expected} byte")
+            if forwarder is not None:
+                claim = self.claim_object(writer.name)
+            self.commit(writer, claim)
+        except Exception as e:
+            if claim is not None:
+                self.release_object(writer.name, claim)
+            if forwarder is not None:
+                forwarder.abort()
+            if writer is not None:
+                writer.abort()
+            return pb2.Reply(success=False, message=str(e))
+
+        if forwarder is None:
+            return pb2.Reply(success=True, message="Disimpan", nodes=[self.node_id])
+
+        downstream = forwarder.finish()
+        owned = self.release_object(writer.name, claim)
+        if not downstream.success:
+            self.log.warn("pipeline_rollback", name=writer.name, error=downstream.message,
+                          deleted=owned)
+            if owned:
+                self.delete_object(writer.name)
+            return pb2.Reply(success=False, message=f"Pipeline gagal: {downstream.message}")
+        return pb2.Reply(success=True, message="Disimpan (pipeline)",
+                         nodes=[self.node_id] + list(downstream.nodes))
+
+    # Object kecil dilayani dari cache baca (lihat cached_object). Selain itu
+    # ranged read dari mapping mmap: object dipotong sebagai memoryview, tanpa
+    # buffer baca per request. Field bytes protobuf hanya menerima bytes,
+    # jadi tiap potongan disalin sekali saat dimasukkan ke pesan.
+    # Object terkompresi dikirim per frame apa adanya (pembaca yang
+    # mendekompres); frame didekompres di sini hanya jika codec-nya tidak
+    # didukung pembaca.
+    # Data dicocokkan dengan checksum tersimpan; replica rusak dilaporkan ke
+    # Master dan client diberi DATA_LOSS agar pindah ke replica lain.
+    def DownloadChunk(self, request, context):
+        if not self.store.exists(request.filename):
+            context.abort(grpc.StatusCode.NOT_FOUND, f"{request.filename} tidak ditemukan")
+        if request.offset < 0 or request.length < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "offset/length tidak boleh negatif")
+        try:
+            entry = self.cached_object(request.filename)
+            if entry is None:
+                data = None
+                framed = self.store.framed(request.filename)
+                view = self.store.view(request.filename)
+            else:
+                data, framed = entry
+                view = memoryview(data)
+            frames = frame_index(view, framed)
+            if frames is None:
+                chunks = self.read_raw(request, data)
+            else:
+                chunks = self.read_frames(request, frames, data)
+            for chunk in chunks:
+                self.bytes_sent.inc(len(chunk.data), ("download",))
+                yield chunk
+        except ChecksumError as e:
+            print(f"[{self.node_id}] KORUP: {e}")
+            self.scrubber.report(request.filename)
+            threading.Thread(target=self.scrubber.flush_reports, daemon=True).start()
+            context.abort(grpc.StatusCode.DATA_LOSS, str(e))
+
+    # cached: isi object dari cache (None = baca dari storage)
+    def read_raw(self, request, cached=None):
+        if cached is not None:
+            end = len(cached) if request.length <= 0 else min(len(cached), request.offset + request.length)
+            for pos in range(request.offset, end, CHUNK_SIZE):
+                data = cached[pos:min(pos + CHUNK_SIZE, end)]
+                yield pb2.ChunkData(filename=request.filename, data=data, checksum=crc(data))
+            return
+        for view in self.store.read_range(request.filename, request.offset, request.length, CHUNK_SIZE):
+            yield pb2.ChunkData(filename=request.filename, data=bytes(view), checksum=crc(view))
+
+    def read_frames(self, request, frames, cached=None):
+        name = request.filename
+        raw_size = frames[-1][0] + frames[-1][1] if frames else 0
+        start = request.offset
+        end = raw_size if request.length <= 0 else min(raw_size, start + request.length)
+        accept = set(request.accept_codecs)
+        for raw_offset, raw_length, pos, stored_length, codec in frames:
+            if raw_offset + raw_length <= start:
+                continue
+            if raw_offset >= end:
+                break
+            # Satu potongan cukup untuk seluruh frame (dibaca dari batas checksum)
+            if cached is not None:
+                data = cached[pos:pos + stored_length]
+            else:
+                data = b"".join(self.store.read_range(name, pos, stored_length,
+                                                      stored_length + CHECKSUM_CHUNK))
+            if not accept:
+                # Pembaca lama: kirim data asli tepat sesuai rentang
+                data = decode_chunk(data, codec)[max(start - raw_offset, 0):end - raw_offset]
+                yield pb2.ChunkData(filename=name, data=data, checksum=crc(data))
+                continue
+            if codec not in accept:
+                data = decode_chunk(data, codec)
+                codec = NONE
+            yield pb2.ChunkData(filename=name, data=data, codec=codec, raw_length=raw_length,
+                                offset=raw_offset, checksum=crc(data))
+
+    # Re-replikasi atas perintah Master: salinan lokal dikirim ke target
+    # lewat UploadStream biasa (target pertama meneruskan ke sisanya)
+    def ReplicateBlock(self, request, context):
+        if not self.store.exists(request.block_id):
+            return pb2.Reply(success=False, message=f"{request.block_id} tidak ada di {self.node_id}")
+        address = pool.node_address(request.targets[0])
+        try:
+            reply = pool.get_stub(address).UploadStream(
+                self.replica_stream(request.block_id, request.targets[1:], request.rate),
+                timeout=request.timeout or None)
+        except grpc.RpcError as e:
+            pool.report_error(address, e)
+            return pb2.Reply(success=False, message=f"{request.targets[0]}: {e.code()}")
+        if reply.success:
+            print(f"[{self.node_id}] Re-replikasi {request.block_id} -> {', '.join(reply.nodes)}")
+        return reply
+
+    # Object disalin byte-per-byte seperti tersimpan (frame terkompresi tidak
+    # didekompres), sehingga replica baru identik dengan sumbernya
+    def replica_stream(self, name, pipeline, rate):
+        throttle = Throttle(rate)
+        size = self.store.size(name)
+        framed = self.store.framed(name)
+        if framed is None:
+            # Object lama tanpa catatan format
+            framed = frame_index(self.store.view(name)) is not None
+        first = True
+        try:
+            for view in self.store.read_range(name, 0, 0, CHUNK_SIZE):
+                throttle.consume(len(view))
+                chunk = pb2.ChunkData(filename=name, data=bytes(view), checksum=crc(view))
+                self.bytes_sent.inc(len(chunk.data), ("replicate",))
+                if first:
+                    chunk.pipeline.extend(pipeline)
+                    chunk.length = size
+                    chunk.framed = framed
+                    first = False
+                yield chunk
+        except ChecksumError as e:
+            # Salinan sumber rusak: laporkan, stream dibatalkan (target tidak commit)
+            print(f"[{self.node_id}] KORUP: {e}")
+            self.scrubber.report(name)
+            threading.Thread(target=self.scrubber.flush_reports, daemon=True).start()
+            raise
+        if first:
+            # Object kosong tetap dikirim sebagai satu chunk
+            yield pb2.ChunkData(filename=name, pipeline=pipeline, checksum=crc(b""))
+
     # Fungsi Rollback untuk menjaga Konsistensi
     def DeleteChunk(self, request, context):
-        print(f"[{NODE_ID}] ROLLBACK: Menghapus {request.filename}...")
-        filepath = os.path.join(STORAGE_PATH, request.filename)
+        self.log.info("delete", name=request.filename)
         try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            if self.delete_object(request.filename):
                 return pb2.Reply(success=True, message="File dihapus (Rollback sukses)")
             else:
                 return pb2.Reply(success=True, message="File sudah tidak ada")
         except Exception as e:
             return pb2.Reply(success=False, message=str(e))
 
-def send_heartbeat():
-    time.sleep(5)
-    while True:
+    # Status dulu, lalu laporan penuh (seluruh object, per REPORT_PAGE_SIZE
+    # nama), berikutnya status + perubahan object tiap interval. Hasil perintah
+    # dikirim begitu selesai. Perubahan sejak daftar diambil ikut laporan
+    # inkremental sesudahnya.
+    def reports(self, interval, closed):
+        self.take_block_changes()
+        yield pb2.NodeReport(status=self.node_status())
+        names = self.store.names()
+        for start in range(0, max(len(names), 1), REPORT_PAGE_SIZE):
+            page = names[start:start + REPORT_PAGE_SIZE]
+            yield pb2.NodeReport(added_blocks=page, full_report=True,
+                                 full_report_done=start + REPORT_PAGE_SIZE >= len(names))
+        next_report = time.time() + interval
+        while True:
+            try:
+                result = self.results.get(timeout=max(0, next_report - time.time()))
+            except queue.Empty:
+                result = None
+            if closed.is_set() or self.stopped.is_set():
+                return
+            if result is not None:
+                yield pb2.NodeReport(results=[result])
+                continue
+            added, removed = self.take_block_changes()
+            yield pb2.NodeReport(status=self.node_status(), added_blocks=added, removed_blocks=removed)
+            next_report = max(next_report + interval, time.time())
+
+    # Satu sesi stream heartbeat, kembali saat stream berakhir.
+    # Hasil: False jika Master belum mendukung HeartbeatStream
+    # Stream memakai channel sendiri di luar pool: pool menutup channel yang
+    # lama tidak diminta (IDLE_TIMEOUT), padahal stream ini terus terbuka.
+    def heartbeat_stream(self, interval):
+        closed = threading.Event()
+        channel = grpc.insecure_channel(self.master_address)
+        try:
+            stub = pb2_grpc.DFSServiceStub(channel)
+            self.call = stub.HeartbeatStream(self.reports(interval, closed))
+            for command in self.call:
+                if self.stopped.is_set():
+                    break
+                self.executor.submit(self.run_command, command)
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                return False
+            if not self.stopped.is_set():
+                pool.report_error(self.master_address, e)
+                self.heartbeat_failures.inc()
+                print(f"[{self.node_id}] Stream heartbeat putus: {e.code()}")
+        finally:
+            closed.set()
+            self.call = None
+            channel.close()
+        return True
+
+    def run_command(self, command):
+        try:
+            if command.action == "delete":
+                deleted = sum(1 for name in command.names if self.delete_object(name))
+                reply = pb2.Reply(success=True, message=f"{deleted} object dihapus")
+                self.log.info("delete", objects=len(command.names), deleted=deleted)
+            elif command.action == "replicate":
+                reply = self.ReplicateBlock(command.replicate, None)
+            else:
+                reply = pb2.Reply(success=False, message=f"Perintah tidak dikenal: {command.action}")
+        except Exception as e:
+            reply = pb2.Reply(success=False, message=str(e))
+        self.results.put(pb2.CommandResult(command_id=command.command_id, reply=reply))
+
+    # Heartbeat unary: pendaftaran awal & Master lama tanpa HeartbeatStream
+    def heartbeat(self):
         try:
-            with grpc.insecure_channel('master-node:50051') as channel:
-                stub = pb2_grpc.DFSServiceStub(channel)
-                stub.Heartbeat(pb2.NodeStatus(node_id=NODE_ID, port="50051"))
+            # Channel ke Master dipakai ulang setiap heartbeat
+            stub = pool.get_stub(self.master_address)
+            start = time.perf_counter()
+            stub.Heartbeat(self.node_status())
+            self.heartbeat_latency.observe(time.perf_counter() - start)
+            return True
         except Exception as e:
-            print(f"[{NODE_ID}] Gagal Heartbeat: {e}")
-        time.sleep(5)
+            pool.report_error(self.master_address, e)
+            self.heartbeat_failures.inc()
+            print(f"[{self.node_id}] Gagal Heartbeat: {e}")
+            return False
+
+    def stop(self):
+        self.stopped.set()
+        self.scrubber.stopped.set()
+        call = self.call
+        if call is not None:
+            call.cancel()
+        self.executor.shutdown(wait=False)
+        self.store.close()
+
+# Stream yang putus langsung dibuka ulang (Master memberi STREAM_GRACE
+# sebelum node dianggap mati); jika segera putus lagi, dicoba tiap interval
+def send_heartbeat(service, interval=HEARTBEAT_INTERVAL):
+    while not service.stopped.is_set():
+        opened = time.time()
+        if service.heartbeat_stream(interval):
+            if time.time() - opened < interval:
+                service.stopped.wait(interval)
+            continue
+        print(f"[{service.node_id}] Master tanpa HeartbeatStream, memakai heartbeat unary")
+        while not service.stopped.wait(interval):
+            service.heartbeat()
+
+# Server gRPC + thread heartbeat & scrubber untuk satu DataNode
+def start_node(service, address, heartbeat_interval=HEARTBEAT_INTERVAL, workers=10):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers),
+                         interceptors=[service.rpc_metrics])
+    pb2_grpc.add_DFSServiceServicer_to_server(service, server)
+    server.add_insecure_port(address)
+    server.start()
+    threading.Thread(target=send_heartbeat, args=(service, heartbeat_interval), daemon=True).start()
+    threading.Thread(target=service.scrubber.run, daemon=True).start()
+    return server
 
 def serve():
     if not os.path.exists(STORAGE_PATH):
         os.makedirs(STORAGE_PATH)
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    pb2_grpc.add_DFSServiceServicer_to_server(DataNodeService(), server)
-    server.add_insecure_port('[::]:50051')
-    t = threading.Thread(target=send_heartbeat, daemon=True)
-    t.start()
-    print(f"[{NODE_ID}] Siap di port 50051. Heartbeat aktif.")
-    server.start()
+    service = DataNodeService()
+    server = start_node(service, f"{DATANODE_HOST}:{DATANODE_PORT}")
+    print(f"[{NODE_ID}] Siap di port {DATANODE_PORT} (storage {STORAGE_ENGINE}, durability {DURABILITY}). Heartbeat aktif.")
+    start_metrics(service.metrics, METRICS_PORT, NODE_ID)
     server.wait_for_termination()
 
 if __name__ == '__main__':
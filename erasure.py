@@ -0,0 +1,124 @@
+import numpy as np
+
+# Erasure coding Reed-Solomon (k fragmen data + m fragmen parity) di GF(256).
+# Satu blok dipecah menjadi k fragmen data berurutan (fragmen i = byte
+# [i*F, (i+1)*F) dari blok, F = ceil(panjang/k)), ditambah m fragmen parity
+# berukuran F. Tiap fragmen disimpan sebagai object sendiri di node berbeda;
+# blok tetap terbaca selama k dari k+m fragmen masih ada.
+# Parity di posisi p hanya bergantung pada byte posisi p semua fragmen data,
+# sehingga baca sebagian (degraded) cukup mengambil rentang yang sama dari
+# k fragmen lain.
+# Aritmetika per byte memakai tabel perkalian 256x256 yang di-index NumPy
+# (tanpa loop Python per byte).
+
+# Polinomial GF(2^8) yang umum dipakai RS (x^8 + x^4 + x^3 + x^2 + 1)
+GF_POLY = 0x11d
+
+def build_tables():
+    exp = [0] * 512
+    log = [0] * 256
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= GF_POLY
+    for i in range(255, 512):
+        exp[i] = exp[i - 255]
+    return exp, log
+
+GF_EXP, GF_LOG = build_tables()
+
+def gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return GF_EXP[GF_LOG[a] + GF_LOG[b]]
+
+def gf_inv(a):
+    if a == 0:
+        raise ZeroDivisionError("0 tidak punya invers di GF(256)")
+    return GF_EXP[255 - GF_LOG[a]]
+
+# MUL_TABLE[c][x] = c * x; MUL_TABLE[c][array] mengalikan seluruh array sekaligus
+MUL_TABLE = np.array([[gf_mul(c, x) for x in range(256)] for c in range(256)], dtype=np.uint8)
+
+# Invers matriks k x k (list of list) dengan eliminasi Gauss di GF(256)
+def gf_invert(matrix):
+    n = len(matrix)
+    rows = [list(row) + [1 if i == j else 0 for j in range(n)] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if rows[r][col]), None)
+        if pivot is None:
+            raise ValueError("Matriks tidak bisa diinvers")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        scale = gf_inv(rows[col][col])
+        rows[col] = [gf_mul(scale, v) for v in rows[col]]
+        for r in range(n):
+            factor = rows[r][col]
+            if r != col and factor:
+                rows[r] = [v ^ gf_mul(factor, p) for v, p in zip(rows[r], rows[col])]
+    return [row[n:] for row in rows]
+
+def fragment_size(length, k):
+    return -(-length // k)
+
+# Panjang asli fragmen index: fragmen data terakhir bisa lebih pendek
+# (atau kosong untuk blok kecil), fragmen parity selalu F
+def fragment_length(length, k, index):
+    size = fragment_size(length, k)
+    if index >= k:
+        return size
+    return max(0, min(size, length - index * size))
+
+# Nama object fragmen di DataNode
+def fragment_name(block_id, index):
+    return f"{block_id}.ec{index}"
+
+class ReedSolomon:
+    def __init__(self, k, m):
+        if k < 1 or m < 1 or k + m > 256:
+            raise ValueError(f"Skema erasure coding tidak valid: k={k}, m={m}")
+        self.k = k
+        self.m = m
+        # Matriks Cauchy untuk parity: setiap k baris dari [I; C] bisa diinvers,
+        # jadi k fragmen mana pun cukup untuk memulihkan data
+        self.parity_rows = [[gf_inv((k + j) ^ i) for i in range(k)] for j in range(m)]
+        self.rows = [[1 if i == j else 0 for j in range(k)] for i in range(k)] + self.parity_rows
+
+    def combine(self, coefficients, fragments, size):
+        out = np.zeros(size, dtype=np.uint8)
+        for c, fragment in zip(coefficients, fragments):
+            if c == 1:
+                out ^= fragment
+            elif c:
+                out ^= MUL_TABLE[c][fragment]
+        return out
+
+    # data: k array uint8 sepanjang size -> m array parity
+    def encode(self, data, size):
+        return [self.combine(row, data, size) for row in self.parity_rows]
+
+    # fragments: {index: array uint8 sepanjang size}, minimal k.
+    # Hasil: {index: array} untuk fragmen data yang diminta (wanted)
+    def decode(self, fragments, wanted, size):
+        available = sorted(fragments)
+        if len(available) < self.k:
+            raise ValueError(f"Fragmen tidak cukup: {len(available)}/{self.k}")
+        # Utamakan fragmen data (baris identitas, invers lebih murah)
+        use = available[:self.k]
+        inverse = gf_invert([self.rows[i] for i in use])
+        sources = [fragments[i] for i in use]
+        result = {}
+        for index in wanted:
+            if index in fragments:
+                result[index] = fragments[index]
+            else:
+                result[index] = self.combine(inverse[index], sources, size)
+        return result
+
+# Byte -> array uint8 sepanjang size (kekurangan diisi nol)
+def as_array(data, size):
+    out = np.zeros(size, dtype=np.uint8)
+    out[:len(data)] = np.frombuffer(data, dtype=np.uint8)
+    return out
@@ -0,0 +1,155 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+# Sisi Master dari HeartbeatStream:
+# - CommandHub: antrean perintah per DataNode yang sedang terhubung. Perintah
+#   dikirim lewat stream heartbeat (tanpa membuka koneksi ke DataNode) dan
+#   hasilnya kembali pada laporan berikutnya sebagai Future.
+# - BlockReports: daftar object tiap node menurut laporan blok (laporan
+#   penuh saat stream dibuka, lalu inkremental), dipakai untuk menemukan
+#   replica yang tercatat di metadata tetapi tidak ada lagi di node.
+
+# Batas waktu default menunggu jawaban perintah / RPC fallback (detik)
+COMMAND_TIMEOUT = 30
+
+class CommandHub:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # node_id -> antrean perintah stream yang aktif
+        self.outboxes = {}
+        # command_id -> Future berisi Reply
+        self.pending = {}
+        self.ids = itertools.count(1)
+
+    # Stream baru dari node menggantikan stream lamanya (jika ada)
+    def connect(self, node_id):
+        outbox = queue.Queue()
+        with self.lock:
+            old = self.outboxes.get(node_id)
+            self.outboxes[node_id] = outbox
+        if old is not None:
+            old.put(None)
+        return outbox
+
+    # outbox None = stream aktif node tersebut (jika ada). Hasil: True jika
+    # outbox ini masih stream aktif node (bukan sudah digantikan/ditutup)
+    def disconnect(self, node_id, outbox=None):
+        with self.lock:
+            current = self.outboxes.get(node_id)
+            if current is None or (outbox is not None and current is not outbox):
+                if outbox is not None:
+                    outbox.put(None)
+                return False
+            outbox = current
+            del self.outboxes[node_id]
+        outbox.put(None)
+        with self.lock:
+            failed = [(command_id, future) for command_id, (owner, future) in self.pending.items()
+                      if owner == node_id]
+            for command_id, _ in failed:
+                del self.pending[command_id]
+        for _, future in failed:
+            future.set_exception(ConnectionError(f"Stream heartbeat {node_id} terputus"))
+        return True
+
+    # Hasil: Future (Reply) atau None jika node tidak punya stream aktif
+    def send(self, node_id, command):
+        future = Future()
+        with self.lock:
+            outbox = self.outboxes.get(node_id)
+            if outbox is None:
+                return None
+            command.command_id = next(self.ids)
+            self.pending[command.command_id] = (node_id, future)
+        outbox.put(command)
+        return future
+
+    # Perintah lewat stream jika node terhubung, selain itu fallback() (RPC
+    # langsung, pemanggil memasang timeout yang sama). Stream putus atau tidak
+    # ada jawaban dalam timeout -> exception; jawaban yang terlambat diabaikan.
+    def call(self, node_id, command, fallback, timeout=COMMAND_TIMEOUT):
+        future = self.send(node_id, command)
+        if future is None:
+            return fallback()
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            with self.lock:
+                self.pending.pop(command.command_id, None)
+            raise TimeoutError(f"Perintah {command.action} ke {node_id} tidak dijawab "
+                               f"dalam {timeout:.0f} s")
+
+    def complete(self, result):
+        with self.lock:
+            entry = self.pending.pop(result.command_id, None)
+        if entry is not None:
+            entry[1].set_result(result.reply)
+
+    def close(self):
+        with self.lock:
+            outboxes = list(self.outboxes.values())
+        for outbox in outboxes:
+            outbox.put(None)
+
+class BlockReports:
+    # grace: lama (detik) sebuah replica boleh tidak muncul di laporan node
+    # sebelum dianggap hilang (menutup jeda antara simpan, commit dan laporan)
+    def __init__(self, grace):
+        self.grace = grace
+        self.lock = threading.Lock()
+        self.blocks = {}
+        # node_id -> halaman laporan penuh yang sudah diterima (belum lengkap)
+        self.pending = {}
+
+    # Laporan penuh baru menggantikan daftar lama setelah halaman terakhir tiba
+    def update(self, node_id, report):
+        with self.lock:
+            if report.full_report:
+                names = self.pending.setdefault(node_id, set())
+                names.update(report.added_blocks)
+                if report.full_report_done:
+                    self.blocks[node_id] = self.pending.pop(node_id)
+                return
+            names = self.blocks.setdefault(node_id, set())
+            names.update(report.added_blocks)
+            names.difference_update(report.removed_blocks)
+
+    # Stream baru: halaman laporan penuh dari stream lama yang terputus dibuang
+    def restart(self, node_id):
+        with self.lock:
+            self.pending.pop(node_id, None)
+
+    def forget(self, node_id):
+        with self.lock:
+            self.blocks.pop(node_id, None)
+            self.pending.pop(node_id, None)
+
+    def counts(self):
+        with self.lock:
+            return {node_id: len(names) for node_id, names in self.blocks.items()}
+
+    # expected: {nama object: block_id} yang menurut metadata ada di node saat
+    # laporan penuh diterima. Setelah grace, dari thread terpisah: yang masih
+    # tidak dilaporkan dikembalikan lewat on_missing(node_id, [block_id]), dan
+    # object lain dari laporan penuh yang masih dilaporkan lewat
+    # on_unexpected(node_id, [nama]) (pemanggil mencocokkan ke metadata terkini).
+    def verify_later(self, node_id, expected, on_missing, on_unexpected):
+        with self.lock:
+            reported = [name for name in self.blocks.get(node_id, ()) if name not in expected]
+
+        def check():
+            with self.lock:
+                names = self.blocks.get(node_id)
+                if names is None:
+                    return
+                missing = [block_id for name, block_id in expected.items() if name not in names]
+                unexpected = [name for name in reported if name in names]
+            if missing:
+                on_missing(node_id, missing)
+            if unexpected:
+                on_unexpected(node_id, unexpected)
+        timer = threading.Timer(self.grace, check)
+        timer.daemon = True
+        timer.start()
@@ -1,69 +1,560 @@
 import grpc
 from concurrent import futures
+import os
+import string
+import threading
 import time
+from collections import OrderedDict
 import protos.dfs_pb2 as pb2
 import protos.dfs_pb2_grpc as pb2_grpc
+import pool
+from compression import negotiate
+from erasure import fragment_name, fragment_size
+from heartbeat import BlockReports, CommandHub
+from metadata import MetadataStore
+from metrics import MASTER_METRICS_PORT, EventLog, Registry, RpcMetrics, metrics_port, start_metrics
+from placement import NodeLoad, make_policy
+from rebalancer import Rebalancer
+from registry import NodeRegistry
+from replication import ReplicationScheduler
 
-# Batas waktu toleransi node dianggap mati (detik)
-HEARTBEAT_TIMEOUT = 10 
+# Batas waktu toleransi node dianggap mati (detik). Node yang stream
+# heartbeat-nya putus dianggap mati setelah STREAM_GRACE tanpa menunggu
+# batas ini; deteksi di bawah 1 detik: mis. HEARTBEAT_TIMEOUT=0.6 dengan
+# HEARTBEAT_INTERVAL=0.2 di DataNode
+HEARTBEAT_TIMEOUT = float(os.getenv("HEARTBEAT_TIMEOUT", "3"))
+# Stream heartbeat yang putus diberi waktu ini (detik) untuk tersambung lagi
+# sebelum node dianggap mati; proses DataNode yang mati tidak akan tersambung
+STREAM_GRACE = float(os.getenv("STREAM_GRACE", "0.5"))
+
+# Replica yang tercatat di metadata tetapi tidak muncul di laporan blok node
+# selama ini (detik) dianggap hilang dan disalin ulang. Sebaliknya object yang
+# dilaporkan node tetapi tidak tercatat untuk node itu dihapus setelah jeda ini.
+BLOCK_REPORT_GRACE = float(os.getenv("BLOCK_REPORT_GRACE", "30"))
+# Object upload yang direncanakan tetapi belum di-commit tidak dianggap yatim
+# selama ini (detik)
+UPLOAD_GRACE = float(os.getenv("UPLOAD_GRACE", "3600"))
+# Jumlah nama object per perintah delete yatim (batas ukuran pesan gRPC)
+ORPHAN_DELETE_BATCH = 10000
+
+# Alamat bind server gRPC Master
+MASTER_HOST = os.getenv("MASTER_HOST", "[::]")
+MASTER_PORT = int(os.getenv("MASTER_PORT", "50051"))
+# Port HTTP /metrics (0 = nonaktif)
+METRICS_PORT = metrics_port(MASTER_METRICS_PORT)
+
+# Ukuran maksimal satu blok file (64 MB)
+BLOCK_SIZE = 64 * 1024 * 1024
+
+# Jumlah salinan tiap blok (Primary + Replica)
+REPLICATION_FACTOR = int(os.getenv("REPLICATION_FACTOR", "2"))
+
+# round-robin | least-loaded | power-of-two | free-space
+PLACEMENT_POLICY = os.getenv("PLACEMENT_POLICY", "least-loaded")
+
+# Jumlah thread gRPC Master
+MASTER_WORKERS = int(os.getenv("MASTER_WORKERS", "10"))
+# Tiap stream heartbeat memegang satu thread gRPC selama node hidup: thread
+# pool Master = MASTER_WORKERS + MAX_DATANODES (thread dibuat sesuai kebutuhan)
+MAX_DATANODES = int(os.getenv("MAX_DATANODES", "256"))
+
+# Re-replikasi: jumlah blok yang disalin bersamaan & laju per salinan (byte/detik)
+REPLICATION_STREAMS = int(os.getenv("REPLICATION_STREAMS", "2"))
+REPLICATION_RATE = int(os.getenv("REPLICATION_RATE", str(50 * 1024 * 1024)))
+
+# Rebalancer: jeda cek (detik, 0 = nonaktif), simpangan utilisasi relatif
+# terhadap rata-rata cluster yang masih dianggap seimbang, jumlah pindah
+# paralel & laju per salinan (byte/detik)
+REBALANCE_INTERVAL = float(os.getenv("REBALANCE_INTERVAL", "60"))
+REBALANCE_THRESHOLD = float(os.getenv("REBALANCE_THRESHOLD", "0.1"))
+REBALANCE_STREAMS = int(os.getenv("REBALANCE_STREAMS", "2"))
+REBALANCE_RATE = int(os.getenv("REBALANCE_RATE", str(20 * 1024 * 1024)))
 
 class MasterService(pb2_grpc.DFSServiceServicer):
-    def __init__(self):
-        self.alive_nodes = {} 
-        self.rr_index = 0
+    # Parameter kosong = konstanta modul (cluster lokal memakai direktori
+    # metadata sementara dan faktor replikasi per skenario benchmark)
+    def __init__(self, metadata_dir=None, replication_factor=None):
+        self.replication_factor = replication_factor or REPLICATION_FACTOR
+        # Node hidup + beban terakhirnya (dari heartbeat), thread-safe
+        self.nodes = NodeRegistry(HEARTBEAT_TIMEOUT, on_dead=self.on_node_dead,
+                                  on_alive=self.on_node_alive)
+        # Penempatan diserialkan agar request paralel tidak mendapat
+        # pasangan target yang sama dari state policy yang belum ter-update
+        self.placement_lock = threading.Lock()
+        # Nama object upload yang belum di-commit -> waktu rencana (urut waktu),
+        # dijaga placement_lock
+        self.planned_objects = OrderedDict()
+        self.policy = make_policy(PLACEMENT_POLICY)
+        print(f"[Master] Placement policy: {self.policy.name}")
+        # Namespace persisten (WAL + snapshot): filename -> peta blok
+        self.meta = MetadataStore(metadata_dir) if metadata_dir else MetadataStore()
+        print(f"[Master] Metadata dimuat: {len(self.meta.files)} file")
+        # Perintah ke DataNode lewat stream heartbeat & laporan blok per node
+        self.commands = CommandHub()
+        self.reports = BlockReports(BLOCK_REPORT_GRACE)
+        # Memulihkan blok yang replicanya berkurang (node mati / replica rusak)
+        self.replicator = ReplicationScheduler(self.meta, self.nodes, self.place_replicas,
+                                               self.replication_factor, REPLICATION_STREAMS,
+                                               REPLICATION_RATE, self.commands)
+        self.replicator.start()
+        self.nodes.start()
+        self.log = EventLog("Master")
+        self.metrics = Registry()
+        self.rpc_metrics = RpcMetrics(self.metrics)
+        self.heartbeat_gap = self.metrics.histogram(
+            "dfs_heartbeat_gap_seconds", "Jeda antar heartbeat satu node yang diterima Master",
+            buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 30))
+        self.metrics.gauge("dfs_heartbeat_age_seconds", "Detik sejak heartbeat terakhir tiap node",
+                           ("node",), collect=self.heartbeat_ages)
+        self.metrics.gauge("dfs_active_nodes", "Jumlah DataNode hidup",
+                           collect=lambda: {(): len(self.get_active_nodes())})
+        self.metrics.gauge("dfs_files", "Jumlah file di namespace",
+                           collect=lambda: {(): len(self.meta.files)})
+        self.planned_blocks = self.metrics.counter(
+            "dfs_planned_blocks_total", "Blok yang ditempatkan Master", ("kind",))
+        self.sent_commands = self.metrics.counter(
+            "dfs_node_commands_total", "Perintah yang dikirim lewat stream heartbeat", ("action",))
+        self.metrics.gauge("dfs_node_objects", "Jumlah object tiap node menurut laporan blok",
+                           ("node",), collect=lambda: {(n,): c for n, c in self.reports.counts().items()})
+        # Memindahkan blok ke node yang lebih kosong (mis. DataNode baru)
+        self.rebalancer = Rebalancer(self.meta, self.nodes, self.commands, REBALANCE_INTERVAL,
+                                     REBALANCE_THRESHOLD, REBALANCE_STREAMS, REBALANCE_RATE,
+                                     self.metrics)
+        self.rebalancer.start()
+
+    def stop(self):
+        self.rebalancer.stop()
+        self.commands.close()
+        self.nodes.stop()
+        self.meta.close()
 
+    # Heartbeat unary (DataNode versi lama): hanya status beban
     def Heartbeat(self, request, context):
-        node_id = request.node_id
-        self.alive_nodes[node_id] = time.time()
+        self.record_status(request)
         return pb2.Reply(success=True, message="Ack")
 
+    def record_status(self, status):
+        # Angka heartbeat sudah mencakup blok yang ditugaskan sebelumnya
+        load = NodeLoad(status.capacity, status.used_bytes, status.inflight_uploads, status.codecs)
+        previous = self.nodes.heartbeat(status.node_id, load)
+        if previous is not None:
+            self.heartbeat_gap.observe(time.time() - previous)
+
+    # Laporan dibaca di thread terpisah, sementara thread RPC ini mengirim
+    # perintah dari antrean node ke DataNode
+    def HeartbeatStream(self, request_iterator, context):
+        first = next(request_iterator, None)
+        if first is None or not first.HasField("status"):
+            return
+        node_id = first.status.node_id
+        outbox = self.commands.connect(node_id)
+        self.reports.restart(node_id)
+        self.handle_report(node_id, first)
+
+        def read():
+            try:
+                for report in request_iterator:
+                    self.handle_report(node_id, report)
+            except Exception:
+                pass
+            finally:
+                # Stream putus (proses DataNode mati/berhenti): tidak perlu
+                # menunggu HEARTBEAT_TIMEOUT
+                if self.commands.disconnect(node_id, outbox):
+                    self.nodes.expire(node_id, STREAM_GRACE)
+        threading.Thread(target=read, daemon=True).start()
+
+        while True:
+            command = outbox.get()
+            if command is None:
+                return
+            self.sent_commands.inc(1, (command.action,))
+            yield command
+
+    def handle_report(self, node_id, report):
+        if report.HasField("status"):
+            self.record_status(report.status)
+        if report.full_report or report.added_blocks or report.removed_blocks:
+            self.reports.update(node_id, report)
+        if report.full_report_done:
+            self.reports.verify_later(node_id, self.expected_objects(node_id), self.on_missing_replicas,
+                                      self.on_unexpected_objects)
+        for result in report.results:
+            self.commands.complete(result)
+
+    # Object replica (bukan fragmen erasure coded, yang dipulihkan saat
+    # dibaca) yang menurut metadata ada di node: nama -> block_id
+    def expected_objects(self, node_id):
+        return {b.block_id: b.block_id for b in list(self.meta.blocks.values())
+                if not b.ec and node_id in b.nodes}
+
+    def on_missing_replicas(self, node_id, block_ids):
+        if not self.nodes.is_alive(node_id):
+            return
+        dropped = sum(1 for block_id in block_ids if self.drop_replica(block_id, node_id, "hilang"))
+        if dropped:
+            self.log.warn("replicas_missing", node=node_id, blocks=dropped)
+
+    # Seluruh object (replica & fragmen) yang menurut metadata ada di node
+    def node_objects(self, node_id):
+        names = set()
+        for block in list(self.meta.blocks.values()):
+            for i, node in enumerate(block.nodes):
+                if node == node_id:
+                    names.add(fragment_name(block.block_id, i) if block.ec else block.block_id)
+        return names
+
+    # Object yang masih dilaporkan node setelah grace tetapi tidak tercatat
+    # untuk node itu (sisa upload gagal, hapus yang terlewat saat node mati,
+    # versi lama) dihapus, kecuali milik upload yang belum di-commit
+    def on_unexpected_objects(self, node_id, names):
+        if not self.nodes.is_alive(node_id):
+            return
+        known = self.node_objects(node_id)
+        with self.placement_lock:
+            self.expire_planned()
+            orphans = [n for n in names if n not in known and n not in self.planned_objects]
+        sent = 0
+        for start in range(0, len(orphans), ORPHAN_DELETE_BATCH):
+            batch = orphans[start:start + ORPHAN_DELETE_BATCH]
+            if self.commands.send(node_id, pb2.NodeCommand(action="delete", names=batch)) is None:
+                break
+            sent += len(batch)
+        if sent:
+            self.log.warn("orphans_deleted", node=node_id, objects=sent)
+
+    # Dipanggil dengan placement_lock dipegang
+    def expire_planned(self):
+        limit = time.time() - UPLOAD_GRACE
+        while self.planned_objects:
+            name, planned = next(iter(self.planned_objects.items()))
+            if planned > limit:
+                break
+            del self.planned_objects[name]
+
+    def heartbeat_ages(self):
+        now = time.time()
+        return {(node_id,): now - seen for node_id, seen in self.nodes.last_seen().items()}
+
+    def on_node_alive(self, node_id):
+        print(f"[Master] {node_id} AKTIF")
+        self.replicator.retry_waiting()
+
+    def on_node_dead(self, node_id):
+        print(f"[Master] ALERT: {node_id} dianggap MATI/DOWN!")
+        # Stream heartbeat yang masih tersisa ditutup; perintah yang belum
+        # dijawab dianggap gagal. Node yang hidup lagi membuka stream baru.
+        self.commands.disconnect(node_id)
+        self.reports.forget(node_id)
+        # Scan blok di thread lain agar thread kedaluwarsa registry tidak tertahan
+        threading.Thread(target=self.replicator.enqueue_node, args=(node_id,), daemon=True).start()
+
+    # Daftar node hidup (tuple terurut), tanpa scan ulang
+    def get_active_nodes(self):
+        return self.nodes.live_nodes()
+
     def RequestUpload(self, request, context):
         # 1. Filter Node yang Hidup
-        current_time = time.time()
-        active_nodes = []
-        
-        for node_id, last_seen in list(self.alive_nodes.items()):
-            if current_time - last_seen < HEARTBEAT_TIMEOUT:
-                active_nodes.append(node_id)
-            else:
-                print(f"[Master] ALERT: {node_id} dianggap MATI/DOWN!")
-        
-        active_nodes.sort() 
-
+        active_nodes = self.get_active_nodes()
         num_active = len(active_nodes)
 
         if num_active == 0:
             print("[Master] GAGAL: Tidak ada node aktif sama sekali!")
             return pb2.UploadResponse(filename=request.filename, target_datanodes=[])
 
-        targets = []
-        
-        if num_active >= 2:
-            # Skenario Normal (Replikasi)
-            primary = active_nodes[self.rr_index % num_active]
-            replica = active_nodes[(self.rr_index + 1) % num_active]
-            targets = [primary, replica]
-            print(f"[Master] Replikasi -> Primary: {primary}, Replica: {replica}")
-        else:
-            # Skenario Sekuensial (Single Node) - HANYA 1 Node Hidup
-            primary = active_nodes[0]
-            targets = [primary]
-            print(f"[Master] Single Node (No Replikasi) -> Target: {primary}")
-
-        # Update index Round Robin
-        self.rr_index = (self.rr_index + 1) % num_active
+        with self.placement_lock:
+            response = self.plan_upload(request, active_nodes)
+
+        self.record_plan(request, response)
+        return response
+
+    # Banyak file dalam satu round-trip: node hidup dan lock cukup diambil sekali
+    def RequestUploadBatch(self, request, context):
+        active_nodes = self.get_active_nodes()
+        if not active_nodes:
+            print("[Master] GAGAL: Tidak ada node aktif sama sekali!")
+            return pb2.UploadBatchResponse(
+                files=[pb2.UploadResponse(filename=r.filename) for r in request.files])
+
+        with self.placement_lock:
+            files = [self.plan_upload(r, active_nodes) for r in request.files]
+        for r, response in zip(request.files, files):
+            self.record_plan(r, response)
+        self.log.info("batch_planned", files=len(files), nodes=len(active_nodes))
+        return pb2.UploadBatchResponse(files=files)
+
+    def record_plan(self, request, response):
+        if not response.blocks:
+            return
+        dedup = sum(1 for b in response.blocks if b.exists)
+        if dedup:
+            self.planned_blocks.inc(dedup, ("dedup",))
+        if dedup < len(response.blocks):
+            self.planned_blocks.inc(len(response.blocks) - dedup, ("new",))
+        scheme = f"rs{request.ec_data}+{request.ec_parity}" if request.ec_data else "replica"
+        self.log.info("upload_planned", file=request.filename, blocks=len(response.blocks),
+                      dedup=dedup, scheme=scheme, nodes=",".join(response.target_datanodes))
+
+    # Dipanggil dengan placement_lock dipegang.
+    # Pecah file menjadi blok, tiap blok dapat pasangan node sendiri
+    # sehingga file besar memakai bandwidth banyak node sekaligus.
+    # Jika client mengirim hash blok, block_id = hash isi: blok yang isinya
+    # sudah tersimpan (dan masih punya replica hidup) ditandai exists sehingga
+    # upload-nya cukup berupa metadata.
+    # Dengan erasure coding (ec_data/ec_parity), tiap blok mendapat k+m node
+    # berbeda untuk fragmennya; jika node hidup tidak cukup, upload ditolak
+    # (tidak diturunkan diam-diam ke redundansi yang lebih rendah).
+    def plan_upload(self, request, active_nodes):
+        self.expire_planned()
+        ec = self.ec_scheme(request)
+        if ec is False:
+            return pb2.UploadResponse(filename=request.filename)
+        num_blocks = max(1, -(-request.filesize // BLOCK_SIZE))
+        hashes = self.block_hashes(request, num_blocks)
+        blocks = []
+        planned = {}
+        for i in range(num_blocks):
+            offset = i * BLOCK_SIZE
+            length = min(BLOCK_SIZE, request.filesize - offset)
+            if hashes is None:
+                block_id = f"{request.filename}.blk{i}"
+            else:
+                block_id = f"sha256-{hashes[i]}"
+                existing = self.meta.get_block(block_id)
+                live = self.readable_nodes(existing) if existing else []
+                scheme = existing.ec if live else None
+                # Isi yang sama muncul dua kali di file ini: cukup dikirim sekali
+                if not live and block_id in planned:
+                    live, scheme = planned[block_id]
+                if live:
+                    blocks.append(pb2.BlockInfo(block_id=block_id, offset=offset, length=length,
+                                                target_datanodes=live, exists=True,
+                                                ec_data=scheme[0] if scheme else 0,
+                                                ec_parity=scheme[1] if scheme else 0))
+                    continue
+            if ec:
+                targets = self.choose_targets(active_nodes, fragment_size(length, ec[0]), sum(ec))
+                if len(targets) < sum(ec):
+                    print(f"[Master] GAGAL: RS({ec[0]},{ec[1]}) butuh {sum(ec)} node berbeda, "
+                          f"tersedia {len(targets)}")
+                    return pb2.UploadResponse(filename=request.filename)
+            else:
+                targets = self.choose_targets(active_nodes, length)
+            planned[block_id] = (targets, ec)
+            for i in range(len(targets)):
+                name = fragment_name(block_id, i) if ec else block_id
+                self.planned_objects[name] = time.time()
+                self.planned_objects.move_to_end(name)
+            blocks.append(pb2.BlockInfo(
+                block_id=block_id,
+                offset=offset,
+                length=length,
+                target_datanodes=targets,
+                codec=self.choose_codec(request.codecs, targets),
+                ec_data=ec[0] if ec else 0,
+                ec_parity=ec[1] if ec else 0
+            ))
 
         return pb2.UploadResponse(
             filename=request.filename,
-            target_datanodes=targets
+            target_datanodes=blocks[0].target_datanodes,
+            blocks=blocks,
+            filesize=request.filesize
         )
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    pb2_grpc.add_DFSServiceServicer_to_server(MasterService(), server)
-    server.add_insecure_port('[::]:50051')
-    print("[Master] Server berjalan... Menunggu Heartbeat dari Workers...")
+    # Hasil: (k, m), None (replikasi) atau False (skema tidak bisa dipenuhi)
+    def ec_scheme(self, request):
+        if not request.ec_data and not request.ec_parity:
+            return None
+        k, m = request.ec_data, request.ec_parity
+        if k < 1 or m < 1 or k + m > 256:
+            print(f"[Master] GAGAL: skema RS({k},{m}) tidak valid")
+            return False
+        return (k, m)
+
+    # Lokasi blok yang masih bisa dibaca: replica yang hidup, atau daftar
+    # fragmen lengkap jika minimal k fragmen erasure coded masih hidup
+    def readable_nodes(self, block):
+        live = [n for n in block.nodes if self.nodes.is_alive(n)]
+        if block.ec:
+            return list(block.nodes) if len(live) >= block.ec[0] else []
+        return live
+
+    # Codec pertama yang ditawarkan client dan dimiliki semua node tujuan
+    def choose_codec(self, offered, targets):
+        if not offered:
+            return ""
+        return negotiate(offered, [(self.nodes.get_load(n) or NodeLoad()).codecs for n in targets])
+
+    # Hash dipakai hanya jika dihitung dengan ukuran blok Master dan berupa
+    # hex SHA-256 (block_id menjadi nama file di DataNode)
+    def block_hashes(self, request, num_blocks):
+        hashes = list(request.block_hashes)
+        if request.block_size != BLOCK_SIZE or len(hashes) != num_blocks:
+            return None
+        if not all(len(h) == 64 and all(c in string.hexdigits for c in h) for h in hashes):
+            return None
+        return [h.lower() for h in hashes]
+
+    # Dipanggil client setelah semua blok tersimpan di semua target
+    def CommitUpload(self, request, context):
+        if not self.commit_files([request]):
+            return pb2.Reply(success=False, message="Blok dedup sudah dihapus, ulangi upload")
+        return pb2.Reply(success=True, message="Metadata disimpan")
+
+    # Semua file batch ditulis ke WAL dengan satu fsync
+    def CommitUploadBatch(self, request, context):
+        if not self.commit_files(request.files):
+            return pb2.Reply(success=False, message="Blok dedup sudah dihapus, ulangi upload")
+        return pb2.Reply(success=True, message=f"Metadata {len(request.files)} file disimpan")
+
+    # Blok dedup (exists) harus masih ada saat commit: bisa saja file
+    # terakhir yang memakainya dihapus di antara RequestUpload dan commit
+    def commit_files(self, files):
+        uploaded = {b.block_id for f in files for b in f.blocks if not b.exists}
+        shared = {b.block_id for f in files for b in f.blocks if b.exists} - uploaded
+        freed = self.meta.put_files([self.file_entry(f) for f in files], shared)
+        if freed is None:
+            return False
+        with self.placement_lock:
+            for f in files:
+                for b in f.blocks:
+                    if not b.exists:
+                        for i in range(len(b.target_datanodes)):
+                            self.planned_objects.pop(
+                                fragment_name(b.block_id, i) if b.ec_data else b.block_id, None)
+        self.delete_replicas(freed)
+        return True
+
+    def DeleteFile(self, request, context):
+        freed = self.meta.delete_file(request.filename)
+        if freed is None:
+            return pb2.Reply(success=False, message=f"{request.filename} tidak ditemukan")
+        self.delete_replicas(freed)
+        self.log.info("file_deleted", file=request.filename, freed_blocks=len(freed))
+        return pb2.Reply(success=True, message=f"{len(freed)} blok dilepas")
+
+    # Replica blok yang tidak lagi dipakai file mana pun dihapus di DataNode:
+    # satu perintah delete per node lewat stream heartbeat, atau DeleteChunk
+    # per object (di thread lain agar RPC tidak menunggu) untuk node tanpa stream
+    def delete_replicas(self, blocks):
+        if not blocks:
+            return
+        names = {}
+        for block in blocks:
+            for i, node in enumerate(block.nodes):
+                if node:
+                    names.setdefault(node, []).append(
+                        fragment_name(block.block_id, i) if block.ec else block.block_id)
+        direct = {}
+        for node, node_names in names.items():
+            future = self.commands.send(node, pb2.NodeCommand(action="delete", names=node_names))
+            if future is None:
+                direct[node] = node_names
+        if not direct:
+            return
+
+        def run():
+            for node, node_names in direct.items():
+                address = pool.node_address(node)
+                for name in node_names:
+                    try:
+                        pool.get_stub(address).DeleteChunk(pb2.ChunkData(filename=name))
+                    except Exception as e:
+                        pool.report_error(address, e)
+                        print(f"[Master] Gagal menghapus {name} di {node}: {e}")
+        threading.Thread(target=run, daemon=True).start()
+
+    def file_entry(self, response):
+        blocks = [(b.block_id, b.offset, b.length, list(b.target_datanodes))
+                  + (((b.ec_data, b.ec_parity),) if b.ec_data else ())
+                  for b in response.blocks]
+        return (response.filename, response.filesize, blocks)
+
+    def GetFileLocations(self, request, context):
+        meta = self.meta.get_file(request.filename)
+        if meta is None:
+            return pb2.UploadResponse(filename=request.filename)
+
+        # Hanya kembalikan replica yang masih hidup, yang paling senggang dulu;
+        # jika semua replica sebuah blok dianggap mati, daftar lengkap tetap
+        # dikirim sebagai upaya terakhir
+        blocks = []
+        for block in meta.blocks:
+            if block.ec:
+                # Fragmen posisional: node mati dikosongkan agar client langsung
+                # membaca secara degraded tanpa menunggu timeout
+                blocks.append(pb2.BlockInfo(
+                    block_id=block.block_id, offset=block.offset, length=block.length,
+                    target_datanodes=[n if self.nodes.is_alive(n) else "" for n in block.nodes],
+                    ec_data=block.ec[0], ec_parity=block.ec[1]))
+                continue
+            live = sorted((n for n in block.nodes if self.nodes.is_alive(n)),
+                          key=lambda n: (self.nodes.get_load(n) or NodeLoad()).load())
+            blocks.append(pb2.BlockInfo(
+                block_id=block.block_id,
+                offset=block.offset,
+                length=block.length,
+                target_datanodes=live or block.nodes
+            ))
+        return pb2.UploadResponse(filename=meta.filename, blocks=blocks, filesize=meta.size)
+
+    # Replica yang checksum-nya tidak cocok dicoret dari peta blok agar tidak
+    # lagi diberikan ke client; salinan terakhir tetap dicatat
+    def ReportCorruptBlocks(self, request, context):
+        dropped = sum(1 for block_id in request.block_ids
+                      if self.drop_replica(block_id, request.node_id, "rusak"))
+        return pb2.Reply(success=True, message=f"{dropped} replica dicoret")
+
+    # Replica rusak/hilang dicoret dan blok masuk antrean re-replikasi
+    def drop_replica(self, block_id, node_id, reason):
+        block = self.meta.get_block(block_id)
+        if block is None or node_id not in block.nodes:
+            return False
+        remaining = [n for n in block.nodes if n != node_id]
+        if not remaining:
+            print(f"[Master] ALERT: satu-satunya replica {block_id} di {node_id} {reason.upper()}!")
+            return False
+        self.meta.update_block_nodes(block_id, remaining)
+        self.replicator.enqueue(block_id)
+        print(f"[Master] Replica {block_id} di {node_id} {reason}, dicoret")
+        return True
+
+    # Tujuan salinan baru untuk re-replikasi: node hidup yang belum memegang blok
+    def place_replicas(self, block, count, exclude):
+        candidates = [n for n in self.get_active_nodes() if n not in exclude]
+        if not candidates:
+            return []
+        with self.placement_lock:
+            return self.choose_targets(candidates, block.length, count)
+
+    # Dipanggil dengan placement_lock dipegang
+    def choose_targets(self, active_nodes, size, count=None):
+        count = count or self.replication_factor
+        loads = {n: self.nodes.get_load(n) or NodeLoad() for n in active_nodes}
+        # Lewati node yang ruang kosongnya tidak cukup (kecuali semua penuh)
+        candidates = [n for n in active_nodes if loads[n].fits(size)] or list(active_nodes)
+        # 2 node = Primary & Replica; jika hanya 1 node hidup -> tanpa replikasi
+        targets = self.policy.choose(candidates, loads, count, size)
+        for node_id in targets:
+            loads[node_id].pending_blocks += 1
+            loads[node_id].pending_bytes += size
+        return targets
+
+# Server gRPC Master. Hasil: (server, port efektif; port 0 = acak)
+def start_master(service, address, workers=MASTER_WORKERS):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers + MAX_DATANODES),
+                         interceptors=[service.rpc_metrics])
+    pb2_grpc.add_DFSServiceServicer_to_server(service, server)
+    port = server.add_insecure_port(address)
     server.start()
+    return server, port
+
+def serve():
+    service = MasterService()
+    server, _ = start_master(service, f"{MASTER_HOST}:{MASTER_PORT}")
+    print(f"[Master] Server berjalan di port {MASTER_PORT}... Menunggu Heartbeat dari Workers...")
+    start_metrics(service.metrics, METRICS_PORT, "Master")
     server.wait_for_termination()
 
 if __name__ == '__main__':
@@ -0,0 +1,333 @@
+import gc
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+
+# Namespace Master: filename -> blok -> lokasi replica, disimpan di memori
+# (dict, lookup O(1)) dan dibuat persisten dengan:
+# - WAL (append-only, 1 baris JSON per operasi) yang ditulis sebelum ack
+# - snapshot berkala hasil pemadatan WAL (pickle tuple, jauh lebih cepat
+#   dimuat daripada parsing JSON per baris), agar restart tidak replay dari nol
+# Saat start: muat snapshot terbaru lalu replay WAL setelahnya.
+# Blok boleh dipakai bersama oleh beberapa file (deduplikasi konten, block_id
+# = hash isi); jumlah referensinya dihitung agar blok baru dilepas setelah
+# file terakhir yang memakainya dihapus/ditimpa.
+# Blok erasure coded menyimpan skema (k, m) dan nodes bersifat posisional:
+# nodes[i] memegang fragmen i.
+
+METADATA_DIR = os.getenv("METADATA_DIR", "metadata")
+# Jumlah operasi WAL sebelum dipadatkan menjadi snapshot
+SNAPSHOT_EVERY = 50000
+# fsync WAL setiap operasi (aman dari crash, sedikit lebih lambat)
+WAL_FSYNC = True
+
+class BlockMeta:
+    __slots__ = ("block_id", "offset", "length", "nodes", "ec")
+
+    def __init__(self, block_id, offset, length, nodes, ec=None):
+        self.block_id = block_id
+        self.offset = offset
+        self.length = length
+        self.nodes = list(nodes)
+        self.ec = tuple(ec) if ec else None
+
+    def encode(self):
+        if self.ec:
+            return (self.block_id, self.offset, self.length, self.nodes, self.ec)
+        return (self.block_id, self.offset, self.length, self.nodes)
+
+# Salinan blok lama yang tidak dipakai lagi oleh blok baru ber-id sama
+# (None = blok sudah tidak ada). Nama object di node sama jika skemanya sama
+# (replica: block_id, EC: fragmen per posisi), dan object itu sudah ditimpa
+# upload baru; lokasi lain dibuang. Hasil: BlockMeta dengan node yang masih
+# dipakai dikosongkan, None jika tidak ada yang perlu dihapus.
+def stale_copies(old, new):
+    if new is None:
+        return old
+    if bool(old.ec) != bool(new.ec):
+        nodes = list(old.nodes)
+    elif old.ec:
+        nodes = [n if i >= len(new.nodes) or new.nodes[i] != n else ""
+                 for i, n in enumerate(old.nodes)]
+    else:
+        nodes = [n for n in old.nodes if n not in new.nodes]
+    if not any(nodes):
+        return None
+    return BlockMeta(old.block_id, old.offset, old.length, nodes, old.ec)
+
+class FileMeta:
+    __slots__ = ("filename", "size", "blocks")
+
+    def __init__(self, filename, size, blocks):
+        self.filename = filename
+        self.size = size
+        self.blocks = blocks
+
+def encode_file(meta):
+    return (meta.filename, meta.size,
+            [b.encode() for b in meta.blocks])
+
+class MetadataStore:
+    def __init__(self, path=METADATA_DIR, snapshot_every=SNAPSHOT_EVERY, fsync=WAL_FSYNC):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.files = {}
+        # Indeks sekunder: block_id -> BlockMeta (untuk laporan per blok).
+        # Untuk blok hasil hash, ini sekaligus indeks hash -> blok.
+        self.blocks = {}
+        # block_id -> jumlah file yang memakai blok
+        self.refs = {}
+        self.seq = 0
+        self.ops_since_snapshot = 0
+        self.checkpointing = False
+        os.makedirs(self.path, exist_ok=True)
+        self.load()
+        self.wal = open(self.wal_path(self.seq), "a")
+
+    def wal_path(self, seq):
+        return os.path.join(self.path, f"wal.{seq}.log")
+
+    def snapshot_path(self, seq):
+        return os.path.join(self.path, f"snapshot.{seq}.pkl")
+
+    def list_seq(self, prefix, suffix):
+        result = []
+        for name in os.listdir(self.path):
+            if name.startswith(prefix) and name.endswith(suffix):
+                middle = name[len(prefix):-len(suffix)]
+                if middle.isdigit():
+                    result.append(int(middle))
+        return sorted(result)
+
+    # --- Startup: snapshot terbaru + replay WAL ---
+    # GC siklik dimatikan sementara: jutaan objek baru membuat GC berjalan
+    # berulang kali dan bisa melipatgandakan waktu startup
+    def load(self):
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.load_files()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def load_files(self):
+        snapshots = self.list_seq("snapshot.", ".pkl")
+        if snapshots:
+            self.seq = snapshots[-1]
+            self.load_snapshot(self.snapshot_path(self.seq))
+        for seq in self.list_seq("wal.", ".log"):
+            if seq >= self.seq:
+                self.ops_since_snapshot += self.replay(self.wal_path(seq))
+                self.seq = seq
+
+    def load_snapshot(self, path):
+        with open(path, "rb") as f:
+            entries = pickle.load(f)
+        files = self.files
+        for filename, size, blocks in entries:
+            files[filename] = FileMeta(filename, size, [self.add_block(b) for b in blocks])
+
+    def replay(self, path):
+        count = 0
+        good_size = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.apply(record)
+                count += 1
+                good_size += len(line)
+        # Baris terakhir terpotong karena crash saat menulis: buang agar
+        # operasi baru tidak tertulis setelah baris rusak
+        if good_size < os.path.getsize(path):
+            os.truncate(path, good_size)
+        return count
+
+    # Hasil: blok yang tidak lagi dipakai file mana pun (replica-nya boleh
+    # dihapus). Blok yang dipakai lagi oleh versi baru hanya membawa lokasi
+    # lama yang tidak dipakai versi baru (lokasi lain dikosongkan).
+    def apply(self, record):
+        op = record["op"]
+        freed = []
+        if op == "put":
+            freed = self.drop(record["f"])
+            # Lokasi lama blok yang dipakai lagi (upload ulang tanpa dedup
+            # memakai block_id yang sama; blok EC bersama diganti lokasinya)
+            for block_id in dict.fromkeys(b[0] for b in record["b"]):
+                block = self.blocks.get(block_id)
+                if block is not None:
+                    freed.append(BlockMeta(block.block_id, block.offset, block.length,
+                                           block.nodes, block.ec))
+            blocks = [self.add_block(b) for b in record["b"]]
+            self.files[record["f"]] = FileMeta(record["f"], record["s"], blocks)
+            freed = [stale for stale in (stale_copies(b, self.blocks.get(b.block_id)) for b in freed)
+                     if stale is not None]
+        elif op == "del":
+            freed = self.drop(record["f"])
+        elif op == "nodes":
+            block = self.blocks.get(record["b"])
+            if block is not None:
+                block.nodes = list(record["n"])
+        return freed
+
+    # b: (block_id, offset, length, nodes[, ec]). Blok yang sudah ada dipakai
+    # bersama; lokasi barunya digabung
+    def add_block(self, b):
+        block = self.blocks.get(b[0])
+        if block is None:
+            block = BlockMeta(*b)
+            self.blocks[block.block_id] = block
+            self.refs[block.block_id] = 1
+            return block
+        self.refs[block.block_id] += 1
+        ec = tuple(b[4]) if len(b) > 4 and b[4] else None
+        if ec or block.ec:
+            # Lokasi fragmen posisional, tidak bisa digabung: upload terbaru yang berlaku
+            block.nodes = list(b[3])
+            block.ec = ec
+        else:
+            block.nodes.extend(n for n in b[3] if n not in block.nodes)
+        return block
+
+    def drop(self, filename):
+        old = self.files.pop(filename, None)
+        freed = []
+        if old is not None:
+            for block in old.blocks:
+                self.refs[block.block_id] -= 1
+                if self.refs[block.block_id] == 0:
+                    del self.refs[block.block_id]
+                    del self.blocks[block.block_id]
+                    freed.append(block)
+        return freed
+
+    def log(self, *records):
+        # Tulis ke WAL dulu (satu fsync untuk semua record), baru ubah state di memori
+        self.wal.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+        self.wal.flush()
+        if self.fsync:
+            os.fsync(self.wal.fileno())
+        freed = []
+        for record in records:
+            freed.extend(self.apply(record))
+        self.ops_since_snapshot += len(records)
+        if self.ops_since_snapshot >= self.snapshot_every and not self.checkpointing:
+            self.checkpointing = True
+            threading.Thread(target=self.checkpoint, daemon=True).start()
+        return freed
+
+    # --- Operasi namespace ---
+    # put_file/put_files/delete_file mengembalikan daftar BlockMeta yang
+    # dilepas (tidak dipakai file lain lagi)
+    def put_file(self, filename, size, blocks):
+        # blocks: list of (block_id, offset, length, nodes)
+        with self.lock:
+            return self.log({"op": "put", "f": filename, "s": size, "b": [list(b) for b in blocks]})
+
+    def put_files(self, entries, shared=()):
+        # entries: list of (filename, size, blocks)
+        # shared: block_id hasil deduplikasi yang harus masih ada; jika salah
+        # satunya sudah dilepas, tidak ada yang ditulis dan hasilnya None
+        with self.lock:
+            if any(block_id not in self.blocks for block_id in shared):
+                return None
+            return self.log(*({"op": "put", "f": f, "s": size, "b": [list(b) for b in blocks]}
+                              for f, size, blocks in entries))
+
+    def delete_file(self, filename):
+        with self.lock:
+            if filename not in self.files:
+                return None
+            return self.log({"op": "del", "f": filename})
+
+    # expected: lokasi yang harus masih berlaku (compare-and-set), agar
+    # perubahan lain yang masuk di antaranya tidak tertimpa
+    def update_block_nodes(self, block_id, nodes, expected=None):
+        with self.lock:
+            if block_id not in self.blocks:
+                return False
+            if expected is not None and self.blocks[block_id].nodes != list(expected):
+                return False
+            self.log({"op": "nodes", "b": block_id, "n": list(nodes)})
+            return True
+
+    def get_file(self, filename):
+        return self.files.get(filename)
+
+    def get_block(self, block_id):
+        return self.blocks.get(block_id)
+
+    # --- Compaction: WAL -> snapshot ---
+    # WAL diputar ke segmen baru di bawah lock, snapshot ditulis di luar lock
+    # dari salinan dict sehingga RPC tidak ikut tertahan. Operasi yang masuk
+    # setelah rotasi ada di WAL baru dan aman di-replay di atas snapshot.
+    def checkpoint(self):
+        try:
+            with self.lock:
+                new_seq = self.seq + 1
+                self.wal.close()
+                self.wal = open(self.wal_path(new_seq), "a")
+                self.seq = new_seq
+                self.ops_since_snapshot = 0
+                files = list(self.files.values())
+
+            tmp_path = self.snapshot_path(new_seq) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump([encode_file(meta) for meta in files], f, pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path(new_seq))
+
+            for seq in self.list_seq("wal.", ".log"):
+                if seq < new_seq:
+                    os.remove(self.wal_path(seq))
+            for seq in self.list_seq("snapshot.", ".pkl"):
+                if seq < new_seq:
+                    os.remove(self.snapshot_path(seq))
+            print(f"[Metadata] Snapshot #{new_seq} ditulis ({len(files)} file)")
+        finally:
+            self.checkpointing = False
+
+    def close(self):
+        with self.lock:
+            self.wal.close()
+
+# Benchmark biaya restart: python metadata.py [jumlah_file]
+def benchmark_startup(num_files):
+    path = tempfile.mkdtemp(prefix="dfs-meta-")
+    store = MetadataStore(path, snapshot_every=num_files * 10, fsync=False)
+    start = time.time()
+    for i in range(num_files):
+        store.put_file(f"file_{i}.bin", 512000,
+                       [(f"file_{i}.bin.blk0", 0, 512000, ["datanode-1", "datanode-2"])])
+    write_time = time.time() - start
+    store.close()
+
+    start = time.time()
+    store = MetadataStore(path, snapshot_every=num_files * 10, fsync=False)
+    replay_time = time.time() - start
+    store.checkpoint()
+    store.close()
+
+    start = time.time()
+    store = MetadataStore(path, snapshot_every=num_files * 10, fsync=False)
+    snapshot_time = time.time() - start
+    assert len(store.files) == num_files
+    store.close()
+
+    print(f"[Metadata] {num_files} file")
+    print(f"  Tulis WAL        : {write_time:.2f} s ({num_files / write_time:,.0f} op/s)")
+    print(f"  Start dari WAL   : {replay_time:.2f} s")
+    print(f"  Start dari snapshot: {snapshot_time:.2f} s")
+
+if __name__ == '__main__':
+    benchmark_startup(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,273 @@
+import bisect
+import itertools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import grpc
+
+# Metrik Master/DataNode dalam format teks Prometheus, dilayani lewat HTTP
+# (GET /metrics). Tiap service punya Registry sendiri sehingga beberapa node
+# dalam satu proses (cluster lokal) tidak tercampur.
+# Pencatatan di hot path cukup satu lock kecil per metrik; render hanya
+# terjadi saat di-scrape.
+# Log per request diganti EventLog: baris terstruktur (key=value) yang
+# di-sampling 1 dari N per jenis event, peringatan selalu dicetak.
+
+METRICS_HOST = os.getenv("METRICS_HOST", "")
+# Port HTTP metrik default per peran, agar Master & DataNode yang dijalankan
+# manual di host yang sama tidak berebut port (METRICS_PORT menimpa, 0 = nonaktif)
+MASTER_METRICS_PORT = 9100
+DATANODE_METRICS_PORT = 9101
+# Event rutin (per request) dicetak 1 dari N
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+
+# Batas bucket histogram latency (detik)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = "untyped"
+
+    # collect: fungsi tanpa argumen -> {tuple label: nilai}, dipanggil saat
+    # render (untuk nilai yang sudah dihitung di tempat lain)
+    def __init__(self, name, help, labels=(), collect=None):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        # tuple nilai label -> nilai seri
+        self.series = {}
+        self.collect = collect
+
+    def samples(self):
+        if self.collect is not None:
+            return list(self.collect().items())
+        with self.lock:
+            return [(key, value) for key, value in self.series.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.samples()):
+            lines.append(f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, labels=()):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, labels=()):
+        with self.lock:
+            self.series[labels] = value
+
+    def inc(self, amount=1, labels=()):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # [jumlah per bucket (non-kumulatif, + bucket +Inf), total nilai]
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self.series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = format_labels(self.label_names, key, [("le", format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=(), collect=None):
+        return self.add(Counter(name, help, labels, collect))
+
+    def gauge(self, name, help, labels=(), collect=None):
+        return self.add(Gauge(name, help, labels, collect))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Interceptor server gRPC: latency, jumlah error dan request in-flight per
+# RPC. Untuk RPC dengan response stream, durasi dihitung sampai stream habis.
+class RpcMetrics(grpc.ServerInterceptor):
+    def __init__(self, registry):
+        self.latency = registry.histogram("dfs_rpc_duration_seconds",
+                                          "Durasi RPC di sisi server", ("method",))
+        self.errors = registry.counter("dfs_rpc_errors_total",
+                                       "RPC yang berakhir dengan exception/abort", ("method",))
+        self.inflight = registry.gauge("dfs_rpc_inflight", "RPC yang sedang diproses", ("method",))
+
+    def begin(self, labels):
+        self.inflight.inc(1, labels)
+        return time.perf_counter()
+
+    def end(self, labels, start, failed):
+        self.inflight.inc(-1, labels)
+        self.latency.observe(time.perf_counter() - start, labels)
+        if failed:
+            self.errors.inc(1, labels)
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        labels = (handler_call_details.method.rsplit("/", 1)[-1],)
+        if handler.unary_unary:
+            return grpc.unary_unary_rpc_method_handler(
+                self.wrap_unary(handler.unary_unary, labels),
+                handler.request_deserializer, handler.response_serializer)
+        if handler.stream_unary:
+            return grpc.stream_unary_rpc_method_handler(
+                self.wrap_unary(handler.stream_unary, labels),
+                handler.request_deserializer, handler.response_serializer)
+        if handler.unary_stream:
+            return grpc.unary_stream_rpc_method_handler(
+                self.wrap_stream(handler.unary_stream, labels),
+                handler.request_deserializer, handler.response_serializer)
+        return grpc.stream_stream_rpc_method_handler(
+            self.wrap_stream(handler.stream_stream, labels),
+            handler.request_deserializer, handler.response_serializer)
+
+    def wrap_unary(self, behavior, labels):
+        def wrapper(request, context):
+            start = self.begin(labels)
+            failed = True
+            try:
+                response = behavior(request, context)
+                failed = False
+                return response
+            finally:
+                self.end(labels, start, failed)
+        return wrapper
+
+    def wrap_stream(self, behavior, labels):
+        def wrapper(request, context):
+            start = self.begin(labels)
+            failed = True
+            try:
+                yield from behavior(request, context)
+                failed = False
+            finally:
+                self.end(labels, start, failed)
+        return wrapper
+
+def metrics_port(default):
+    return int(os.getenv("METRICS_PORT", str(default)))
+
+# Server HTTP /metrics di thread daemon. Hasil: server (panggil shutdown()
+# untuk berhenti); port efektif di server.server_address[1] (port 0 = acak)
+def serve_metrics(registry, port, host=METRICS_HOST):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Untuk serve() Master/DataNode: port yang sudah terpakai cukup diberi
+# peringatan, node tetap berjalan tanpa endpoint metrik. Hasil: server atau None
+def start_metrics(registry, port, source):
+    if not port:
+        return None
+    try:
+        server = serve_metrics(registry, port)
+    except OSError as e:
+        print(f"[{source}] Metrics nonaktif, port {port} tidak bisa dipakai: {e}")
+        return None
+    print(f"[{source}] Metrics: http://localhost:{port}/metrics")
+    return server
+
+def format_field(value):
+    text = str(value)
+    if not text or any(c in text for c in " \"="):
+        return '"' + text.replace("\\", "\\\\").replace("\"", "\\\"") + '"'
+    return text
+
+class EventLog:
+    def __init__(self, source, sample_every=LOG_SAMPLE_EVERY):
+        self.source = source
+        self.sample_every = max(1, sample_every)
+        self.counters = {}
+
+    def emit(self, level, event, fields):
+        parts = [f"level={level}", f"event={event}"]
+        parts.extend(f"{key}={format_field(value)}" for key, value in fields.items())
+        print(f"[{self.source}] " + " ".join(parts))
+
+    # Event rutin: event ke-1, ke-(N+1), ... dari tiap jenis yang dicetak
+    def info(self, event, **fields):
+        counter = self.counters.get(event)
+        if counter is None:
+            counter = self.counters.setdefault(event, itertools.count())
+        if next(counter) % self.sample_every:
+            return
+        if self.sample_every > 1:
+            fields["sample"] = f"1/{self.sample_every}"
+        self.emit("info", event, fields)
+
+    def warn(self, event, **fields):
+        self.emit("warn", event, fields)
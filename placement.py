@@ -0,0 +1,92 @@
+import heapq
+import random
+
+# Kebijakan penempatan blok di Master. Setiap kebijakan menerima daftar node
+# hidup (terurut), info beban per node dari heartbeat, jumlah replika yang
+# diminta dan ukuran blok, lalu mengembalikan daftar node tujuan yang berbeda.
+
+class NodeLoad:
+    __slots__ = ("capacity", "used_bytes", "inflight", "pending_blocks", "pending_bytes", "codecs")
+
+    def __init__(self, capacity=0, used_bytes=0, inflight=0, codecs=()):
+        self.capacity = capacity
+        self.used_bytes = used_bytes
+        self.inflight = inflight
+        # Codec kompresi yang bisa didekompres node (negosiasi per upload)
+        self.codecs = tuple(codecs)
+        # Blok yang sudah ditugaskan Master sejak heartbeat terakhir,
+        # karena angka dari heartbeat bisa tertinggal beberapa detik
+        self.pending_blocks = 0
+        self.pending_bytes = 0
+
+    def free_bytes(self):
+        return max(0, self.capacity - self.used_bytes - self.pending_bytes)
+
+    def load(self):
+        return self.inflight + self.pending_blocks
+
+    def fits(self, size):
+        # Node yang belum melapor kapasitas dianggap muat
+        return self.capacity == 0 or self.free_bytes() >= size
+
+class RoundRobinPolicy:
+    name = "round-robin"
+
+    def __init__(self):
+        self.rr_index = 0
+
+    def choose(self, nodes, loads, count, size):
+        num_nodes = len(nodes)
+        targets = [nodes[(self.rr_index + i) % num_nodes] for i in range(min(count, num_nodes))]
+        self.rr_index = (self.rr_index + 1) % num_nodes
+        return targets
+
+class LeastLoadedPolicy:
+    name = "least-loaded"
+
+    def choose(self, nodes, loads, count, size):
+        # Beban paling kecil dulu, lalu ruang kosong paling besar (O(n), tanpa sort penuh)
+        return heapq.nsmallest(count, nodes, key=lambda n: (loads[n].load(), -loads[n].free_bytes()))
+
+class PowerOfTwoPolicy:
+    name = "power-of-two"
+
+    def choose(self, nodes, loads, count, size):
+        # Ambil 2 node acak, pilih yang lebih senggang; ulangi per replika.
+        # Hampir seimbang seperti least-loaded tanpa semua request berebut
+        # node yang sama saat info beban sedang tertinggal.
+        remaining = list(nodes)
+        targets = []
+        while remaining and len(targets) < count:
+            if len(remaining) == 1:
+                pick = remaining[0]
+            else:
+                a, b = random.sample(remaining, 2)
+                pick = a if loads[a].load() <= loads[b].load() else b
+            targets.append(pick)
+            remaining.remove(pick)
+        return targets
+
+class FreeSpacePolicy:
+    name = "free-space"
+
+    def choose(self, nodes, loads, count, size):
+        # Acak berbobot ruang kosong: disk yang lebih besar menerima lebih banyak blok
+        remaining = list(nodes)
+        targets = []
+        while remaining and len(targets) < count:
+            weights = [loads[n].free_bytes() + 1 for n in remaining]
+            pick = random.choices(remaining, weights=weights)[0]
+            targets.append(pick)
+            remaining.remove(pick)
+        return targets
+
+POLICIES = {
+    policy.name: policy
+    for policy in (RoundRobinPolicy, LeastLoadedPolicy, PowerOfTwoPolicy, FreeSpacePolicy)
+}
+
+def make_policy(name):
+    if name not in POLICIES:
+        raise ValueError(f"Placement policy tidak dikenal: {name} (pilihan: {', '.join(POLICIES)})")
+    return POLICIES[name]()
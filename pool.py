@@ -0,0 +1,157 @@
+import grpc
+import threading
+import time
+import protos.dfs_pb2_grpc as pb2_grpc
+
+# Pool channel gRPC: satu channel (TCP + HTTP/2) per alamat dipakai ulang
+# oleh semua RPC dan semua thread, bukan dibuat ulang setiap request.
+# Channel yang dikeluarkan dari pool (error/idle) tidak langsung ditutup:
+# pemanggil baru mendapat channel baru, sedangkan RPC & stream yang masih
+# berjalan di channel lama dibiarkan selesai, baru channel lama ditutup.
+
+# Port default DataNode; node_id yang sudah memuat port (host:port, mis. node
+# pada cluster lokal dengan port acak) dipakai apa adanya
+DATANODE_PORT = 50051
+# Channel yang tidak dipakai selama ini (detik) ditutup
+IDLE_TIMEOUT = 300
+# Channel yang terus TRANSIENT_FAILURE selama ini (detik) dianggap node mati
+FAILURE_TIMEOUT = 30
+# Jeda minimal antar pembersihan pool
+CLEANUP_INTERVAL = 10
+
+def node_address(node_id):
+    if ":" in node_id:
+        return node_id
+    return f"{node_id}:{DATANODE_PORT}"
+
+# Menghitung RPC yang sedang berjalan pada satu channel; stream dihitung
+# sampai selesai/dibatalkan (done callback dari gRPC)
+class CallTracker(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor,
+                  grpc.StreamUnaryClientInterceptor, grpc.StreamStreamClientInterceptor):
+    def __init__(self, owner):
+        self.owner = owner
+
+    def track(self, call):
+        self.owner.add_call(1)
+        call.add_done_callback(lambda _: self.owner.add_call(-1))
+        return call
+
+    def intercept_unary_unary(self, continuation, details, request):
+        return self.track(continuation(details, request))
+
+    def intercept_unary_stream(self, continuation, details, request):
+        return self.track(continuation(details, request))
+
+    def intercept_stream_unary(self, continuation, details, request_iterator):
+        return self.track(continuation(details, request_iterator))
+
+    def intercept_stream_stream(self, continuation, details, request_iterator):
+        return self.track(continuation(details, request_iterator))
+
+class PooledChannel:
+    def __init__(self, address):
+        self.address = address
+        self.channel = grpc.insecure_channel(address)
+        self.stub = pb2_grpc.DFSServiceStub(grpc.intercept_channel(self.channel, CallTracker(self)))
+        self.state = grpc.ChannelConnectivity.IDLE
+        self.failing_since = None
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+        self.calls = 0
+        # True setelah dikeluarkan dari pool: ditutup begitu calls = 0
+        self.retired = False
+        self.closed = False
+        # Health check pasif: gRPC melaporkan perubahan status koneksi
+        self.channel.subscribe(self.on_state_change, try_to_connect=False)
+
+    def on_state_change(self, state):
+        self.state = state
+        if state == grpc.ChannelConnectivity.TRANSIENT_FAILURE:
+            if self.failing_since is None:
+                self.failing_since = time.time()
+        elif state == grpc.ChannelConnectivity.READY:
+            self.failing_since = None
+
+    def is_dead(self, now):
+        if self.state == grpc.ChannelConnectivity.SHUTDOWN:
+            return True
+        return self.failing_since is not None and now - self.failing_since > FAILURE_TIMEOUT
+
+    def add_call(self, delta):
+        with self.lock:
+            self.calls += delta
+            drained = self.retired and self.calls == 0
+        if drained:
+            self.close()
+
+    def is_busy(self):
+        with self.lock:
+            return self.calls > 0
+
+    def retire(self):
+        with self.lock:
+            self.retired = True
+            drained = self.calls == 0
+        if drained:
+            self.close()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.channel.unsubscribe(self.on_state_change)
+        self.channel.close()
+
+class ChannelPool:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.last_cleanup = time.time()
+
+    def get_stub(self, address):
+        now = time.time()
+        with self.lock:
+            if now - self.last_cleanup > CLEANUP_INTERVAL:
+                self._cleanup(now)
+            entry = self.entries.get(address)
+            if entry is None:
+                entry = PooledChannel(address)
+                self.entries[address] = entry
+            entry.last_used = now
+            return entry.stub
+
+    # Dipanggil saat RPC gagal karena node tidak bisa dihubungi. RPC lain yang
+    # masih berjalan di channel tersebut tidak ikut dibatalkan
+    def evict(self, address):
+        with self.lock:
+            entry = self.entries.pop(address, None)
+        if entry is not None:
+            entry.retire()
+
+    def report_error(self, address, error):
+        if isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.UNAVAILABLE:
+            self.evict(address)
+
+    def _cleanup(self, now):
+        self.last_cleanup = now
+        for address, entry in list(self.entries.items()):
+            if entry.is_dead(now) or (now - entry.last_used > IDLE_TIMEOUT and not entry.is_busy()):
+                del self.entries[address]
+                entry.retire()
+
+    def close(self):
+        with self.lock:
+            entries = list(self.entries.values())
+            self.entries.clear()
+        for entry in entries:
+            entry.close()
+
+# Pool bersama untuk satu proses (client, heartbeat, DataNode -> DataNode)
+default_pool = ChannelPool()
+
+def get_stub(address):
+    return default_pool.get_stub(address)
+
+def report_error(address, error):
+    default_pool.report_error(address, error)
@@ -24,23 +24,39 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x10protos/dfs.proto\"3\n\rUploadRequest\x12\x10\n\x08\x66ilename\x18\x01 \x01(\t\x12\x10\n\x08\x66ilesize\x18\x02 \x01(\x03\"<\n\x0eUploadResponse\x12\x10\n\x08\x66ilename\x18\x01 \x01(\t\x12\x18\n\x10target_datanodes\x18\x02 \x03(\t\"+\n\tChunkData\x12\x10\n\x08\x66ilename\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\")\n\x05Reply\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"+\n\nNodeStatus\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04port\x18\x02 \x01(\t2\xa6\x01\n\nDFSService\x12\x30\n\rRequestUpload\x12\x0e.UploadRequest\x1a\x0f.UploadResponse\x12!\n\x0bUploadChunk\x12\n.ChunkData\x1a\x06.Reply\x12 \n\tHeartbeat\x12\x0b.NodeStatus\x1a\x06.Reply\x12!\n\x0b\x44\x65leteChunk\x12\n.ChunkData\x1a\x06.Replyb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x10protos/dfs.proto\"\x91\x01\n\rUploadRequest\x12\x10\n\x08\x66ilename\x18\x01 \x01(\t\x12\x10\n\x08\x66ilesize\x18\x02 \x01(\x03\x12\x14\n\x0c\x62lock_hashes\x18\x03 \x03(\t\x12\x12\n\nblock_size\x18\x04 \x01(\x03\x12\x0e\n\x06\x63odecs\x18\x05 \x03(\t\x12\x0f\n\x07\x65\x63_data\x18\x06 \x01(\x05\x12\x11\n\tec_parity\x18\x07 \x01(\x05\"j\n\x0eUploadResponse\x12\x10\n\x08\x66ilename\x18\x01 \x01(\t\x12\x18\n\x10target_datanodes\x18\x02 \x03(\t\x12\x1a\n\x06\x62locks\x18\x03 \x03(\x0b\x32\n.BlockInfo\x12\x10\n\x08\x66ilesize\x18\x04 \x01(\x03\"3\n\x12UploadBatchRequest\x12\x1d\n\x05\x66iles\x18\x01 \x03(\x0b\x32\x0e.UploadRequest\"5\n\x13UploadBatchResponse\x12\x1e\n\x05\x66iles\x18\x01 \x03(\x0b\x32\x0f.UploadResponse\"\x9a\x01\n\tBlockInfo\x12\x10\n\x08\x62lock_id\x18\x01 \x01(\t\x12\x0e\n\x06offset\x18\x02 \x01(\x03\x12\x0e\n\x06length\x18\x03 \x01(\x03\x12\x18\n\x10target_datanodes\x18\x04 \x03(\t\x12\x0e\n\x06\x65xists\x18\x05 \x01(\x08\x12\r\n\x05\x63odec\x18\x06 \x01(\t\x12\x0f\n\x07\x65\x63_data\x18\x07 \x01(\x05\x12\x11\n\tec_parity\x18\x08 \x01(\x05\"\xcb\x01\n\tChunkData\x12\x10\n\x08\x66ilename\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\x12\x10\n\x08pipeline\x18\x03 \x03(\t\x12\x0e\n\x06offset\x18\x04 \x01(\x03\x12\x0e\n\x06length\x18\x05 \x01(\x03\x12\x15\n\x08\x63hecksum\x18\x06 \x01(\rH\x00\x88\x01\x01\x12\r\n\x05\x63odec\x18\x07 \x01(\t\x12\x12\n\nraw_length\x18\x08 \x01(\x03\x12\x15\n\raccept_codecs\x18\t \x03(\t\x12\x0e\n\x06\x66ramed\x18\n \x01(\x08\x42\x0b\n\t_checksum\"T\n\x10ReplicateRequest\x12\x10\n\x08\x62lock_id\x18\x01 \x01(\t\x12\x0f\n\x07targets\x18\x02 \x03(\t\x12\x0c\n\x04rate\x18\x03 \x01(\x03\x12\x0f\n\x07timeout\x18\x04 \x01(\x01\"3\n\rCorruptReport\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x11\n\tblock_ids\x18\x02 \x03(\t\"8\n\x05Reply\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\r\n\x05nodes\x18\x03 \x03(\t\"{\n\nNodeStatus\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x0c\n\x04port\x18\x02 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x03 \x01(\x03\x12\x12\n\nused_bytes\x18\x04 \x01(\x03\x12\x18\n\x10inflight_uploads\x18\x05 \x01(\x05\x12\x0e\n\x06\x63odecs\x18\x06 \x03(\t\"\xb7\x01\n\nNodeReport\x12 \n\x06status\x18\x01 \x01(\x0b\x32\x0b.NodeStatusH\x00\x88\x01\x01\x12\x14\n\x0c\x61\x64\x64\x65\x64_blocks\x18\x02 \x03(\t\x12\x16\n\x0eremoved_blocks\x18\x03 \x03(\t\x12\x13\n\x0b\x66ull_report\x18\x04 \x01(\x08\x12\x1f\n\x07results\x18\x05 \x03(\x0b\x32\x0e.CommandResult\x12\x18\n\x10\x66ull_report_done\x18\x06 \x01(\x08\x42\t\n\x07_status\"f\n\x0bNodeCommand\x12\x12\n\ncommand_id\x18\x01 \x01(\x03\x12\x0e\n\x06\x61\x63tion\x18\x02 \x01(\t\x12\r\n\x05names\x18\x03 \x03(\t\x12$\n\treplicate\x18\x04 \x01(\x0b\x32\x11.ReplicateRequest\":\n\rCommandResult\x12\x12\n\ncommand_id\x18\x01 \x01(\x03\x12\x15\n\x05reply\x18\x02 \x01(\x0b\x32\x06.Reply2\xfd\x04\n\nDFSService\x12\x30\n\rRequestUpload\x12\x0e.UploadRequest\x1a\x0f.UploadResponse\x12!\n\x0bUploadChunk\x12\n.ChunkData\x1a\x06.Reply\x12 \n\tHeartbeat\x12\x0b.NodeStatus\x1a\x06.Reply\x12!\n\x0b\x44\x65leteChunk\x12\n.ChunkData\x1a\x06.Reply\x12$\n\x0cUploadStream\x12\n.ChunkData\x1a\x06.Reply(\x01\x12\'\n\x0c\x43ommitUpload\x12\x0f.UploadResponse\x1a\x06.Reply\x12\x33\n\x10GetFileLocations\x12\x0e.UploadRequest\x1a\x0f.UploadResponse\x12)\n\rDownloadChunk\x12\n.ChunkData\x1a\n.ChunkData0\x01\x12?\n\x12RequestUploadBatch\x12\x13.UploadBatchRequest\x1a\x14.UploadBatchResponse\x12\x31\n\x11\x43ommitUploadBatch\x12\x14.UploadBatchResponse\x1a\x06.Reply\x12-\n\x13ReportCorruptBlocks\x12\x0e.CorruptReport\x1a\x06.Reply\x12$\n\nDeleteFile\x12\x0e.UploadRequest\x1a\x06.Reply\x12+\n\x0eReplicateBlock\x12\x11.ReplicateRequest\x1a\x06.Reply\x12\x30\n\x0fHeartbeatStream\x12\x0b.NodeReport\x1a\x0c.NodeCommand(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'protos.dfs_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_UPLOADREQUEST']._serialized_start=20
-  _globals['_UPLOADREQUEST']._serialized_end=71
-  _globals['_UPLOADRESPONSE']._serialized_start=73
-  _globals['_UPLOADRESPONSE']._serialized_end=133
-  _globals['_CHUNKDATA']._serialized_start=135
-  _globals['_CHUNKDATA']._serialized_end=178
-  _globals['_REPLY']._serialized_start=180
-  _globals['_REPLY']._serialized_end=221
-  _globals['_NODESTATUS']._serialized_start=223
-  _globals['_NODESTATUS']._serialized_end=266
-  _globals['_DFSSERVICE']._serialized_start=269
-  _globals['_DFSSERVICE']._serialized_end=435
+  _globals['_UPLOADREQUEST']._serialized_start=21
+  _globals['_UPLOADREQUEST']._serialized_end=166
+  _globals['_UPLOADRESPONSE']._serialized_start=168
+  _globals['_UPLOADRESPONSE']._serialized_end=274
+  _globals['_UPLOADBATCHREQUEST']._serialized_start=276
+  _globals['_UPLOADBATCHREQUEST']._serialized_end=327
+  _globals['_UPLOADBATCHRESPONSE']._serialized_start=329
+  _globals['_UPLOADBATCHRESPONSE']._serialized_end=382
+  _globals['_BLOCKINFO']._serialized_start=385
+  _globals['_BLOCKINFO']._serialized_end=539
+  _globals['_CHUNKDATA']._serialized_start=542
+  _globals['_CHUNKDATA']._serialized_end=745
+  _globals['_REPLICATEREQUEST']._serialized_start=747
+  _globals['_REPLICATEREQUEST']._serialized_end=831
+  _globals['_CORRUPTREPORT']._serialized_start=833
+  _globals['_CORRUPTREPORT']._serialized_end=884
+  _globals['_REPLY']._serialized_start=886
+  _globals['_REPLY']._serialized_end=942
+  _globals['_NODESTATUS']._serialized_start=944
+  _globals['_NODESTATUS']._serialized_end=1067
+  _globals['_NODEREPORT']._serialized_start=1070
+  _globals['_NODEREPORT']._serialized_end=1253
+  _globals['_NODECOMMAND']._serialized_start=1255
+  _globals['_NODECOMMAND']._serialized_end=1357
+  _globals['_COMMANDRESULT']._serialized_start=1359
+  _globals['_COMMANDRESULT']._serialized_end=1417
+  _globals['_DFSSERVICE']._serialized_start=1420
+  _globals['_DFSSERVICE']._serialized_end=2057
 # @@protoc_insertion_point(module_scope)
@@ -54,6 +54,56 @@ class DFSServiceStub(object):
                 request_serializer=protos_dot_dfs__pb2.ChunkData.SerializeToString,
                 response_deserializer=protos_dot_dfs__pb2.Reply.FromString,
                 _registered_method=True)
+        self.UploadStream = channel.stream_unary(
+                '/DFSService/UploadStream',
+                request_serializer=protos_dot_dfs__pb2.ChunkData.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.Reply.FromString,
+                _registered_method=True)
+        self.CommitUpload = channel.unary_unary(
+                '/DFSService/CommitUpload',
+                request_serializer=protos_dot_dfs__pb2.UploadResponse.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.Reply.FromString,
+                _registered_method=True)
+        self.GetFileLocations = channel.unary_unary(
+                '/DFSService/GetFileLocations',
+                request_serializer=protos_dot_dfs__pb2.UploadRequest.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.UploadResponse.FromString,
+                _registered_method=True)
+        self.DownloadChunk = channel.unary_stream(
+                '/DFSService/DownloadChunk',
+                request_serializer=protos_dot_dfs__pb2.ChunkData.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.ChunkData.FromString,
+                _registered_method=True)
+        self.RequestUploadBatch = channel.unary_unary(
+                '/DFSService/RequestUploadBatch',
+                request_serializer=protos_dot_dfs__pb2.UploadBatchRequest.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.UploadBatchResponse.FromString,
+                _registered_method=True)
+        self.CommitUploadBatch = channel.unary_unary(
+                '/DFSService/CommitUploadBatch',
+                request_serializer=protos_dot_dfs__pb2.UploadBatchResponse.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.Reply.FromString,
+                _registered_method=True)
+        self.ReportCorruptBlocks = channel.unary_unary(
+                '/DFSService/ReportCorruptBlocks',
+                request_serializer=protos_dot_dfs__pb2.CorruptReport.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.Reply.FromString,
+                _registered_method=True)
+        self.DeleteFile = channel.unary_unary(
+                '/DFSService/DeleteFile',
+                request_serializer=protos_dot_dfs__pb2.UploadRequest.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.Reply.FromString,
+                _registered_method=True)
+        self.ReplicateBlock = channel.unary_unary(
+                '/DFSService/ReplicateBlock',
+                request_serializer=protos_dot_dfs__pb2.ReplicateRequest.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.Reply.FromString,
+                _registered_method=True)
+        self.HeartbeatStream = channel.stream_stream(
+                '/DFSService/HeartbeatStream',
+                request_serializer=protos_dot_dfs__pb2.NodeReport.SerializeToString,
+                response_deserializer=protos_dot_dfs__pb2.NodeCommand.FromString,
+                _registered_method=True)
 
 
 class DFSServiceServicer(object):
@@ -84,6 +134,78 @@ class DFSServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def UploadStream(self, request_iterator, context):
+        """Upload bertahap: file dikirim sebagai rangkaian ChunkData berukuran tetap
+        sehingga tidak perlu ditampung utuh di memori (dan tidak kena limit 4 MB gRPC)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CommitUpload(self, request, context):
+        """Jalur baca: client melapor ke Master setelah upload sukses (CommitUpload),
+        lalu bisa mencari lokasi blok (GetFileLocations) dan membaca dari DataNode
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetFileLocations(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DownloadChunk(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RequestUploadBatch(self, request, context):
+        """Versi batch untuk banyak file kecil: 1 round-trip ke Master per batch
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CommitUploadBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReportCorruptBlocks(self, request, context):
+        """DataNode melapor replica yang checksum-nya tidak cocok (hasil scrubber/baca)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DeleteFile(self, request, context):
+        """Hapus file dari namespace; replica blok dihapus jika tidak dipakai file lain
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReplicateBlock(self, request, context):
+        """Re-replikasi: Master meminta DataNode sumber menyalin blok langsung ke
+        node tujuan baru (pipeline), dengan laju dibatasi
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def HeartbeatStream(self, request_iterator, context):
+        """Heartbeat streaming: satu stream panjang per DataNode. Naik: status beban,
+        laporan blok inkremental & hasil perintah. Turun: perintah Master
+        (hapus, salin). Stream yang putus = node langsung dianggap mati.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_DFSServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -107,6 +229,56 @@ def add_DFSServiceServicer_to_server(servicer, server):
                     request_deserializer=protos_dot_dfs__pb2.ChunkData.FromString,
                     response_serializer=protos_dot_dfs__pb2.Reply.SerializeToString,
             ),
+            'UploadStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.UploadStream,
+                    request_deserializer=protos_dot_dfs__pb2.ChunkData.FromString,
+                    response_serializer=protos_dot_dfs__pb2.Reply.SerializeToString,
+            ),
+            'CommitUpload': grpc.unary_unary_rpc_method_handler(
+                    servicer.CommitUpload,
+                    request_deserializer=protos_dot_dfs__pb2.UploadResponse.FromString,
+                    response_serializer=protos_dot_dfs__pb2.Reply.SerializeToString,
+            ),
+            'GetFileLocations': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetFileLocations,
+                    request_deserializer=protos_dot_dfs__pb2.UploadRequest.FromString,
+                    response_serializer=protos_dot_dfs__pb2.UploadResponse.SerializeToString,
+            ),
+            'DownloadChunk': grpc.unary_stream_rpc_method_handler(
+                    servicer.DownloadChunk,
+                    request_deserializer=protos_dot_dfs__pb2.ChunkData.FromString,
+                    response_serializer=protos_dot_dfs__pb2.ChunkData.SerializeToString,
+            ),
+            'RequestUploadBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.RequestUploadBatch,
+                    request_deserializer=protos_dot_dfs__pb2.UploadBatchRequest.FromString,
+                    response_serializer=protos_dot_dfs__pb2.UploadBatchResponse.SerializeToString,
+            ),
+            'CommitUploadBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.CommitUploadBatch,
+                    request_deserializer=protos_dot_dfs__pb2.UploadBatchResponse.FromString,
+                    response_serializer=protos_dot_dfs__pb2.Reply.SerializeToString,
+            ),
+            'ReportCorruptBlocks': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReportCorruptBlocks,
+                    request_deserializer=protos_dot_dfs__pb2.CorruptReport.FromString,
+                    response_serializer=protos_dot_dfs__pb2.Reply.SerializeToString,
+            ),
+            'DeleteFile': grpc.unary_unary_rpc_method_handler(
+                    servicer.DeleteFile,
+                    request_deserializer=protos_dot_dfs__pb2.UploadRequest.FromString,
+                    response_serializer=protos_dot_dfs__pb2.Reply.SerializeToString,
+            ),
+            'ReplicateBlock': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReplicateBlock,
+                    request_deserializer=protos_dot_dfs__pb2.ReplicateRequest.FromString,
+                    response_serializer=protos_dot_dfs__pb2.Reply.SerializeToString,
+            ),
+            'HeartbeatStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.HeartbeatStream,
+                    request_deserializer=protos_dot_dfs__pb2.NodeReport.FromString,
+                    response_serializer=protos_dot_dfs__pb2.NodeCommand.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'DFSService', rpc_method_handlers)
@@ -225,3 +397,273 @@ class DFSService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def UploadStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/DFSService/UploadStream',
+            protos_dot_dfs__pb2.ChunkData.SerializeToString,
+            protos_dot_dfs__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CommitUpload(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/DFSService/CommitUpload',
+            protos_dot_dfs__pb2.UploadResponse.SerializeToString,
+            protos_dot_dfs__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetFileLocations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/DFSService/GetFileLocations',
+            protos_dot_dfs__pb2.UploadRequest.SerializeToString,
+            protos_dot_dfs__pb2.UploadResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DownloadChunk(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/DFSService/DownloadChunk',
+            protos_dot_dfs__pb2.ChunkData.SerializeToString,
+            protos_dot_dfs__pb2.ChunkData.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RequestUploadBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/DFSService/RequestUploadBatch',
+            protos_dot_dfs__pb2.UploadBatchRequest.SerializeToString,
+            protos_dot_dfs__pb2.UploadBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CommitUploadBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/DFSService/CommitUploadBatch',
+            protos_dot_dfs__pb2.UploadBatchResponse.SerializeToString,
+            protos_dot_dfs__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReportCorruptBlocks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/DFSService/ReportCorruptBlocks',
+            protos_dot_dfs__pb2.CorruptReport.SerializeToString,
+            protos_dot_dfs__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DeleteFile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/DFSService/DeleteFile',
+            protos_dot_dfs__pb2.UploadRequest.SerializeToString,
+            protos_dot_dfs__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReplicateBlock(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/DFSService/ReplicateBlock',
+            protos_dot_dfs__pb2.ReplicateRequest.SerializeToString,
+            protos_dot_dfs__pb2.Reply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def HeartbeatStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/DFSService/HeartbeatStream',
+            protos_dot_dfs__pb2.NodeReport.SerializeToString,
+            protos_dot_dfs__pb2.NodeCommand.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
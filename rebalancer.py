@@ -0,0 +1,212 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import protos.dfs_pb2 as pb2
+from erasure import fragment_name, fragment_size
+from replication import copy_timeout, delete_object, send_replicate
+
+# Rebalancer di Master: memindahkan blok dari node yang paling penuh ke node
+# yang paling kosong (mis. setelah DataNode baru ditambahkan), karena
+# penempatan hanya memengaruhi upload baru.
+# - Utilisasi = used_bytes (byte object hidup) / capacity dari heartbeat.
+#   Cluster dianggap seimbang jika utilisasi tiap node berada dalam threshold
+#   (relatif) dari rata-rata cluster.
+# - Satu episode: rencana pindah dihitung pada model utilisasi lokal (tanpa
+#   menunggu heartbeat menyusul), lalu dijalankan dengan jumlah pindah paralel
+#   dan laju per salinan dibatasi agar upload di depan tidak terganggu.
+# - Pindah satu object = node sumber menyalin ke node tujuan (perintah
+#   replicate), peta blok diganti ke node tujuan, lalu salinan di sumber dihapus.
+# - Blok yang replicanya sedang tidak lengkap dilewati (urusan re-replikasi).
+
+# Jeda sebelum cek ulang setelah episode, agar heartbeat memuat hasil pindah
+SETTLE_TIME = 3
+# Batas jumlah pindah yang direncanakan per episode
+MAX_MOVES = 1000
+
+class Rebalancer:
+    def __init__(self, meta, nodes, commands, interval, threshold, streams, rate, metrics=None):
+        self.meta = meta
+        self.nodes = nodes
+        self.commands = commands
+        self.interval = interval
+        self.threshold = threshold
+        self.streams = streams
+        self.rate = rate
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        # Statistik (satu episode penyeimbangan = dari imbalance terdeteksi
+        # sampai cluster seimbang lagi)
+        self.balancing_since = None
+        self.episode_bytes = 0
+        self.episode_moves = 0
+        self.moved_bytes = 0
+        self.moved_blocks = 0
+        self.failed = 0
+        self.last_balance = None
+        self.imbalance = 0.0
+        if metrics is not None:
+            self.moved_counter = metrics.counter(
+                "dfs_rebalance_moved_bytes_total", "Byte yang dipindahkan rebalancer")
+            metrics.gauge("dfs_rebalance_imbalance",
+                          "Simpangan utilisasi terbesar dari rata-rata cluster (relatif)",
+                          collect=lambda: {(): self.imbalance})
+        else:
+            self.moved_counter = None
+
+    def start(self):
+        if self.interval > 0:
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        wait = self.interval
+        while not self.stopped.wait(wait):
+            try:
+                moved = self.rebalance_once()
+            except Exception as e:
+                print(f"[Master] Rebalance gagal: {e}")
+                moved = 0
+            wait = SETTLE_TIME if moved else self.interval
+
+    # Node hidup yang sudah melapor kapasitas -> [capacity, used]
+    def utilization(self):
+        usage = {}
+        for node_id in self.nodes.live_nodes():
+            load = self.nodes.get_load(node_id)
+            if load is not None and load.capacity > 0:
+                usage[node_id] = [load.capacity, load.used_bytes]
+        return usage
+
+    def deviation(self, usage):
+        if len(usage) < 2:
+            return 0.0, 0.0
+        average = sum(u for _, u in usage.values()) / sum(c for c, _ in usage.values())
+        if average <= 0:
+            return 0.0, average
+        return max(abs(u / c - average) for c, u in usage.values()) / average, average
+
+    # Hasil: jumlah byte yang berhasil dipindah pada putaran ini
+    def rebalance_once(self):
+        usage = self.utilization()
+        self.imbalance, _ = self.deviation(usage)
+        if self.imbalance <= self.threshold:
+            self.finish_episode()
+            return 0
+        moves = self.plan(usage)
+        if not moves:
+            self.finish_episode()
+            return 0
+        if self.balancing_since is None:
+            self.balancing_since = time.time()
+            self.episode_bytes = 0
+            self.episode_moves = 0
+            print(f"[Master] Rebalance: simpangan utilisasi {self.imbalance:.0%}, "
+                  f"{len(moves)} object akan dipindah")
+        with ThreadPoolExecutor(max_workers=self.streams) as executor:
+            moved = sum(executor.map(lambda move: self.move(*move), moves))
+        return moved
+
+    def finish_episode(self):
+        if self.balancing_since is None:
+            return
+        elapsed = time.time() - self.balancing_since
+        self.last_balance = (self.episode_moves, self.episode_bytes, elapsed)
+        self.balancing_since = None
+        print(f"[Master] Rebalance selesai: {self.episode_moves} object, "
+              f"{self.episode_bytes / 1024 / 1024:.1f} MB dalam {elapsed:.1f} s "
+              f"({self.episode_bytes / 1024 / 1024 / max(elapsed, 1e-6):.1f} MB/s)")
+
+    # Object yang bisa dipindah per node: (block, index, ukuran)
+    def movable_objects(self, usage):
+        objects = {node_id: [] for node_id in usage}
+        for block in list(self.meta.blocks.values()):
+            if not all(n and self.nodes.is_alive(n) for n in block.nodes):
+                continue
+            size = fragment_size(block.length, block.ec[0]) if block.ec else block.length
+            for index, node_id in enumerate(block.nodes):
+                if node_id in objects:
+                    objects[node_id].append((block, index, size))
+        for candidates in objects.values():
+            candidates.sort(key=lambda item: -item[2])
+        return objects
+
+    # Pasangkan node paling penuh dengan node paling kosong berulang kali pada
+    # model lokal. Pindah hanya jika sesudahnya sumber tidak menjadi lebih
+    # kosong dari tujuan (mencegah bolak-balik).
+    def plan(self, usage):
+        objects = self.movable_objects(usage)
+        # Maksimal satu pindah per blok per episode (peta bloknya diganti utuh)
+        planned = set()
+        moves = []
+        while len(moves) < MAX_MOVES:
+            deviation, _ = self.deviation(usage)
+            if deviation <= self.threshold:
+                break
+            ratio = {n: u / c for n, (c, u) in usage.items()}
+            source = max(ratio, key=ratio.get)
+            target = min(ratio, key=ratio.get)
+            choice = None
+            for i, (block, index, size) in enumerate(objects[source]):
+                if block.block_id in planned or target in block.nodes:
+                    continue
+                if ratio[source] - size / usage[source][0] < ratio[target] + size / usage[target][0]:
+                    continue
+                choice = i
+                break
+            if choice is None:
+                break
+            block, index, size = objects[source].pop(choice)
+            planned.add(block.block_id)
+            usage[source][1] -= size
+            usage[target][1] += size
+            moves.append((block, list(block.nodes), index, size, source, target))
+        return moves
+
+    # Hasil: ukuran object jika berhasil dipindah, 0 jika tidak
+    # nodes: lokasi blok saat rencana dibuat
+    def move(self, block, nodes, index, size, source, target):
+        if self.stopped.is_set():
+            return 0
+        name = fragment_name(block.block_id, index) if block.ec else block.block_id
+        try:
+            request = pb2.ReplicateRequest(block_id=name, targets=[target], rate=self.rate,
+                                           timeout=copy_timeout(size, self.rate))
+            reply = send_replicate(self.commands, source, request)
+            if not reply.success:
+                raise IOError(reply.message)
+            # Peta blok bisa sudah berubah (file dihapus, re-replikasi): salinan
+            # baru dibuang kecuali tujuan memang sudah tercatat memegangnya
+            moved = list(nodes)
+            moved[index] = target
+            if not self.meta.update_block_nodes(block.block_id, moved, nodes):
+                current = self.meta.get_block(block.block_id)
+                if current is None or target not in current.nodes:
+                    delete_object(self.commands, target, name)
+                return 0
+            delete_object(self.commands, source, name)
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            print(f"[Master] Rebalance {name} {source} -> {target} gagal: {e}")
+            return 0
+        with self.lock:
+            self.moved_blocks += 1
+            self.moved_bytes += size
+            self.episode_moves += 1
+            self.episode_bytes += size
+        if self.moved_counter is not None:
+            self.moved_counter.inc(size)
+        return size
+
+    def stats(self):
+        with self.lock:
+            return {
+                "balancing": self.balancing_since is not None,
+                "imbalance": self.imbalance,
+                "moved_blocks": self.moved_blocks,
+                "moved_bytes": self.moved_bytes,
+                "failed": self.failed,
+                "last_balance": self.last_balance,
+            }
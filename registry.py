@@ -0,0 +1,107 @@
+import bisect
+import heapq
+import threading
+import time
+from placement import NodeLoad
+
+# Daftar node hidup di Master, aman dipakai banyak thread gRPC sekaligus.
+# - Daftar node hidup terurut dirawat bertahap (bisect) saat node masuk/keluar,
+#   bukan di-scan dan di-sort ulang setiap RequestUpload.
+# - Kedaluwarsa heartbeat diatur heap (waktu_kedaluwarsa, node) yang diproses
+#   thread timer, sehingga node mati terdeteksi tanpa menunggu ada request.
+
+class NodeRegistry:
+    def __init__(self, timeout, on_dead=None, on_alive=None):
+        self.timeout = timeout
+        self.on_dead = on_dead
+        self.on_alive = on_alive
+        self.cond = threading.Condition()
+        self.expires_at = {}
+        self.loads = {}
+        self.live = []
+        # Salinan tuple untuk pembaca: diganti hanya saat keanggotaan berubah
+        self.snapshot = ()
+        self.heap = []
+        self.running = False
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.run_expiry, daemon=True).start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+
+    # Hasil: waktu heartbeat sebelumnya dari node ini (None untuk node baru)
+    def heartbeat(self, node_id, load=None):
+        expiry = time.time() + self.timeout
+        with self.cond:
+            previous = self.expires_at.get(node_id)
+            is_new = previous is None
+            self.expires_at[node_id] = expiry
+            self.loads[node_id] = load or NodeLoad()
+            heapq.heappush(self.heap, (expiry, node_id))
+            if is_new:
+                bisect.insort(self.live, node_id)
+                self.snapshot = tuple(self.live)
+            self.cond.notify()
+        if is_new and self.on_alive:
+            self.on_alive(node_id)
+        return None if is_new else previous - self.timeout
+
+    def live_nodes(self):
+        return self.snapshot
+
+    # Majukan batas kedaluwarsa node (mis. stream heartbeat-nya putus): node
+    # dianggap mati setelah delay detik kecuali heartbeat baru masuk
+    def expire(self, node_id, delay=0):
+        expiry = time.time() + delay
+        with self.cond:
+            if self.expires_at.get(node_id, 0) <= expiry:
+                return
+            self.expires_at[node_id] = expiry
+            heapq.heappush(self.heap, (expiry, node_id))
+            self.cond.notify()
+
+    # node_id -> waktu heartbeat terakhir
+    def last_seen(self):
+        with self.cond:
+            return {node_id: expiry - self.timeout for node_id, expiry in self.expires_at.items()}
+
+    def is_alive(self, node_id):
+        return node_id in self.expires_at
+
+    def get_load(self, node_id):
+        return self.loads.get(node_id)
+
+    def pop_expired(self, now):
+        dead = []
+        while self.heap and self.heap[0][0] <= now:
+            expiry, node_id = heapq.heappop(self.heap)
+            # Entri lama dari heartbeat sebelumnya diabaikan
+            if self.expires_at.get(node_id) != expiry:
+                continue
+            del self.expires_at[node_id]
+            self.loads.pop(node_id, None)
+            self.live.pop(bisect.bisect_left(self.live, node_id))
+            dead.append(node_id)
+        if dead:
+            self.snapshot = tuple(self.live)
+        return dead
+
+    def run_expiry(self):
+        while True:
+            with self.cond:
+                while self.running:
+                    dead = self.pop_expired(time.time())
+                    if dead:
+                        break
+                    wait = self.heap[0][0] - time.time() if self.heap else None
+                    self.cond.wait(wait)
+                if not self.running:
+                    return
+            # Callback dipanggil di luar lock
+            for node_id in dead:
+                if self.on_dead:
+                    self.on_dead(node_id)
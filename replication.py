@@ -0,0 +1,226 @@
+import heapq
+import itertools
+import threading
+import time
+import protos.dfs_pb2 as pb2
+import pool
+from heartbeat import COMMAND_TIMEOUT
+from placement import NodeLoad
+
+# Re-replikasi di Master: saat node dinyatakan mati (atau replica dilaporkan
+# rusak), blok yang replicanya kurang dimasukkan ke antrean prioritas
+# (replica hidup paling sedikit dulu). Worker meminta DataNode yang masih
+# memegang blok untuk menyalin langsung ke node tujuan baru (perintah
+# "replicate" lewat stream heartbeat, atau RPC ReplicateBlock untuk node tanpa
+# stream), dengan jumlah salinan paralel dan laju per salinan dibatasi.
+
+# Jeda sebelum blok yang gagal disalin dicoba lagi (detik)
+RETRY_DELAY = 5
+# Batas waktu satu salinan: COPY_TIMEOUT_FACTOR x waktu transfer pada laju
+# yang diminta (COPY_MIN_RATE jika tanpa batas laju) + COMMAND_TIMEOUT
+COPY_TIMEOUT_FACTOR = 3
+COPY_MIN_RATE = 10 * 1024 * 1024
+
+def copy_timeout(length, rate):
+    return COPY_TIMEOUT_FACTOR * length / (rate or COPY_MIN_RATE) + COMMAND_TIMEOUT
+
+# Perintah replicate lewat stream (RPC ReplicateBlock untuk node tanpa stream).
+# DataNode menghentikan salinan setelah request.timeout; Master menunggu
+# jawabannya sedikit lebih lama (antrean perintah di DataNode).
+def send_replicate(commands, source, request):
+    wait = request.timeout + COMMAND_TIMEOUT
+    def rpc():
+        return pool.get_stub(pool.node_address(source)).ReplicateBlock(request, timeout=wait)
+    if commands is None:
+        return rpc()
+    return commands.call(source, pb2.NodeCommand(action="replicate", replicate=request), rpc, wait)
+
+def delete_object(commands, node_id, name):
+    def rpc():
+        return pool.get_stub(pool.node_address(node_id)).DeleteChunk(
+            pb2.ChunkData(filename=name), timeout=COMMAND_TIMEOUT)
+    if commands is None:
+        return rpc()
+    return commands.call(node_id, pb2.NodeCommand(action="delete", names=[name]), rpc)
+
+class ReplicationScheduler:
+    def __init__(self, meta, nodes, place, replication_factor, streams, rate, commands=None):
+        self.meta = meta
+        self.commands = commands
+        self.nodes = nodes
+        # place(block, count, exclude) -> daftar node tujuan baru
+        self.place = place
+        self.replication_factor = replication_factor
+        self.streams = streams
+        self.rate = rate
+        self.cond = threading.Condition()
+        self.heap = []
+        self.queued = set()
+        # Blok yang belum bisa disalin karena tidak ada node tujuan yang tersisa
+        self.waiting = set()
+        self.active = 0
+        self.retrying = 0
+        self.counter = itertools.count()
+        # Statistik pemulihan (satu episode = dari antrean terisi sampai kosong)
+        self.episode_start = None
+        self.episode_blocks = 0
+        self.episode_bytes = 0
+        self.copied_blocks = 0
+        self.copied_bytes = 0
+        self.failed = 0
+        self.last_recovery = None
+
+    def start(self):
+        for _ in range(self.streams):
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def live_replicas(self, block):
+        return [n for n in block.nodes if self.nodes.is_alive(n)]
+
+    # Blok erasure coded tidak disalin ulang di sini: fragmen yang hilang
+    # dipulihkan saat dibaca (degraded read) dari k fragmen lain
+    def enqueue(self, block_id):
+        block = self.meta.get_block(block_id)
+        if block is None or block.ec:
+            return
+        live = len(self.live_replicas(block))
+        if live >= self.replication_factor:
+            return
+        with self.cond:
+            if block_id in self.queued:
+                return
+            if self.episode_start is None:
+                self.episode_start = time.time()
+                self.episode_blocks = 0
+                self.episode_bytes = 0
+            self.queued.add(block_id)
+            heapq.heappush(self.heap, (live, next(self.counter), block_id))
+            self.cond.notify()
+
+    # Dipanggil saat node mati: cari semua blok yang punya replica di node itu
+    def enqueue_node(self, node_id):
+        blocks = [b.block_id for b in list(self.meta.blocks.values()) if node_id in b.nodes]
+        for block_id in blocks:
+            self.enqueue(block_id)
+        if blocks:
+            print(f"[Master] Re-replikasi: {len(blocks)} blok dari {node_id} masuk antrean")
+
+    # Dipanggil saat node baru hidup: blok yang tertunda mungkin sekarang punya tujuan
+    def retry_waiting(self):
+        with self.cond:
+            waiting = list(self.waiting)
+            self.waiting.clear()
+        for block_id in waiting:
+            self.enqueue(block_id)
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.heap:
+                    self.cond.wait()
+                _, _, block_id = heapq.heappop(self.heap)
+                self.queued.discard(block_id)
+                self.active += 1
+            try:
+                self.replicate(block_id)
+            except Exception as e:
+                print(f"[Master] Re-replikasi {block_id} gagal: {e}")
+                self.schedule_retry(block_id)
+            finally:
+                with self.cond:
+                    self.active -= 1
+                    self.finish_episode()
+
+    def schedule_retry(self, block_id):
+        with self.cond:
+            self.failed += 1
+            self.retrying += 1
+        threading.Timer(RETRY_DELAY, self.retry, args=(block_id,)).start()
+
+    def retry(self, block_id):
+        with self.cond:
+            self.retrying -= 1
+        self.enqueue(block_id)
+        with self.cond:
+            self.finish_episode()
+
+    # Dipanggil dengan cond dipegang
+    def finish_episode(self):
+        if self.heap or self.active or self.retrying or self.episode_start is None:
+            return
+        elapsed = time.time() - self.episode_start
+        self.last_recovery = (self.episode_blocks, self.episode_bytes, elapsed)
+        self.episode_start = None
+        if self.episode_blocks:
+            print(f"[Master] Redundansi pulih: {self.episode_blocks} blok, "
+                  f"{self.episode_bytes / 1024 / 1024:.1f} MB dalam {elapsed:.1f} s "
+                  f"({self.episode_bytes / 1024 / 1024 / max(elapsed, 1e-6):.1f} MB/s)")
+
+    def replicate(self, block_id):
+        block = self.meta.get_block(block_id)
+        if block is None:
+            return
+        # Lokasi sebelum menyalin, untuk compare-and-set peta blok
+        nodes = list(block.nodes)
+        live = self.live_replicas(block)
+        missing = self.replication_factor - len(live)
+        if missing <= 0:
+            return
+        if not live:
+            print(f"[Master] ALERT: semua replica {block_id} hilang, tidak bisa dipulihkan!")
+            return
+        targets = self.place(block, missing, set(nodes))
+        if not targets:
+            with self.cond:
+                self.waiting.add(block_id)
+            return
+
+        # Sumber: replica hidup yang paling senggang. Stream putus / tanpa
+        # jawaban sampai batas waktu -> exception, blok dicoba lagi (run)
+        source = min(live, key=lambda n: (self.nodes.get_load(n) or NodeLoad()).load())
+        reply = send_replicate(self.commands, source, pb2.ReplicateRequest(
+            block_id=block_id, targets=targets, rate=self.rate,
+            timeout=copy_timeout(block.length, self.rate)))
+        if not reply.success:
+            print(f"[Master] Re-replikasi {block_id} dari {source} gagal: {reply.message}")
+            self.schedule_retry(block_id)
+            return
+
+        # Node mati dicoret, node baru yang berhasil ditambahkan. Peta blok bisa
+        # sudah berubah selama menyalin (rebalance, replica rusak/hilang
+        # dibuang): salinan baru dibuang dan blok dinilai ulang dari peta terkini
+        new_nodes = [n for n in reply.nodes if n not in live]
+        if not self.meta.update_block_nodes(block_id, live + new_nodes, nodes):
+            current = self.meta.get_block(block_id)
+            for node_id in new_nodes:
+                if current is None or node_id not in current.nodes:
+                    self.delete(node_id, block_id)
+            self.enqueue(block_id)
+            return
+        with self.cond:
+            self.copied_blocks += 1
+            self.copied_bytes += block.length * len(new_nodes)
+            self.episode_blocks += 1
+            self.episode_bytes += block.length * len(new_nodes)
+        print(f"[Master] {block_id}: {source} -> {', '.join(new_nodes)}")
+        if len(new_nodes) < missing:
+            self.enqueue(block_id)
+
+    def delete(self, node_id, name):
+        try:
+            delete_object(self.commands, node_id, name)
+        except Exception as e:
+            print(f"[Master] Gagal menghapus salinan {name} di {node_id}: {e}")
+
+    def stats(self):
+        with self.cond:
+            return {
+                "queued": len(self.heap),
+                "active": self.active,
+                "waiting": len(self.waiting),
+                "retrying": self.retrying,
+                "copied_blocks": self.copied_blocks,
+                "copied_bytes": self.copied_bytes,
+                "failed": self.failed,
+                "last_recovery": self.last_recovery,
+            }
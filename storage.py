@@ -0,0 +1,846 @@
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from checksum import CHECKSUM_CHUNK, ChecksumBuilder, decode_sums, encode_sums, sums_size, verify
+
+# Mesin penyimpanan DataNode (STORAGE_ENGINE):
+# - file    : 1 object = 1 file di STORAGE_PATH (perilaku lama)
+# - segment : object ditumpuk append-only ke file segmen besar dengan indeks
+#             offset di memori (pendekatan Haystack). Jutaan object kecil tidak
+#             lagi berarti jutaan inode, lookup direktori dan open/close.
+# Keduanya memakai antarmuka yang sama: open_writer -> write/commit/abort,
+# read_range, view, checksums, framed, delete, exists, size, names, used_bytes.
+# Setiap object menyimpan CRC32 per CHECKSUM_CHUNK di samping datanya dan
+# read_range mencocokkannya (ChecksumError jika data di disk rusak).
+# Format object (mentah atau rangkaian frame kompresi, open_writer(framed=))
+# dicatat di luar datanya: di file meta FileStore / jenis rekaman segmen.
+# Object lama yang ditulis sebelum ada catatan ini: framed() = None.
+#
+# Durability (commit baru kembali setelah data sesuai mode ini):
+# - fast  : tanpa fsync, data bisa hilang saat crash (untuk benchmark)
+# - group : commit yang datang bersamaan dikumpulkan, 1 fsync per batch
+# - sync  : 1 fsync per object
+
+# Upload ditampung di memori sampai ukuran ini sebelum pindah ke file sementara
+SPOOL_LIMIT = 8 * 1024 * 1024
+# Segmen aktif diganti yang baru setelah mencapai ukuran ini
+SEGMENT_SIZE = 256 * 1024 * 1024
+# Segmen dipadatkan jika porsi data mati (hapus/timpa) sudah sebesar ini.
+# Segmen aktif yang melewati batas ini ditutup dulu (diganti segmen baru)
+# agar node kecil yang tidak pernah mencapai SEGMENT_SIZE tetap dipadatkan.
+COMPACT_RATIO = 0.5
+# Jeda antar pengecekan compaction & penyimpanan indeks (detik)
+COMPACT_INTERVAL = 60
+# Subdirektori FileStore untuk file checksum per object (object lama)
+CHECKSUM_DIR = ".checksums"
+# Subdirektori FileStore untuk file meta per object: header format + checksum
+META_DIR = ".meta"
+# Header file meta: format object (FORMAT_*), dipadatkan ke 4 byte agar
+# checksum sesudahnya tetap rata untuk memoryview.cast("I")
+META_HEADER = struct.Struct("<B3x")
+FORMAT_RAW = 0
+FORMAT_FRAMED = 1
+DURABILITY_MODES = ("fast", "group", "sync")
+
+# Group commit: penulis mendaftarkan commit-nya lalu menunggu; satu thread
+# menjalankan flush untuk semua commit yang terkumpul. Batch berikutnya berisi
+# semua commit yang masuk selama fsync sebelumnya berjalan, sehingga jumlah
+# fsync mengikuti kecepatan disk, bukan jumlah upload.
+class GroupCommitter:
+    def __init__(self, flush):
+        self.flush = flush
+        self.lock = threading.Lock()
+        self.has_work = threading.Condition(self.lock)
+        self.flushed = threading.Condition(self.lock)
+        self.pending = []
+        self.batch = 1
+        self.done = 0
+        # batch_id -> error, agar semua penunggu batch yang gagal ikut gagal
+        self.errors = {}
+        self.batches = 0
+        self.items = 0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def sync(self, item):
+        with self.lock:
+            self.pending.append(item)
+            batch = self.batch
+            self.has_work.notify()
+            while self.done < batch:
+                self.flushed.wait()
+            error = self.errors.get(batch)
+        if error is not None:
+            raise error
+
+    def run(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.has_work.wait()
+                items, self.pending = self.pending, []
+                batch = self.batch
+                self.batch += 1
+            error = None
+            try:
+                self.flush(items)
+            except Exception as e:
+                print(f"[Storage] Group commit gagal: {e}")
+                error = e
+            with self.lock:
+                self.done = batch
+                self.batches += 1
+                self.items += len(items)
+                if error is not None:
+                    self.errors = {b: e for b, e in self.errors.items() if b > batch - 16}
+                    self.errors[batch] = error
+                self.flushed.notify_all()
+
+def fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def check_durability(durability):
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Mode durability tidak dikenal: {durability} (pilihan: {', '.join(DURABILITY_MODES)})")
+# Jumlah file (object/segmen) yang mapping mmap-nya dibiarkan terbuka
+MMAP_CACHE_SIZE = 64
+
+# LRU mapping mmap per file. Baca berulang ke object yang sama tidak perlu
+# open/seek/read lagi; data diambil sebagai potongan memoryview dari page
+# cache. Mapping yang dikeluarkan dari LRU tidak di-close paksa: mmap baru
+# dilepas setelah memoryview terakhir yang masih dipakai stream selesai.
+class MappingCache:
+    def __init__(self, capacity=MMAP_CACHE_SIZE):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.maps = OrderedDict()
+
+    # min_size: mapping lama dibuat ulang jika file sudah bertambah panjang
+    # (segmen aktif terus di-append)
+    def get(self, path, min_size):
+        with self.lock:
+            mapping = self.maps.get(path)
+            if mapping is not None and len(mapping) >= min_size:
+                self.maps.move_to_end(path)
+                return mapping
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with self.lock:
+            self.maps[path] = mapping
+            self.maps.move_to_end(path)
+            while len(self.maps) > self.capacity:
+                self.maps.popitem(last=False)
+        return mapping
+
+    def invalidate(self, path):
+        with self.lock:
+            self.maps.pop(path, None)
+
+# Potongan memoryview untuk rentang [start, end) object yang datanya mulai di
+# posisi base pada mapping. Jika checksum tersedia, potongan dibaca mulai dari
+# batas CHECKSUM_CHUNK, dicocokkan, lalu dipangkas ke rentang yang diminta.
+def read_slices(mapping, base, size, sums, name, start, end, chunk_size):
+    view = memoryview(mapping)
+    if sums is None:
+        # Object lama yang ditulis sebelum ada checksum
+        for pos in range(start, end, chunk_size):
+            yield view[base + pos:base + min(pos + chunk_size, end)]
+        return
+    chunk_size = max(CHECKSUM_CHUNK, chunk_size - chunk_size % CHECKSUM_CHUNK)
+    for pos in range(start - start % CHECKSUM_CHUNK, end, chunk_size):
+        stop = min(pos + chunk_size, size)
+        piece = view[base + pos:base + stop]
+        verify(piece, sums, pos // CHECKSUM_CHUNK, name)
+        yield piece[max(start, pos) - pos:min(end, stop) - pos]
+
+# --- Mode file: 1 object = 1 file ---
+
+class FileWriter:
+    def __init__(self, store, name, framed=False):
+        self.store = store
+        self.name = name
+        self.framed = framed
+        # Ditulis ke .part dulu lalu di-rename agar upload yang putus
+        # tidak meninggalkan file setengah jadi. Akhiran unik: object yang
+        # sama (blok hasil dedup) bisa sedang di-upload beberapa client
+        self.suffix = f".{uuid.uuid4().hex[:12]}.part"
+        self.tmp_path = store.path_of(name) + self.suffix
+        self.f = open(self.tmp_path, "wb")
+        self.size = 0
+        self.sums = ChecksumBuilder()
+
+    def write(self, data):
+        self.f.write(data)
+        self.sums.update(data)
+        self.size += len(data)
+
+    def commit(self):
+        sums_tmp = self.store.meta_path(self.name) + self.suffix
+        sums_f = open(sums_tmp, "wb")
+        try:
+            sums_f.write(META_HEADER.pack(FORMAT_FRAMED if self.framed else FORMAT_RAW))
+            sums_f.write(encode_sums(self.sums.finish()))
+            self.f.flush()
+            sums_f.flush()
+            self.store.replace(self.name, self.tmp_path, self.size, sums_tmp)
+            # fd tetap terbuka sampai fsync selesai (sudah di-rename pun tetap valid)
+            try:
+                self.store.make_durable((self.f, sums_f))
+            except Exception:
+                # Rename terjadi sebelum fsync batch: object yang tidak sempat
+                # aman di disk jangan sampai dilayani/dilaporkan
+                self.store.discard(self.name, os.fstat(self.f.fileno()))
+                raise
+        finally:
+            self.f.close()
+            sums_f.close()
+
+    def abort(self):
+        self.f.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class FileStore:
+    def __init__(self, path, durability="fast"):
+        check_durability(durability)
+        self.path = path
+        self.durability = durability
+        self.lock = threading.Lock()
+        self.maps = MappingCache()
+        self.committer = GroupCommitter(self.flush) if durability == "group" else None
+        self.used = 0
+        os.makedirs(os.path.join(path, CHECKSUM_DIR), exist_ok=True)
+        os.makedirs(os.path.join(path, META_DIR), exist_ok=True)
+        for entry in os.scandir(path):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".part"):
+                # Sisa upload yang terputus sebelum restart
+                os.remove(entry.path)
+                continue
+            self.used += entry.stat().st_size
+        for directory in (CHECKSUM_DIR, META_DIR):
+            for entry in os.scandir(os.path.join(path, directory)):
+                if entry.name.endswith(".part"):
+                    os.remove(entry.path)
+
+    def path_of(self, name):
+        return os.path.join(self.path, name)
+
+    # Checksum object lama disimpan di file terpisah dengan nama yang sama
+    def sums_path(self, name):
+        return os.path.join(self.path, CHECKSUM_DIR, name)
+
+    def meta_path(self, name):
+        return os.path.join(self.path, META_DIR, name)
+
+    # Data & checksum tiap object di-fsync, direktori (hasil rename) cukup
+    # sekali per batch
+    def flush(self, batch):
+        for files in batch:
+            for f in files:
+                os.fsync(f.fileno())
+        fsync_dir(self.path)
+        fsync_dir(os.path.join(self.path, META_DIR))
+
+    def make_durable(self, files):
+        if self.durability == "group":
+            self.committer.sync(files)
+        elif self.durability == "sync":
+            self.flush([files])
+
+    def open_writer(self, name, framed=False):
+        return FileWriter(self, name, framed)
+
+    def replace(self, name, tmp_path, size, meta_tmp):
+        path = self.path_of(name)
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(meta_tmp, self.meta_path(name))
+            self.remove_sidecar(self.sums_path(name))
+            os.replace(tmp_path, path)
+            self.maps.invalidate(path)
+            self.maps.invalidate(self.meta_path(name))
+            self.used += size - old_size
+
+    # Hapus object hasil commit yang gagal di-fsync, kecuali sudah ditimpa
+    # writer lain (file di path bukan lagi file milik writer tersebut)
+    def discard(self, name, stat):
+        path = self.path_of(name)
+        with self.lock:
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                return
+            if (current.st_dev, current.st_ino) != (stat.st_dev, stat.st_ino):
+                return
+            os.remove(path)
+            self.maps.invalidate(path)
+            self.remove_sidecar(self.meta_path(name))
+            self.used -= current.st_size
+
+    def remove_sidecar(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+            self.maps.invalidate(path)
+
+    # Dipanggil dengan lock dipegang. Hasil: (checksum, framed); checksum
+    # berupa memoryview uint32 (tanpa salinan). Object lama: framed None,
+    # checksum None jika ditulis sebelum ada checksum
+    def load_meta(self, name):
+        try:
+            view = memoryview(self.maps.get(self.meta_path(name), 0))
+            return view[META_HEADER.size:].cast("I"), view[0] == FORMAT_FRAMED
+        except FileNotFoundError:
+            pass
+        try:
+            return memoryview(self.maps.get(self.sums_path(name), 0)).cast("I"), None
+        except FileNotFoundError:
+            return None, None
+
+    def checksums(self, name):
+        with self.lock:
+            return self.load_meta(name)[0]
+
+    def framed(self, name):
+        with self.lock:
+            return self.load_meta(name)[1]
+
+    # Seluruh isi object sebagai memoryview, tanpa pencocokan checksum
+    # (untuk membaca header/struktur; data tetap dibaca lewat read_range)
+    def view(self, name):
+        with self.lock:
+            return memoryview(self.maps.get(self.path_of(name), 0))
+
+    # Rentang [offset, offset+length) sebagai potongan memoryview (length 0 = sampai akhir)
+    def read_range(self, name, offset, length, chunk_size):
+        with self.lock:
+            # Data & checksum di-map bersama agar tidak bercampur dengan versi
+            # yang sedang ditimpa
+            mapping = self.maps.get(self.path_of(name), 0)
+            sums = self.load_meta(name)[0]
+        size = len(mapping)
+        end = size if length <= 0 else min(size, offset + length)
+        return read_slices(mapping, 0, size, sums, name, offset, end, chunk_size)
+
+    def delete(self, name):
+        path = self.path_of(name)
+        with self.lock:
+            if not os.path.exists(path):
+                return False
+            size = os.path.getsize(path)
+            os.remove(path)
+            self.maps.invalidate(path)
+            self.remove_sidecar(self.meta_path(name))
+            self.remove_sidecar(self.sums_path(name))
+            self.used -= size
+            return True
+
+    def exists(self, name):
+        return os.path.exists(self.path_of(name))
+
+    def size(self, name):
+        return os.path.getsize(self.path_of(name))
+
+    def names(self):
+        return [entry.name for entry in os.scandir(self.path)
+                if entry.is_file() and not entry.name.endswith(".part")]
+
+    def used_bytes(self):
+        return self.used
+
+    def close(self):
+        pass
+
+# --- Mode segment: append-only + indeks di memori ---
+
+# Header rekaman: magic, jenis rekaman, panjang nama, panjang data
+HEADER = struct.Struct("<4sBHQ")
+MAGIC = b"DFSG"
+RECORD_PUT = 0
+RECORD_DELETE = 1
+# Seperti RECORD_PUT, diikuti checksum data (uint32 per CHECKSUM_CHUNK)
+RECORD_PUT_SUMS = 2
+# Seperti RECORD_PUT_SUMS dengan format object tercatat: mentah / frame
+RECORD_PUT_RAW = 3
+RECORD_PUT_FRAMED = 4
+# Ruang yang dipesan penulis: ditulis di bawah lock sebelum data disalin, lalu
+# ditimpa header rekaman asli setelah salinan selesai. Rekaman yang gagal atau
+# terpotong crash tetap berupa PAD dan dilewati saat scan/compaction.
+RECORD_PAD = 5
+# Jenis rekaman yang diikuti checksum -> framed (None = format tidak tercatat)
+SUMS_RECORDS = {RECORD_PUT_SUMS: None, RECORD_PUT_RAW: False, RECORD_PUT_FRAMED: True}
+INDEX_FILE = "index.pkl"
+
+def record_size(name_bytes, length, kind=RECORD_PUT_SUMS):
+    size = HEADER.size + len(name_bytes) + length
+    return size + sums_size(length) if kind in SUMS_RECORDS else size
+
+class SegmentWriter:
+    def __init__(self, store, name, framed=False):
+        self.store = store
+        self.name = name
+        self.framed = framed
+        # Chunk ditampung dulu karena segmen hanya boleh ditambah 1 rekaman utuh
+        self.spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT, dir=store.path)
+        self.size = 0
+        self.sums = ChecksumBuilder()
+
+    def write(self, data):
+        self.spool.write(data)
+        self.sums.update(data)
+        self.size += len(data)
+
+    def commit(self):
+        try:
+            self.spool.seek(0)
+            entry = self.store.append(self.name, self.spool, self.size, self.sums.finish(),
+                                      framed=self.framed)
+        finally:
+            self.spool.close()
+        try:
+            self.store.make_durable(entry[0])
+        except Exception:
+            # Rekaman belum aman di disk: tutup dengan tombstone agar tidak dilayani
+            self.store.discard(self.name, entry)
+            raise
+
+    def abort(self):
+        self.spool.close()
+
+class SegmentStore:
+    def __init__(self, path, durability="fast"):
+        check_durability(durability)
+        self.path = path
+        self.durability = durability
+        self.lock = threading.Lock()
+        # name -> (segment_id, offset_data, panjang)
+        self.index = {}
+        # segment_id -> ukuran file segmen yang valid
+        self.segment_sizes = {}
+        # segment_id -> byte milik rekaman yang sudah dihapus/ditimpa
+        self.garbage = {}
+        # segment_id -> posisi rekaman yang sedang disalin (belum masuk indeks)
+        self.writing = {}
+        # name -> jumlah penulisan yang sedang menyalin data
+        self.inflight = {}
+        # name -> posisi tombstone yang ditulis selama masih ada penulisan
+        # berjalan untuk nama tersebut (penulisan yang lebih tua kalah)
+        self.removed = {}
+        self.maps = MappingCache()
+        self.closed = False
+        os.makedirs(path, exist_ok=True)
+        self.load()
+        if not self.segment_sizes:
+            self.segment_sizes[0] = 0
+        self.active_id = max(self.segment_sizes)
+        self.active_fd = self.open_segment(self.active_id)
+        # 1 fsync per segmen yang ditulis dalam batch (biasanya hanya segmen aktif)
+        self.committer = GroupCommitter(self.flush) if durability == "group" else None
+        threading.Thread(target=self.run_compaction, daemon=True).start()
+
+    def segment_path(self, segment_id):
+        return os.path.join(self.path, f"segment.{segment_id:06d}.dat")
+
+    def open_segment(self, segment_id):
+        return os.open(self.segment_path(segment_id), os.O_WRONLY | os.O_CREAT, 0o666)
+
+    def list_segments(self):
+        result = []
+        for name in os.listdir(self.path):
+            if name.startswith("segment.") and name.endswith(".dat"):
+                result.append(int(name[len("segment."):-len(".dat")]))
+        return sorted(result)
+
+    # --- Startup: muat indeks tersimpan, lalu scan bagian segmen setelahnya ---
+    def load(self):
+        scanned = {}
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                self.index, scanned, self.garbage = pickle.load(f)
+        segments = self.list_segments()
+        for segment_id in segments:
+            self.scan_segment(segment_id, scanned.get(segment_id, 0))
+        # Entri yang menunjuk segmen yang sudah dipadatkan (crash sebelum
+        # indeks disimpan ulang) dibuang; salinannya sudah ditemukan saat scan
+        existing = set(segments)
+        for name, entry in list(self.index.items()):
+            if entry[0] not in existing:
+                del self.index[name]
+        self.garbage = {s: g for s, g in self.garbage.items() if s in existing}
+
+    def scan_segment(self, segment_id, start):
+        path = self.segment_path(segment_id)
+        size = os.path.getsize(path)
+        pos = min(start, size)
+        with open(path, "rb") as f:
+            f.seek(pos)
+            while pos + HEADER.size <= size:
+                magic, kind, name_len, length = HEADER.unpack(f.read(HEADER.size))
+                end = pos + HEADER.size + name_len + length
+                if kind in SUMS_RECORDS:
+                    end += sums_size(length)
+                if magic != MAGIC or end > size:
+                    break
+                name_bytes = f.read(name_len)
+                self.apply(segment_id, kind, name_bytes.decode(), pos + HEADER.size + name_len, length)
+                f.seek(end)
+                pos = end
+        if pos < size:
+            # Rekaman terakhir terpotong karena crash saat menulis
+            os.truncate(path, pos)
+        self.segment_sizes[segment_id] = pos
+
+    def apply(self, segment_id, kind, name, offset, length):
+        if kind == RECORD_PAD:
+            self.garbage[segment_id] = self.garbage.get(segment_id, 0) + HEADER.size + length
+            return
+        name_bytes = name.encode()
+        old = self.index.pop(name, None)
+        if old is not None:
+            self.garbage[old[0]] = self.garbage.get(old[0], 0) + record_size(name_bytes, old[2])
+        if kind != RECORD_DELETE:
+            self.index[name] = (segment_id, offset, length)
+        else:
+            # Tombstone sendiri tidak berisi data hidup
+            self.garbage[segment_id] = self.garbage.get(segment_id, 0) + record_size(name_bytes, 0)
+
+    # fsync di luar lock lewat salinan fd, agar penulis lain tidak tertahan.
+    # Segmen yang sudah dipadatkan tidak perlu lagi: salinannya di-fsync oleh
+    # compaction sebelum segmen lama dihapus.
+    def sync_segment(self, segment_id):
+        with self.lock:
+            if segment_id == self.active_id:
+                fd = os.dup(self.active_fd)
+            elif segment_id in self.segment_sizes:
+                fd = os.open(self.segment_path(segment_id), os.O_RDONLY)
+            else:
+                return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def flush(self, batch):
+        for segment_id in sorted(set(batch)):
+            self.sync_segment(segment_id)
+
+    def make_durable(self, segment_id):
+        if self.durability == "group":
+            self.committer.sync(segment_id)
+        elif self.durability == "sync":
+            self.sync_segment(segment_id)
+
+    # Dipanggil dengan lock dipegang. Penulis yang masih menyalin ke segmen
+    # lama memakai salinan fd-nya sendiri dan mem-fsync segmen itu sendiri.
+    def rotate(self):
+        if self.durability != "fast":
+            os.fsync(self.active_fd)
+        os.close(self.active_fd)
+        self.active_id += 1
+        self.segment_sizes[self.active_id] = 0
+        self.active_fd = self.open_segment(self.active_id)
+
+    # Dipanggil dengan lock dipegang: pesan ruang rekaman di segmen aktif
+    # (ditandai PAD sampai rekaman selesai ditulis). Hasil: (segment_id, posisi)
+    def reserve(self, name_bytes, length, kind):
+        if self.segment_sizes[self.active_id] >= SEGMENT_SIZE:
+            self.rotate()
+        pos = self.segment_sizes[self.active_id]
+        size = record_size(name_bytes, length, kind)
+        write_at(self.active_fd, HEADER.pack(MAGIC, RECORD_PAD, 0, size - HEADER.size), pos)
+        self.segment_sizes[self.active_id] = pos + size
+        return self.active_id, pos
+
+    # Dipanggil dengan lock dipegang (tombstone kecil, langsung ditulis)
+    def write_tombstone(self, name):
+        name_bytes = name.encode()
+        segment_id, pos = self.reserve(name_bytes, 0, RECORD_DELETE)
+        fill_record(self.active_fd, pos, RECORD_DELETE, name_bytes, None, 0)
+        if name in self.inflight:
+            self.removed[name] = (segment_id, pos + HEADER.size + len(name_bytes))
+        self.apply(segment_id, RECORD_DELETE, name, pos + HEADER.size + len(name_bytes), 0)
+
+    # Dipanggil dengan lock dipegang. Urutan di log menentukan versi terbaru
+    # (sama seperti saat scan): rekaman yang sudah didahului rekaman lebih baru
+    # untuk nama yang sama (selesai lebih dulu) langsung dihitung garbage.
+    def publish(self, kind, name, entry):
+        newer = [e[:2] for e in (self.index.get(name), self.removed.get(name)) if e is not None]
+        if newer and max(newer) > entry[:2]:
+            size = record_size(name.encode(), entry[2], kind)
+            self.garbage[entry[0]] = self.garbage.get(entry[0], 0) + size
+        else:
+            self.apply(entry[0], kind, name, entry[1], entry[2])
+
+    # Ruang dipesan di bawah lock, data disalin di luar lock (penulis dan
+    # pembaca lain tidak menunggu salinan), lalu entri indeks dipasang di bawah
+    # lock. Hasil: entri indeks rekaman baru, None jika object sudah berubah
+    # (expect), False jika object sedang ditulis (expect).
+    def append(self, name, src, length, sums=None, expect=None, framed=None):
+        if sums is None:
+            kind = RECORD_PUT
+        elif framed is None:
+            kind = RECORD_PUT_SUMS
+        else:
+            kind = RECORD_PUT_FRAMED if framed else RECORD_PUT_RAW
+        name_bytes = name.encode()
+        with self.lock:
+            # expect dipakai compaction: hanya salin jika object belum berubah
+            # dan tidak sedang ditimpa (salinan tidak boleh menyusul versi baru)
+            if expect is not None:
+                if self.index.get(name) != expect:
+                    return None
+                if name in self.inflight:
+                    return False
+            segment_id, pos = self.reserve(name_bytes, length, kind)
+            fd = os.dup(self.active_fd)
+            self.writing.setdefault(segment_id, set()).add(pos)
+            self.inflight[name] = self.inflight.get(name, 0) + 1
+        entry = (segment_id, pos + HEADER.size + len(name_bytes), length)
+        written = False
+        try:
+            fill_record(fd, pos, kind, name_bytes, src, length, sums)
+            written = True
+        finally:
+            os.close(fd)
+            with self.lock:
+                self.writing[segment_id].discard(pos)
+                if not self.writing[segment_id]:
+                    del self.writing[segment_id]
+                if written:
+                    self.publish(kind, name, entry)
+                else:
+                    # Ruang tetap PAD di segmen
+                    size = record_size(name_bytes, length, kind)
+                    self.garbage[segment_id] = self.garbage.get(segment_id, 0) + size
+                count = self.inflight.pop(name) - 1
+                if count:
+                    self.inflight[name] = count
+                else:
+                    self.removed.pop(name, None)
+        return entry
+
+    def open_writer(self, name, framed=False):
+        return SegmentWriter(self, name, framed)
+
+    # Tombstone untuk rekaman yang gagal di-fsync, kecuali object sudah
+    # ditimpa/dihapus writer lain (entri indeks berbeda)
+    def discard(self, name, entry):
+        with self.lock:
+            if entry is not None and self.index.get(name) == entry:
+                self.write_tombstone(name)
+
+    # Dipanggil dengan lock dipegang. Jenis rekaman (checksum & format) dibaca
+    # dari header-nya; checksum langsung dipotong dari mapping segmen (tanpa
+    # salinan). Hasil: (mapping, offset_data, panjang, checksum, framed)
+    def locate(self, name):
+        entry = self.index.get(name)
+        if entry is None:
+            raise FileNotFoundError(name)
+        segment_id, data_offset, size = entry
+        path = self.segment_path(segment_id)
+        # Di-map di bawah lock: segmen yang dipadatkan setelah ini tetap
+        # terbaca lewat mapping yang sudah ada
+        mapping = self.maps.get(path, data_offset + size)
+        header_pos = data_offset - len(name.encode()) - HEADER.size
+        kind = mapping[header_pos + 4]
+        if kind not in SUMS_RECORDS:
+            return mapping, data_offset, size, None, None
+        sums_end = data_offset + size + sums_size(size)
+        if len(mapping) < sums_end:
+            mapping = self.maps.get(path, sums_end)
+        sums = memoryview(mapping)[data_offset + size:sums_end].cast("I")
+        return mapping, data_offset, size, sums, SUMS_RECORDS[kind]
+
+    def checksums(self, name):
+        with self.lock:
+            return self.locate(name)[3]
+
+    def framed(self, name):
+        with self.lock:
+            return self.locate(name)[4]
+
+    def view(self, name):
+        with self.lock:
+            mapping, data_offset, size, _, _ = self.locate(name)
+        return memoryview(mapping)[data_offset:data_offset + size]
+
+    def read_range(self, name, offset, length, chunk_size):
+        with self.lock:
+            mapping, data_offset, size, sums, _ = self.locate(name)
+        end = size if length <= 0 else min(size, offset + length)
+        return read_slices(mapping, data_offset, size, sums, name, offset, max(offset, end), chunk_size)
+
+    def delete(self, name):
+        with self.lock:
+            if name not in self.index:
+                return False
+            self.write_tombstone(name)
+            return True
+
+    def exists(self, name):
+        return name in self.index
+
+    def size(self, name):
+        entry = self.index.get(name)
+        if entry is None:
+            raise FileNotFoundError(name)
+        return entry[2]
+
+    def names(self):
+        return list(self.index)
+
+    # Byte rekaman hidup: sisa rekaman terhapus/tertimpa (garbage) dibebaskan
+    # compaction, jadi tidak dihitung (rebalancer & penempatan memakai angka ini)
+    def used_bytes(self):
+        with self.lock:
+            return sum(self.segment_sizes.values()) - sum(self.garbage.values())
+
+    # Indeks hanya disimpan saat tidak ada rekaman yang sedang disalin, agar
+    # ukuran segmen tersimpan (titik mulai scan) tidak melewati rekaman yang
+    # belum masuk indeks. Hasil: False jika tetap sibuk sampai batas waktu.
+    def save_index(self, timeout=1.0):
+        deadline = time.time() + timeout
+        while True:
+            with self.lock:
+                if not self.writing:
+                    state = (dict(self.index), dict(self.segment_sizes), dict(self.garbage))
+                    break
+            if time.time() > deadline:
+                return False
+            time.sleep(0.01)
+        index_path = os.path.join(self.path, INDEX_FILE)
+        with open(index_path + ".tmp", "wb") as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(index_path + ".tmp", index_path)
+        return True
+
+    # --- Compaction: salin rekaman hidup ke segmen aktif, hapus segmen lama ---
+    def run_compaction(self):
+        while not self.closed:
+            time.sleep(COMPACT_INTERVAL)
+            if self.closed:
+                break
+            try:
+                self.compact()
+                self.save_index()
+            except Exception as e:
+                print(f"[Storage] Compaction gagal: {e}")
+
+    def compact(self):
+        with self.lock:
+            size = self.segment_sizes[self.active_id]
+            if size and self.garbage.get(self.active_id, 0) >= size * COMPACT_RATIO:
+                self.rotate()
+            candidates = [
+                s for s, size in self.segment_sizes.items()
+                if s != self.active_id and s not in self.writing and size
+                and self.garbage.get(s, 0) >= size * COMPACT_RATIO
+            ]
+        reclaimed = 0
+        for segment_id in sorted(candidates):
+            reclaimed += self.compact_segment(segment_id)
+        if candidates:
+            print(f"[Storage] Compaction {len(candidates)} segmen, {reclaimed} byte dibebaskan")
+        return reclaimed
+
+    # Hasil: byte yang dibebaskan (0 jika segmen dipertahankan karena ada
+    # object yang sedang ditulis; dicoba lagi pada compaction berikutnya)
+    def compact_segment(self, segment_id):
+        path = self.segment_path(segment_id)
+        size = self.segment_sizes[segment_id]
+        busy = False
+        targets = set()
+        with open(path, "rb") as f:
+            pos = 0
+            while pos < size:
+                f.seek(pos)
+                magic, kind, name_len, length = HEADER.unpack(f.read(HEADER.size))
+                name = f.read(name_len).decode()
+                offset = pos + HEADER.size + name_len
+                if kind == RECORD_DELETE:
+                    with self.lock:
+                        # Tombstone dibawa ke segmen aktif selama masih ada segmen
+                        # lebih tua yang mungkin berisi versi lama object ini.
+                        # Object yang sedang ditulis: tombstone baru akan
+                        # mengalahkan penulisan itu, jadi segmen dipertahankan.
+                        if name in self.inflight:
+                            busy = True
+                        elif name not in self.index and min(self.segment_sizes) < segment_id:
+                            self.write_tombstone(name)
+                            targets.add(self.active_id)
+                elif kind != RECORD_PAD:
+                    sums = None
+                    if kind in SUMS_RECORDS:
+                        f.seek(offset + length)
+                        sums = decode_sums(f.read(sums_size(length)))
+                        f.seek(offset)
+                    entry = self.append(name, f, length, sums, expect=(segment_id, offset, length),
+                                        framed=SUMS_RECORDS.get(kind))
+                    if entry is False:
+                        busy = True
+                    elif entry is not None:
+                        targets.add(entry[0])
+                pos = offset + length + (sums_size(length) if kind in SUMS_RECORDS else 0)
+        if busy:
+            return 0
+        # Salinan harus sudah aman di disk sebelum segmen lama dihapus
+        if self.durability != "fast":
+            for target in sorted(targets):
+                self.sync_segment(target)
+        with self.lock:
+            del self.segment_sizes[segment_id]
+            self.garbage.pop(segment_id, None)
+            os.remove(path)
+            self.maps.invalidate(path)
+        return size
+
+    def close(self):
+        self.closed = True
+        self.save_index()
+        with self.lock:
+            os.close(self.active_fd)
+
+def write_at(fd, data, pos):
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, pos)
+        view = view[written:]
+        pos += written
+
+# Isi rekaman di ruang yang sudah dipesan (reserve). Header asli ditulis
+# terakhir, menggantikan header PAD.
+def fill_record(fd, pos, kind, name_bytes, src, length, sums=None):
+    offset = pos + HEADER.size
+    write_at(fd, name_bytes, offset)
+    offset += len(name_bytes)
+    remaining = length
+    while remaining > 0:
+        data = src.read(min(1024 * 1024, remaining))
+        if not data:
+            raise IOError("Data sumber lebih pendek dari panjang rekaman")
+        write_at(fd, data, offset)
+        offset += len(data)
+        remaining -= len(data)
+    if kind in SUMS_RECORDS:
+        write_at(fd, encode_sums(sums), offset)
+    write_at(fd, HEADER.pack(MAGIC, kind, len(name_bytes), length), pos)
+
+ENGINES = {"file": FileStore, "segment": SegmentStore}
+
+def make_store(engine, path, durability="fast"):
+    if engine not in ENGINES:
+        raise ValueError(f"Storage engine tidak dikenal: {engine} (pilihan: {', '.join(ENGINES)})")
+    return ENGINES[engine](path, durability)